@@ -0,0 +1,175 @@
+import datetime as dt, json, os, re, sqlite3
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode, unquote, urljoin
+from app.l1_cache import L1Cache, MISSING
+from app import db
+from app.metrics import inc
+
+# Canonical URL resolution shared by the API cache key and ingest:
+#   1. rules: tracking params, AMP variants, mobile/edition hosts, aggregator wrappers
+#   2. learned mapping (url_canonical table) from rel=canonical and redirect targets
+DB_PATH = db.DB_PATH
+RULES_PATH = 'config/canonical_rules.json'
+CANON_MEMO_BYTES = int(os.getenv('CANON_MEMO_BYTES', str(4 * 1024 * 1024)))
+CANON_MEMO_TTL_S = int(os.getenv('CANON_MEMO_TTL_S', '600'))
+CANON_MEMO_NEG_TTL_S = int(os.getenv('CANON_MEMO_NEG_TTL_S', '60'))
+MAX_HOPS = 3
+
+# Dropped on every host: click/ad identifiers that never select content. Names that some
+# sites do use for content (ref, output, amp, cmp...) go in a site's "drop_params" rule.
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'ref_src',
+}
+TRACKING_PREFIXES = ('utm_', 'at_', 'pk_', 'mtm_', 'itm_')
+MOBILE_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.')
+AGGREGATORS = {'news.google.com': 'url', 'www.google.com': 'url', 'google.com': 'url'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS url_canonical(
+    url TEXT PRIMARY KEY,       -- normalized observed URL
+    canonical TEXT NOT NULL,    -- normalized canonical URL
+    source TEXT NOT NULL,       -- rel | redirect
+    update_time TEXT NOT NULL
+);
+"""
+
+def _load_rules(path=RULES_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+RULES = _load_rules()
+
+def _site(host: str) -> tuple[str | None, dict]:
+    # Allowlisted site a host belongs to (via its rule), if any
+    for domain, rule in RULES.items():
+        if host == domain or host.endswith('.' + domain):
+            return domain, rule
+    return None, {}
+
+def _strip_mobile(host: str) -> str:
+    for p in MOBILE_PREFIXES:
+        if host.startswith(p) and host.count('.') > 1:
+            return host[len(p):]
+    return host
+
+def _unwrap(u) -> str | None:
+    # Aggregator redirect wrappers and the Google AMP cache
+    host = (u.hostname or '').lower()
+    param = AGGREGATORS.get(host)
+    if param:
+        qs = dict(parse_qsl(u.query))
+        target = qs.get(param) or qs.get('q')
+        if target and target.startswith('http'):
+            return unquote(target)
+    if host.endswith('.cdn.ampproject.org'):
+        m = re.match(r'^/[cv]/(s/)?(.+)$', u.path)
+        if m:
+            return ('https://' if m.group(1) else 'http://') + m.group(2)
+    return None
+
+def _strip_amp(path: str) -> str:
+    path = re.sub(r'^/amp(?=/)', '', path)
+    path = re.sub(r'/amp/?$', '', path)
+    path = re.sub(r'\.amp$', '', path)
+    return path or '/'
+
+def normalize_url(url: str) -> str:
+    """Rule-based canonical form; pure, no I/O."""
+    u = urlparse((url or '').strip())
+    for _ in range(MAX_HOPS):
+        inner = _unwrap(u)
+        if not inner:
+            break
+        u = urlparse(inner)
+    host = (u.hostname or '').lower().rstrip('.')
+    site, rule = _site(host)
+    if site and (_strip_mobile(host) == site or host in rule.get('aliases', ())):
+        host = rule.get('host', host)
+    keep = {k.lower() for k in rule.get('keep_params', ())}
+    drop = TRACKING_PARAMS | {k.lower() for k in rule.get('drop_params', ())}
+    if rule.get('drop_query'):
+        q = [(k, v) for k, v in parse_qsl(u.query, keep_blank_values=True) if k.lower() in keep]
+    else:
+        q = [(k, v) for k, v in parse_qsl(u.query, keep_blank_values=True)
+             if k.lower() in keep or not (k.lower() in drop or k.lower().startswith(TRACKING_PREFIXES))]
+    path = _strip_amp(re.sub(r'/{2,}', '/', u.path)).rstrip('/') or '/'
+    # This URL is also the one fetched: only sites with a rule (all served over https) get
+    # their scheme rewritten; anything else keeps http if that's what it was given
+    scheme = 'https' if site or not u.scheme else u.scheme.lower()
+    return urlunparse((scheme, host, path, '', urlencode(sorted(q), doseq=True), ''))
+
+def same_site(a: str, b: str) -> bool:
+    ha, hb = _strip_mobile((urlparse(a).hostname or '').lower()), _strip_mobile((urlparse(b).hostname or '').lower())
+    return bool(ha) and (ha == hb or ha.endswith('.' + hb) or hb.endswith('.' + ha))
+
+_LINK_RE = re.compile(r'<link\b[^>]*>', re.I)
+_ATTR_RE = re.compile(r'([a-zA-Z:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+
+def canonical_link(html: str, base_url: str | None = None) -> str | None:
+    """href of <link rel=canonical> from the page head, absolutized."""
+    head = (html or '')[:200_000]
+    end = head.lower().find('</head>')
+    for tag in _LINK_RE.findall(head if end < 0 else head[:end]):
+        attrs = {m.group(1).lower(): m.group(2) or m.group(3) or m.group(4) or '' for m in _ATTR_RE.finditer(tag)}
+        if 'canonical' in attrs.get('rel', '').lower().split() and attrs.get('href'):
+            return urljoin(base_url or '', attrs['href'].strip())
+    return None
+
+_memo = L1Cache(CANON_MEMO_BYTES, name='canonical_memo')
+_schema = db.Schema(SCHEMA)
+
+def _connect() -> sqlite3.Connection:
+    return db.connect(DB_PATH, _schema)
+
+def _lookup(url: str) -> str | None:
+    hit = _memo.get(url)
+    if hit is not MISSING:
+        return hit
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute('SELECT canonical FROM url_canonical WHERE url = ?', (url,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    if row:
+        _memo.set(url, row[0], CANON_MEMO_TTL_S)
+        return row[0]
+    _memo.set_missing(url, CANON_MEMO_NEG_TTL_S)
+    return None
+
+def resolve_url(url: str) -> str:
+    """Rules, then learned mappings (a few hops). Blocking: SQLite on a memo miss."""
+    cur = normalize_url(url)
+    for _ in range(MAX_HOPS):
+        nxt = _lookup(cur)
+        if not nxt or nxt == cur:
+            break
+        inc('canonical_mapped', 1)
+        cur = nxt
+    return cur
+
+def remember(url: str, canonical: str, source: str) -> str | None:
+    """Record url -> canonical (both normalized). Cross-site targets are ignored."""
+    src, dst = normalize_url(url), normalize_url(canonical)
+    if src == dst or not same_site(src, dst):
+        return None
+    if _lookup(src) == dst:
+        return dst
+    try:
+        conn = _connect()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO url_canonical(url, canonical, source, update_time) VALUES (?, ?, ?, ?)',
+                (src, dst, source, dt.datetime.now(dt.timezone.utc).isoformat()))
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    _memo.set(src, dst, CANON_MEMO_TTL_S)
+    inc(f'canonical_learned_{source}', 1)
+    return dst
@@ -0,0 +1,55 @@
+from langdetect import DetectorFactory, detect, LangDetectException
+from app import metrics
+from app.extract import parse_html, extract, extract_body, extract_canonical
+from app.fingerprint import content_fingerprint
+from app.near_dup import simhash
+
+# Work submitted to the CPU pool. Kept free of the web app and the models so process
+# workers (CPU_MODE=process) import only lxml/readability/langdetect.
+DetectorFactory.seed = 0
+_warm = False
+
+def warm() -> None:
+    """Pool initializer: load langdetect profiles and lxml/readability before the first task."""
+    global _warm
+    if _warm:
+        return
+    detect('warm up the language profiles')
+    extract('<html><body><p>warm</p></body></html>')
+    metrics.drain()
+    _warm = True
+
+def call(fn, args, kwargs):
+    # Runs in a worker process; ships the metrics it recorded back with the result
+    return fn(*args, **kwargs), metrics.drain()
+
+def detect_lang(text: str, default='en') -> str:
+    try:
+        code = detect(text)
+        if code.startswith('es'):
+            return 'es'
+        if code.startswith('en'):
+            return 'en'
+        return default
+    except LangDetectException:
+        return default
+
+def ingest_page(html: str, url: str) -> dict | None:
+    """Everything ingest needs from a fetched page, from one parse. None if the page is empty."""
+    tree = parse_html(html)
+    if tree is None:
+        return None
+    canonical = extract_canonical(tree, url)
+    text, _ = extract_body(tree, url)
+    if not text:
+        return None
+    return {
+        'text': text,
+        'canonical': canonical,
+        'lang': detect_lang(text),
+        'text_hash': content_fingerprint(text),
+        'simhash': simhash(text),
+    }
+
+def ingest_chunk(pages: list[tuple[str, str]]) -> list[dict | None]:
+    return [ingest_page(html, url) for html, url in pages]
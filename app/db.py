@@ -0,0 +1,22 @@
+import os, sqlite3, threading
+
+# SQLite connections for the modules that keep their tables in the app database
+# (canonical URL map, translation memory). Each one owns a Schema that is created on its
+# first connection per process; later connects skip the DDL.
+DB_PATH = os.getenv('DB_PATH', 'data/app.db')
+
+class Schema:
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.ready = False
+        self.lock = threading.Lock()
+
+def connect(path: str = DB_PATH, schema: Schema | None = None) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5)
+    if schema is not None and not schema.ready:
+        with schema.lock:
+            if not schema.ready:
+                conn.executescript(schema.sql)
+                schema.ready = True
+    return conn
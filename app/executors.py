@@ -0,0 +1,75 @@
+import asyncio, multiprocessing, os, threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
+from app.metrics import merge
+
+# Explicitly sized pools so blocking work never competes with the Starlette threadpool
+CPU_WORKERS = int(os.getenv('CPU_WORKERS', str(os.cpu_count() or 2)))
+MODEL_WORKERS = int(os.getenv('MODEL_WORKERS', '2'))
+IO_WORKERS = int(os.getenv('IO_WORKERS', '8'))
+# thread: cleaning shares the GIL with the event loop; process: one warm worker per core
+CPU_MODE = os.getenv('CPU_MODE', 'thread')
+# Recycle a worker process after this many tasks so lxml/readability heap growth stays bounded
+CPU_MAX_TASKS_PER_CHILD = int(os.getenv('CPU_MAX_TASKS_PER_CHILD', '500'))
+
+MODEL_POOL = ThreadPoolExecutor(max_workers=MODEL_WORKERS, thread_name_prefix='model')
+IO_POOL = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='io')
+
+_cpu_pool = None
+_cpu_lock = threading.Lock()
+
+def _process_pool() -> ProcessPoolExecutor:
+    from app import cpu_tasks
+    # forkserver: workers fork from a small server that has already imported the CPU
+    # modules, not from the API process with its threads and model weights
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    ctx = multiprocessing.get_context(method)
+    if method == 'forkserver':
+        ctx.set_forkserver_preload(['app.cpu_tasks'])
+    return ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=ctx, initializer=cpu_tasks.warm,
+                               max_tasks_per_child=CPU_MAX_TASKS_PER_CHILD)
+
+def cpu_pool():
+    global _cpu_pool
+    with _cpu_lock:
+        if _cpu_pool is None:
+            _cpu_pool = (_process_pool() if CPU_MODE == 'process'
+                         else ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix='cpu'))
+        return _cpu_pool
+
+def warm_cpu_pool() -> None:
+    """Start every worker process now instead of on the first requests."""
+    if CPU_MODE != 'process':
+        return
+    from app import cpu_tasks
+    pool = cpu_pool()
+    wait([pool.submit(cpu_tasks.warm) for _ in range(CPU_WORKERS)])
+
+def shutdown_cpu_pool() -> None:
+    global _cpu_pool
+    with _cpu_lock:
+        pool, _cpu_pool = _cpu_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+async def _run(pool, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, partial(fn, *args, **kwargs))
+
+async def run_cpu(fn, *args, **kwargs):
+    """HTML cleaning, parsing and other pure-Python CPU work. In process mode fn must be
+    a module-level function (see app/cpu_tasks.py); its metrics are merged back here."""
+    if CPU_MODE != 'process':
+        return await _run(cpu_pool(), fn, *args, **kwargs)
+    from app import cpu_tasks
+    out, delta = await _run(cpu_pool(), cpu_tasks.call, fn, args, kwargs)
+    merge(delta)
+    return out
+
+async def run_model(fn, *args, **kwargs):
+    """Model inference (translation, sentiment)."""
+    return await _run(MODEL_POOL, fn, *args, **kwargs)
+
+async def run_io(fn, *args, **kwargs):
+    """Blocking drivers: SQLite writes and psycopg cache calls."""
+    return await _run(IO_POOL, fn, *args, **kwargs)
@@ -0,0 +1,78 @@
+import copy, hashlib, json, os
+from urllib.parse import urlparse
+from lxml.cssselect import CSSSelector
+
+# Declarative per-site extraction rules (config/extractors.json), tried before readability:
+#   body:   CSS selectors for the article text, first one that matches wins
+#   title / date: CSS selectors, "sel@attr" reads an attribute instead of the element text
+#   remove: boilerplate inside the body (related links, ads, captions)
+EXTRACTORS_PATH = 'config/extractors.json'
+# A rule that yields less text than this falls back to readability (layout probably changed)
+EXTRACT_RULE_MIN_CHARS = int(os.getenv('EXTRACT_RULE_MIN_CHARS', '300'))
+
+class Rule:
+    def __init__(self, domain: str, spec: dict):
+        self.domain = domain
+        self.body = [CSSSelector(s) for s in spec.get('body', [])]
+        self.title = [self._field(s) for s in spec.get('title', [])]
+        self.date = [self._field(s) for s in spec.get('date', [])]
+        self.remove = [CSSSelector(s) for s in spec.get('remove', [])]
+        self.min_chars = int(spec.get('min_chars', EXTRACT_RULE_MIN_CHARS))
+        # Changes whenever the rule does; part of the key for cleaned copies in the page cache
+        self.version = hashlib.sha256(json.dumps(dict(spec, min_chars=self.min_chars), sort_keys=True).encode()).hexdigest()[:12]
+
+    @staticmethod
+    def _field(s: str) -> tuple:
+        sel, _, attr = s.partition('@')
+        return CSSSelector(sel), attr or None
+
+    @staticmethod
+    def _first(tree, fields) -> str | None:
+        for sel, attr in fields:
+            for el in sel(tree):
+                v = el.get(attr) if attr else ' '.join(el.text_content().split())
+                if v and v.strip():
+                    return v.strip()
+        return None
+
+    def body_nodes(self, tree) -> list:
+        for sel in self.body:
+            nodes = sel(tree)
+            if nodes:
+                # Drop matches nested inside another match so text isn't counted twice
+                found = set(nodes)
+                return [n for n in nodes if not any(a in found for a in n.iterancestors())]
+        return []
+
+    def text(self, tree, unsafe_tags) -> str:
+        parts = []
+        for node in self.body_nodes(tree):
+            # Work on a copy: the tree is reused by readability if this rule comes up short
+            node = copy.deepcopy(node)
+            for sel in self.remove:
+                for el in sel(node):
+                    el.drop_tree()
+            for el in list(node.iter(*unsafe_tags)):
+                el.drop_tree()
+            parts.append(' '.join(node.itertext()))
+        return ' '.join(' '.join(parts).split())
+
+    def meta(self, tree) -> dict:
+        return {'title': self._first(tree, self.title), 'pub_time': self._first(tree, self.date)}
+
+def load_rules(path: str = EXTRACTORS_PATH) -> dict[str, Rule]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {domain: Rule(domain, spec) for domain, spec in json.load(f).items()}
+
+RULES = load_rules()
+
+def rule_for(url: str | None) -> Rule | None:
+    host = (urlparse(url or '').hostname or '').lower().rstrip('.')
+    while host:
+        rule = RULES.get(host)
+        if rule:
+            return rule
+        host = host.partition('.')[2]
+    return None
@@ -0,0 +1,21 @@
+import hashlib, re, unicodedata
+
+_PUNCT = re.compile(r'[^\w\s]')
+
+def canonical_text(text: str) -> str:
+    # NFKC + casefold, drop punctuation, collapse whitespace
+    s = unicodedata.normalize('NFKC', text or '').lower()
+    s = _PUNCT.sub(' ', s)
+    return ' '.join(s.split())
+
+def content_fingerprint(text: str) -> str:
+    """Canonical content hash shared by ingest (articles.text_hash) and the API cache."""
+    return hashlib.sha256(canonical_text(text).encode('utf-8')).hexdigest()
+
+def legacy_fingerprints(text: str) -> tuple[str, str]:
+    """Hashes stored before content_fingerprint: the API's whitespace-only sha256 and ingest's
+    lowercase/no-punctuation one. Rows keep these (articles only hold a snippet, so they can't
+    be rehashed); find_analysis falls back to them."""
+    api = re.sub(r'\s+', ' ', (text or '').strip())
+    ingest = re.sub(r'[^\w\s]', '', ' '.join((text or '').lower().split()))
+    return tuple(hashlib.sha256(s.encode('utf-8')).hexdigest() for s in (api, ingest))
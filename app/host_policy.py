@@ -0,0 +1,228 @@
+import asyncio, os, threading, time
+from collections import OrderedDict
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+from app.metrics import inc, observe_ms, set_gauge
+from app.singleflight import SingleFlight
+
+# Per-host fetch policy shared by the API fetch path and ingest: allowlist, robots.txt, crawl-delay
+ALLOWLIST_PATH = 'config/allowlist.txt'
+ALLOWLIST_CHECK_S = float(os.getenv('ALLOWLIST_CHECK_S', '5'))
+ROBOTS_TTL_S = int(os.getenv('ROBOTS_TTL_S', '3600'))
+ROBOTS_ERROR_TTL_S = int(os.getenv('ROBOTS_ERROR_TTL_S', '300'))
+ROBOTS_CACHE_MAX = int(os.getenv('ROBOTS_CACHE_MAX', '1024'))
+ROBOTS_TIMEOUT_S = 5
+MAX_CRAWL_DELAY_S = float(os.getenv('MAX_CRAWL_DELAY_S', '10'))
+
+def _host(url_or_host: str) -> str:
+    s = url_or_host or ''
+    host = urlparse(s).hostname if '//' in s else s.split(':', 1)[0]
+    return (host or '').lower().rstrip('.')
+
+class Allowlist:
+    """Suffix index over allowlisted domains; reloads when the file's mtime changes."""
+
+    def __init__(self, path: str = ALLOWLIST_PATH):
+        self.path = path
+        self.domains: frozenset[str] = frozenset()
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = [l.strip().lower().strip('.') for l in f]
+        except OSError:
+            mtime, lines = None, []
+        with self._lock:
+            self.domains = frozenset(l for l in lines if l and not l.startswith('#'))
+            self._mtime = mtime
+            self._checked = time.monotonic()
+        set_gauge('allowlist_domains', len(self.domains))
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked < ALLOWLIST_CHECK_S:
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self.reload()
+            inc('allowlist_reloads', 1)
+
+    def allows(self, url_or_host: str) -> bool:
+        self._maybe_reload()
+        labels = _host(url_or_host).split('.')
+        domains = self.domains
+        # host, then each parent suffix: a.b.bbc.com -> b.bbc.com -> bbc.com -> com
+        if any('.'.join(labels[i:]) in domains for i in range(len(labels))):
+            return True
+        inc('host_policy_domain_denied', 1)
+        return False
+
+ALLOW_ALL, DENY_ALL = 'allow_all', 'deny_all'
+
+def _parse_robots(status: int, text: str):
+    # Same status handling as RobotFileParser.read()
+    if status in (401, 403):
+        return DENY_ALL
+    if status >= 400:
+        return ALLOW_ALL
+    rp = RobotFileParser()
+    rp.parse(text.splitlines())
+    return rp
+
+class RobotsCache:
+    """Bounded LRU of parsed robots.txt per scheme://host with TTL. Expired entries are
+    served while one background refresh runs (async path); crawl-delay is tracked per host."""
+
+    def __init__(self, max_entries: int = ROBOTS_CACHE_MAX, ttl_s: int = ROBOTS_TTL_S):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._data: OrderedDict[str, tuple] = OrderedDict()   # base -> (policy, expires_monotonic)
+        self._next_slot: dict[str, float] = {}
+        self._refreshing: set[str] = set()
+        self._inflight = SingleFlight('robots')
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _base(url: str) -> str:
+        p = urlparse(url)
+        return f'{p.scheme}://{p.netloc}'
+
+    def _get(self, base: str):
+        with self._lock:
+            entry = self._data.get(base)
+            if entry is not None:
+                self._data.move_to_end(base)
+            return entry
+
+    def _put(self, base: str, policy, ttl_s: float) -> None:
+        with self._lock:
+            self._data[base] = (policy, time.monotonic() + ttl_s)
+            self._data.move_to_end(base)
+            while len(self._data) > self.max_entries:
+                old, _ = self._data.popitem(last=False)
+                self._next_slot.pop(old, None)
+            set_gauge('robots_cache_entries', len(self._data))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._next_slot.clear()
+
+    @staticmethod
+    def _decide(policy, url: str, agent: str) -> bool:
+        if policy == ALLOW_ALL:
+            return True
+        if policy == DENY_ALL:
+            return False
+        return policy.can_fetch(agent, url)
+
+    def _fetch_sync(self, base: str, session=None) -> None:
+        try:
+            r = (session or requests).get(base + '/robots.txt', timeout=ROBOTS_TIMEOUT_S)
+            self._put(base, _parse_robots(r.status_code, r.text), self.ttl_s)
+        except Exception:
+            inc('robots_fetch_errors', 1)
+            self._put(base, ALLOW_ALL, ROBOTS_ERROR_TTL_S)
+
+    async def _fetch_async(self, base: str, client) -> None:
+        try:
+            r = await client.get(base + '/robots.txt', timeout=ROBOTS_TIMEOUT_S)
+            self._put(base, _parse_robots(r.status_code, r.text), self.ttl_s)
+        except Exception:
+            inc('robots_fetch_errors', 1)
+            self._put(base, ALLOW_ALL, ROBOTS_ERROR_TTL_S)
+
+    def allowed(self, url: str, agent: str, session=None) -> bool:
+        """Blocking variant (ingest): refetches inline once the entry expires."""
+        base = self._base(url)
+        entry = self._get(base)
+        if entry is None or entry[1] <= time.monotonic():
+            inc('robots_cache_miss', 1)
+            self._fetch_sync(base, session)
+            entry = self._get(base) or (ALLOW_ALL, 0)
+        else:
+            inc('robots_cache_hit', 1)
+        return self._decide(entry[0], url, agent)
+
+    async def allowed_async(self, url: str, agent: str, client) -> bool:
+        base = self._base(url)
+        entry = self._get(base)
+        if entry is None:
+            inc('robots_cache_miss', 1)
+            # Concurrent first requests to a host share one robots.txt download
+            await self._inflight.do(base, lambda: self._fetch_async(base, client))
+            entry = self._get(base) or (ALLOW_ALL, 0)
+        elif entry[1] <= time.monotonic():
+            inc('robots_stale_served', 1)
+            if base not in self._refreshing:
+                self._refreshing.add(base)
+                task = asyncio.ensure_future(self._fetch_async(base, client))
+                task.add_done_callback(lambda _: self._refreshing.discard(base))
+        else:
+            inc('robots_cache_hit', 1)
+        return self._decide(entry[0], url, agent)
+
+    def _claim(self, url: str, agent: str, max_wait: float | None = None):
+        # Claim this host's next crawl slot -> (seconds to wait, release); None when the wait
+        # would exceed max_wait, and then nothing is claimed
+        base = self._base(url)
+        entry = self._get(base)
+        policy = entry[0] if entry else None
+        delay = policy.crawl_delay(agent) if isinstance(policy, RobotFileParser) else None
+        if not delay:
+            return 0.0, lambda: None
+        delay = min(float(delay), MAX_CRAWL_DELAY_S)
+        now = time.monotonic()
+        with self._lock:
+            slot = max(now, self._next_slot.get(base, 0.0))
+            if max_wait is not None and slot - now > max_wait:
+                return None
+            end = self._next_slot[base] = slot + delay
+        def release():
+            # Only the newest claim can be handed back without moving later callers' slots
+            with self._lock:
+                if self._next_slot.get(base) == end:
+                    self._next_slot[base] = end - delay
+        return slot - now, release
+
+    def _reserve(self, url: str, agent: str) -> float:
+        return self._claim(url, agent)[0]
+
+    def wait_turn(self, url: str, agent: str) -> None:
+        wait = self._reserve(url, agent)
+        if wait > 0:
+            observe_ms('crawl_delay_wait_ms', wait * 1000)
+            time.sleep(wait)
+
+    async def wait_turn_async(self, url: str, agent: str, max_wait: float | None = None) -> bool:
+        """Wait for this host's crawl slot; False (nothing claimed) if that is more than max_wait away.
+        A waiter that is cancelled (timeout, client gone) gives its slot back when it can."""
+        claim = self._claim(url, agent, max_wait)
+        if claim is None:
+            inc('crawl_delay_rejected', 1)
+            return False
+        wait, release = claim
+        if wait > 0:
+            observe_ms('crawl_delay_wait_ms', wait * 1000)
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                release()
+                raise
+        return True
+
+ALLOWLIST = Allowlist()
+ROBOTS = RobotsCache()
+
+def domain_allowed(url_or_host: str) -> bool:
+    return ALLOWLIST.allows(url_or_host)
@@ -0,0 +1,74 @@
+import sys, threading, time
+from collections import OrderedDict
+from app.metrics import inc, set_gauge
+
+MISSING = object()
+
+class L1Cache:
+    """Bounded in-process LRU with per-entry TTL, capped by approximate bytes.
+    Stores str payloads; a None payload is a negative (known-missing) entry."""
+    
+    def __init__(self, max_bytes: int, name: str = 'cache_l1'):
+        self.max_bytes = max_bytes
+        self.name = name
+        self._data: OrderedDict[str, tuple] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _size(key: str, payload) -> int:
+        return sys.getsizeof(key) + (sys.getsizeof(payload) if payload is not None else 0)
+    
+    def get(self, key: str):
+        """Returns the payload, None for a negative entry, or MISSING."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] <= now:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                inc(f'{self.name}_miss', 1)
+                return MISSING
+            self._data.move_to_end(key)
+        inc(f'{self.name}_negative_hit' if entry[0] is None else f'{self.name}_hit', 1)
+        return entry[0]
+    
+    def set(self, key: str, payload: str | None, ttl_s: float) -> None:
+        if ttl_s <= 0:
+            return
+        size = self._size(key, payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (payload, time.monotonic() + ttl_s, size)
+            self._bytes += size
+            evicted = 0
+            while self._bytes > self.max_bytes:
+                old, _ = next(iter(self._data.items()))
+                self._drop(old)
+                evicted += 1
+            nbytes, nentries = self._bytes, len(self._data)
+        if evicted:
+            inc(f'{self.name}_evictions', evicted)
+        set_gauge(f'{self.name}_bytes', nbytes)
+        set_gauge(f'{self.name}_entries', nentries)
+    
+    def set_missing(self, key: str, ttl_s: float) -> None:
+        self.set(key, None, ttl_s)
+    
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+    
+    def _drop(self, key: str) -> None:
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
@@ -7,8 +7,10 @@ from app.routers.articles import router as articles_router
 from app.routers.ops import router as ops_router
 from app.obs import log, new_request_id, should_sample
 from app.metrics import observe_ms
-from scripts.sentiment_infer import predict_label
-from scripts.translate_es_to_en import translate_es_to_en
+from app.services import close_http_client
+from app.pg_cache import start_maintenance, stop_maintenance
+from app.executors import warm_cpu_pool, shutdown_cpu_pool
+from app.model_registry import start_warmup
 
 
 logging.basicConfig(level=logging.INFO)
@@ -27,14 +29,23 @@ app.add_middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], all
     
 @app.on_event("startup")
 def warm_models():
-    try:
-        # Warm DistilBERT
-        _ = predict_label("Warmup text about markets.")
-        # Warm translator (small input, cached weights)
-        _ = translate_es_to_en("hola mundo", max_input_tokens=16, max_new_tokens=16)
-        log.info("warmup_complete")
-    except Exception as e:
-        log.info("warmup_error", error=str(e))
+    # Background thread: the server accepts connections right away, /ready flips once loaded
+    start_warmup()
+
+@app.on_event("startup")
+def start_cache_maintenance():
+    start_maintenance()
+
+@app.on_event("startup")
+def start_cpu_workers():
+    # CPU_MODE=process: spawn and warm the cleaning workers before traffic arrives
+    warm_cpu_pool()
+
+@app.on_event("shutdown")
+async def close_clients():
+    await close_http_client()
+    stop_maintenance()
+    shutdown_cpu_pool()
 
 @app.middleware('http')
 async def add_request_context(request: Request, call_next):
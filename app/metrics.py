@@ -22,6 +22,8 @@ except Exception:
 _lock = threading.Lock()
 counters = defaultdict(int)
 timings_ms = defaultdict(lambda: deque(maxlen=5000))
+samples = defaultdict(lambda: deque(maxlen=5000))
+gauges = {}
 
 def inc(name: str, amount: int = 1) -> None:
     with _lock:
@@ -31,10 +33,36 @@ def observe_ms(name: str, duration_ms: float) -> None:
     with _lock:
         timings_ms[name].append(duration_ms)
 
+def observe(name: str, value: float) -> None:
+    with _lock:
+        samples[name].append(value)
+
+def set_gauge(name: str, value: float) -> None:
+    with _lock:
+        gauges[name] = value
+
+def drain() -> dict:
+    """Counters/timings recorded since the last drain; used by process-pool workers."""
+    with _lock:
+        out = {'counters': dict(counters), 'timings_ms': {k: list(v) for k, v in timings_ms.items()}}
+        counters.clear()
+        timings_ms.clear()
+    return out
+
+def merge(delta: dict) -> None:
+    # Fold a worker's drain() into this process's metrics
+    with _lock:
+        for k, v in delta.get('counters', {}).items():
+            counters[k] += v
+        for k, vals in delta.get('timings_ms', {}).items():
+            timings_ms[k].extend(vals)
+
 def snapshot_metrics():
     with _lock:
         c = dict(counters)
         t = {k: list(v) for k, v in timings_ms.items()}
+        s = {k: list(v) for k, v in samples.items()}
+        g = dict(gauges)
     def stats(vals):
         if not vals:
             return {'count': 0, 'p50': 0, 'p95': 0, 'max': 0}
@@ -43,7 +71,16 @@ def snapshot_metrics():
         p50 = sorted_vals[int(0.5 * (count - 1))]
         p95 = sorted_vals[int(0.95 * (count - 1))]
         return {'count': count, 'p50': p50, 'p95': p95, 'max': sorted_vals[-1]}
+    # foo_hit / foo_miss counter pairs -> foo hit rate
+    hit_rates = {}
+    for k, hits in c.items():
+        if k.endswith('_hit'):
+            total = hits + c.get(k[:-4] + '_miss', 0)
+            hit_rates[k[:-4]] = round(hits / total, 4) if total else 0.0
     return {
         'counters': c,
-        'timings_ms': {k: stats(v) for k, v in t.items()}
+        'hit_rates': hit_rates,
+        'timings_ms': {k: stats(v) for k, v in t.items()},
+        'samples': {k: stats(v) for k, v in s.items()},
+        'gauges': g
         }
\ No newline at end of file
@@ -0,0 +1,192 @@
+import gc, importlib, os, threading, time
+from app.metrics import inc, observe_ms, set_gauge
+from app.obs import log
+
+# Process-wide model registry. Each model is loaded once on first get_model(name) and
+# shared by every thread; nothing heavy (torch, transformers, weights) is imported until
+# then. Startup only kicks off a background warm-up and /ready reports per-model state.
+# Resident size is tracked per model and, past MODEL_MEMORY_BUDGET_MB, the least recently
+# used other models are dropped (they reload on their next use); READY_MODELS never are.
+# Loaders are "module:function" strings so importing this file stays cheap.
+MODELS = {
+    'sentiment': 'scripts.sentiment_infer:load_model',
+    'translator': 'scripts.translate_es_to_en:load_model',
+    't5_small': 'scripts.summarize_orchestrator:load_t5',
+}
+MODEL_WARMUP = os.getenv('MODEL_WARMUP', '1') == '1'
+# Models that must be loaded before /ready says yes
+READY_MODELS = [m for m in os.getenv('READY_MODELS', 'sentiment,translator').split(',') if m]
+# 0 = no budget
+MODEL_MEMORY_BUDGET_MB = int(os.getenv('MODEL_MEMORY_BUDGET_MB', '2048'))
+
+NOT_LOADED, LOADING, READY, ERROR = 'not_loaded', 'loading', 'ready', 'error'
+
+class _Slot:
+    def __init__(self, name: str, loader):
+        self.name = name
+        self.loader = loader        # "module:function" or a callable
+        self.state = NOT_LOADED
+        self.obj = None
+        self.nbytes = 0
+        self.load_ms = None
+        self.error = None
+        self.loads = self.evictions = 0
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+
+_slots = {name: _Slot(name, spec) for name, spec in MODELS.items()}
+_registry_lock = threading.Lock()
+
+def _resolve(loader):
+    if callable(loader):
+        return loader
+    mod, _, fn = loader.partition(':')
+    return getattr(importlib.import_module(mod), fn)
+
+def _rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+def _tensor_bytes(obj) -> int:
+    # Parameters + buffers of torch modules (also inside tuples); 0 for anything else
+    if isinstance(obj, (tuple, list)):
+        return sum(_tensor_bytes(o) for o in obj)
+    if hasattr(obj, 'parameters') and hasattr(obj, 'buffers'):
+        return sum(t.numel() * t.element_size() for t in (*obj.parameters(), *obj.buffers()))
+    return 0
+
+def _slot(name: str, loader=None) -> _Slot:
+    slot = _slots.get(name)
+    if slot is None:
+        if loader is None:
+            raise KeyError(f'unknown model: {name}')
+        with _registry_lock:
+            slot = _slots.setdefault(name, _Slot(name, loader))
+    return slot
+
+def _count(name: str, kind: str) -> None:
+    # Registry-wide and per-model hit/miss; /metrics turns each pair into a hit rate
+    inc(f'model_registry_{kind}', 1)
+    inc(f'model_{name}_{kind}', 1)
+
+def get_model(name: str, loader=None):
+    """Loaded model object (first call loads it; concurrent callers wait for that one load).
+    loader registers models not listed in MODELS, e.g. a non-default backend."""
+    slot = _slot(name, loader)
+    obj = slot.obj
+    if slot.state == READY and obj is not None:
+        # Lock-free fast path: last_used is a plain store; counting goes through metrics
+        slot.last_used = time.monotonic()
+        _count(name, 'hit')
+        return obj
+    with slot.lock:
+        if slot.state == READY and slot.obj is not None:
+            slot.last_used = time.monotonic()
+            _count(name, 'hit')
+            return slot.obj
+        _count(name, 'miss')
+        slot.state, slot.error = LOADING, None
+        t0, rss0 = time.perf_counter(), _rss_bytes()
+        try:
+            obj = _resolve(slot.loader)()
+        except Exception as e:
+            slot.state, slot.error = ERROR, str(e)
+            inc('model_load_errors', 1)
+            raise
+        # Weights when we can count them; otherwise RSS growth over the load (ORT/ct2 sessions)
+        slot.nbytes = _tensor_bytes(obj) or max(0, _rss_bytes() - rss0)
+        slot.obj, slot.load_ms = obj, round((time.perf_counter() - t0) * 1000, 1)
+        slot.loads += 1
+        slot.last_used = time.monotonic()
+        slot.state = READY
+        inc('model_loads', 1)
+        inc(f'model_{name}_loads', 1)
+        observe_ms(f'model_load_ms.{name}', slot.load_ms)
+        log.info('model_loaded', model=name, ms=slot.load_ms, mb=round(slot.nbytes / 2**20, 1))
+    _enforce_budget(keep=name)
+    return obj
+
+def evict(name: str) -> bool:
+    slot = _slots.get(name)
+    if slot is None:
+        return False
+    with slot.lock:
+        if slot.state != READY:
+            return False
+        slot.obj, slot.nbytes, slot.state = None, 0, NOT_LOADED
+        slot.evictions += 1
+    inc('model_evictions', 1)
+    log.info('model_evicted', model=name)
+    gc.collect()
+    return True
+
+def _enforce_budget(keep: str) -> None:
+    budget = MODEL_MEMORY_BUDGET_MB * 2**20
+    with _registry_lock:
+        loaded = [s for s in _slots.values() if s.state == READY]
+        total = sum(s.nbytes for s in loaded)
+        victims = []
+        # LRU first; the model that was just loaded is never its own victim, and READY_MODELS
+        # are pinned (dropping one would flip /ready to 503 on a healthy pod)
+        for s in sorted(loaded, key=lambda s: s.last_used):
+            if not budget or total <= budget:
+                break
+            if s.name != keep and s.name not in READY_MODELS:
+                victims.append(s.name)
+                total -= s.nbytes
+    for name in victims:
+        evict(name)
+    set_gauge('model_memory_bytes', sum(s.nbytes for s in _slots.values()))
+    if budget and total > budget:
+        inc('model_budget_exceeded', 1)
+
+def model_status() -> dict:
+    now = time.monotonic()
+    return {s.name: {
+        'state': s.state, 'load_ms': s.load_ms, 'error': s.error, 'mb': round(s.nbytes / 2**20, 1),
+        'loads': s.loads, 'evictions': s.evictions,
+        'idle_s': round(now - s.last_used, 1) if s.last_used else None,
+    } for s in list(_slots.values())}
+
+def model_stats() -> dict:
+    """Per-model stats plus totals, for /metrics."""
+    models = model_status()
+    return {
+        'budget_mb': MODEL_MEMORY_BUDGET_MB,
+        'resident_mb': round(sum(m['mb'] for m in models.values()), 1),
+        'models': models,
+    }
+
+def is_ready(names=None) -> bool:
+    return all(_slots[n].state == READY for n in (READY_MODELS if names is None else names))
+
+def _warm(names) -> None:
+    for name in names:
+        try:
+            get_model(name)
+        except Exception as e:
+            log.info('warmup_error', model=name, error=str(e))
+
+def preload(names=None) -> dict:
+    """Load synchronously in a process that is about to fork (gunicorn master, preload_app).
+    Only torch modules are kept: their tensors are plain memory the workers share
+    copy-on-write. ORT/CTranslate2 objects own native thread pools that don't survive fork,
+    so those are dropped again and each worker loads its own."""
+    _warm(list(names or READY_MODELS))
+    for s in list(_slots.values()):
+        if s.state == READY and not _tensor_bytes(s.obj):
+            evict(s.name)
+    return model_status()
+
+def start_warmup(names=None) -> threading.Thread | None:
+    """Load models in a background thread; the server keeps accepting connections meanwhile."""
+    names = list(names or READY_MODELS)
+    # Nothing to do in a worker forked from a preloaded master
+    if not MODEL_WARMUP or is_ready(names):
+        return None
+    t = threading.Thread(target=_warm, args=(names,), name='model-warmup', daemon=True)
+    t.start()
+    return t
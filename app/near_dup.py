@@ -0,0 +1,101 @@
+import hashlib, os, sqlite3
+from app.fingerprint import canonical_text
+from app.metrics import inc
+
+# 64-bit SimHash over word shingles. Wire copy that differs by a byline, a "Read more"
+# tail or a new headline lands within a few bits; unrelated text sits around 32.
+SHINGLE = 3
+NEAR_DUP_MAX_BITS = int(os.getenv('NEAR_DUP_MAX_BITS', '6'))
+# 4 x 16-bit bands: hashes within 3 bits always share a band, so those are never missed;
+# 4..NEAR_DUP_MAX_BITS are found whenever one band happens to be untouched (most of the time)
+BANDS = 4
+BAND_BITS = 64 // BANDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS article_simhash(
+    article_id TEXT PRIMARY KEY,
+    simhash INTEGER NOT NULL,   -- 64-bit, stored as signed
+    b0 INTEGER NOT NULL,
+    b1 INTEGER NOT NULL,
+    b2 INTEGER NOT NULL,
+    b3 INTEGER NOT NULL,
+    dup_of TEXT                 -- nearest earlier article within NEAR_DUP_MAX_BITS
+);
+CREATE INDEX IF NOT EXISTS idx_simhash_b0 ON article_simhash(b0);
+CREATE INDEX IF NOT EXISTS idx_simhash_b1 ON article_simhash(b1);
+CREATE INDEX IF NOT EXISTS idx_simhash_b2 ON article_simhash(b2);
+CREATE INDEX IF NOT EXISTS idx_simhash_b3 ON article_simhash(b3);
+"""
+
+# Per-bit vote counting without a 64-step loop per shingle: each digest byte maps to an
+# int with its 8 bits spread into 20-bit lanes, so summing those ints counts every bit at once.
+_LANE = 20
+_LANE_MASK = (1 << _LANE) - 1
+_SPREAD = [[sum(((b >> i) & 1) << ((8 * k + i) * _LANE) for i in range(8)) for b in range(256)] for k in range(8)]
+
+def simhash(text: str) -> int:
+    words = canonical_text(text).split()
+    if not words:
+        return 0
+    grams = [' '.join(words[i:i + SHINGLE]) for i in range(max(1, len(words) - SHINGLE + 1))][:_LANE_MASK]
+    acc = 0
+    for g in grams:
+        for k, byte in enumerate(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest()):
+            acc += _SPREAD[k][byte]
+    h = 0
+    for i in range(64):
+        if ((acc >> (i * _LANE)) & _LANE_MASK) * 2 > len(grams):
+            h |= 1 << i
+    return h
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & 0xFFFFFFFFFFFFFFFF).bit_count()
+
+def _signed(h: int) -> int:
+    # SQLite INTEGER is signed 64-bit
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+def bands(h: int) -> list[int]:
+    return [(h >> (i * BAND_BITS)) & ((1 << BAND_BITS) - 1) for i in range(BANDS)]
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(SCHEMA)
+
+def index_article(conn: sqlite3.Connection, article_id: str, h: int, dup_of: str | None = None) -> None:
+    conn.execute(
+        'INSERT OR REPLACE INTO article_simhash(article_id, simhash, b0, b1, b2, b3, dup_of) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (article_id, _signed(h), *bands(h), dup_of))
+
+_BAND_WHERE = '(s.b0 = ? OR s.b1 = ? OR s.b2 = ? OR s.b3 = ?)'
+
+def _closest(rows, h: int, max_bits: int):
+    best = None
+    for row in rows:
+        d = hamming(row[1], h)
+        if d <= max_bits and (best is None or d < best[1]):
+            best = (row, d)
+    return best
+
+def find_near_dup(conn: sqlite3.Connection, h: int, max_bits: int = NEAR_DUP_MAX_BITS) -> tuple[str, int] | None:
+    """Closest indexed article within max_bits: (article_id, distance) or None."""
+    rows = conn.execute(f'SELECT s.article_id, s.simhash FROM article_simhash s WHERE {_BAND_WHERE}', bands(h)).fetchall()
+    best = _closest(rows, h, max_bits)
+    return (best[0][0], best[1]) if best else None
+
+def find_near_analysis(conn: sqlite3.Connection, h: int, model_version: str, max_bits: int = NEAR_DUP_MAX_BITS) -> dict | None:
+    """Closest near-duplicate that already has an analysis at model_version."""
+    rows = conn.execute(f"""
+        SELECT s.article_id, s.simhash, an.summary, an.sentiment, an.confidence, an.cost_cents, an.model_version
+        FROM article_simhash s JOIN analyses an ON an.article_id = s.article_id
+        WHERE {_BAND_WHERE} AND an.model_version = ?
+    """, (*bands(h), model_version)).fetchall()
+    best = _closest(rows, h, max_bits)
+    if not best:
+        inc('near_dup_miss', 1)
+        return None
+    inc('near_dup_hit', 1)
+    row, dist = best
+    keys = ('article_id', 'simhash', 'summary', 'sentiment', 'confidence', 'cost_cents', 'model_version')
+    out = dict(zip(keys, tuple(row)))
+    out['distance'] = dist
+    return out
@@ -0,0 +1,212 @@
+import gzip, hashlib, json, os, re, sqlite3, threading, time
+from dataclasses import dataclass
+from app.metrics import inc, set_gauge
+try:
+    import zstandard as zstd
+except Exception:
+    zstd = None
+
+# On-disk raw-HTML cache for article fetches: content-addressed blobs (zstd, gzip if
+# zstandard isn't installed) plus a small SQLite index of url -> blob + validators.
+PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE', '1') == '1'
+PAGE_CACHE_DIR = os.getenv('PAGE_CACHE_DIR', 'data/page_cache')
+PAGE_CACHE_MAX_BYTES = int(os.getenv('PAGE_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+# Cap on Cache-Control max-age: within it a page is served without touching the network
+PAGE_CACHE_MAX_FRESH_S = int(os.getenv('PAGE_CACHE_MAX_FRESH_S', '300'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs(
+    digest TEXT PRIMARY KEY,    -- sha256 of the raw body
+    size INTEGER NOT NULL,      -- compressed bytes on disk, incl. cached extractions
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages(
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_type TEXT,
+    fresh_until REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_blobs_access ON blobs(last_access);
+CREATE INDEX IF NOT EXISTS idx_pages_digest ON pages(digest);
+"""
+
+_MAX_AGE = re.compile(r'max-age\s*=\s*(\d+)', re.I)
+
+def _compress(data: bytes) -> bytes:
+    return zstd.ZstdCompressor(level=3).compress(data) if zstd else gzip.compress(data, 6)
+
+def _decompress(data: bytes) -> bytes:
+    return zstd.ZstdDecompressor().decompress(data) if zstd else gzip.decompress(data)
+
+def _fresh_until(cache_control: str | None) -> float:
+    cc = cache_control or ''
+    m = _MAX_AGE.search(cc)
+    if not m or 'no-cache' in cc or 'no-store' in cc:
+        return 0.0
+    return time.time() + min(int(m.group(1)), PAGE_CACHE_MAX_FRESH_S)
+
+@dataclass
+class CachedPage:
+    url: str
+    digest: str
+    etag: str | None
+    last_modified: str | None
+    content_type: str | None
+    fresh_until: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.fresh_until
+
+    def conditional_headers(self) -> dict:
+        h = {}
+        if self.etag:
+            h['If-None-Match'] = self.etag
+        if self.last_modified:
+            h['If-Modified-Since'] = self.last_modified
+        return h
+
+class PageCache:
+    def __init__(self, root: str = PAGE_CACHE_DIR, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ext = '.zst' if zstd else '.gz'
+        self._ready = False
+        self._evict_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        if not self._ready:
+            os.makedirs(self.root, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.root, 'index.db'), timeout=5)
+        if not self._ready:
+            conn.executescript(SCHEMA)
+            self._ready = True
+        return conn
+
+    def _path(self, digest: str, suffix: str = '') -> str:
+        return os.path.join(self.root, digest[:2], digest + suffix + self.ext)
+
+    def lookup(self, url: str) -> CachedPage | None:
+        conn = self._conn()
+        try:
+            row = conn.execute(
+                'SELECT url, digest, etag, last_modified, content_type, fresh_until FROM pages WHERE url = ?', (url,)).fetchone()
+        finally:
+            conn.close()
+        if not row or not os.path.exists(self._path(row[1])):
+            return None
+        return CachedPage(*row)
+
+    def load(self, page: CachedPage) -> bytes | None:
+        try:
+            with open(self._path(page.digest), 'rb') as f:
+                body = _decompress(f.read())
+        except OSError:
+            return None
+        conn = self._conn()
+        try:
+            conn.execute('UPDATE blobs SET last_access = ? WHERE digest = ?', (time.time(), page.digest))
+            conn.commit()
+        finally:
+            conn.close()
+        return body
+
+    def revalidated(self, page: CachedPage, cache_control: str | None) -> None:
+        # 304: same body, new freshness window
+        conn = self._conn()
+        try:
+            conn.execute('UPDATE pages SET fresh_until = ? WHERE url = ?', (_fresh_until(cache_control), page.url))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def store(self, url: str, body: bytes | bytearray, headers) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._path(digest)
+        size = None
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = _compress(bytes(body))
+            tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+            size = len(data)
+        conn = self._conn()
+        try:
+            if size is not None:
+                conn.execute('INSERT OR REPLACE INTO blobs(digest, size, last_access) VALUES (?, ?, ?)', (digest, size, time.time()))
+            else:
+                conn.execute('UPDATE blobs SET last_access = ? WHERE digest = ?', (time.time(), digest))
+            conn.execute("""
+                INSERT OR REPLACE INTO pages(url, digest, etag, last_modified, content_type, fresh_until)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (url, digest, headers.get('etag'), headers.get('last-modified'), headers.get('content-type'),
+                  _fresh_until(headers.get('cache-control'))))
+            conn.commit()
+        finally:
+            conn.close()
+        if size:
+            self._evict()
+        return digest
+
+    def get_extracted(self, digest: str, version: str):
+        """Cleaned output previously stored for this body (skips re-cleaning on 304)."""
+        try:
+            with open(self._path(digest, '.' + version), 'rb') as f:
+                return json.loads(_decompress(f.read()))
+        except (OSError, ValueError):
+            return None
+
+    def put_extracted(self, digest: str, version: str, value) -> None:
+        path = self._path(digest, '.' + version)
+        data = _compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Rewriting the same (digest, version) replaces the file, so only the difference counts
+        old = os.path.getsize(path) if os.path.exists(path) else 0
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        conn = self._conn()
+        try:
+            conn.execute('UPDATE blobs SET size = size + ? WHERE digest = ?', (len(data) - old, digest))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _evict(self) -> None:
+        # LRU by blob until under 90% of the budget; pages pointing at an evicted blob go too
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            conn = self._conn()
+            try:
+                total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+                if total > self.max_bytes:
+                    target = int(self.max_bytes * 0.9)
+                    for digest, size in conn.execute('SELECT digest, size FROM blobs ORDER BY last_access').fetchall():
+                        if total <= target:
+                            break
+                        prefix = os.path.join(self.root, digest[:2], digest)
+                        folder = os.path.dirname(prefix)
+                        for name in os.listdir(folder) if os.path.isdir(folder) else ():
+                            if name.startswith(digest):
+                                try:
+                                    os.remove(os.path.join(folder, name))
+                                except OSError:
+                                    pass
+                        conn.execute('DELETE FROM pages WHERE digest = ?', (digest,))
+                        conn.execute('DELETE FROM blobs WHERE digest = ?', (digest,))
+                        total -= size
+                        inc('page_cache_evictions', 1)
+                    conn.commit()
+                set_gauge('page_cache_bytes', total)
+            finally:
+                conn.close()
+        finally:
+            self._evict_lock.release()
+
+PAGES = PageCache()
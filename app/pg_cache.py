@@ -1,53 +1,181 @@
-import os, json
+import os, json, threading, time
+from contextlib import contextmanager
+from app.l1_cache import L1Cache, MISSING
+from app.metrics import inc, observe, observe_ms, set_gauge
+from app.obs import log
 try:
     import psycopg
+    from psycopg_pool import ConnectionPool
 except Exception:
     psycopg = None 
+    ConnectionPool = None
 
 PG_URL = os.getenv("DATABASE_URL")
 TTL_SECONDS = 72 * 3600
 
 TABLE = 'http_cache'
 
+# In-process L1 in front of Postgres; the only tier when DATABASE_URL is unset
+L1_MAX_BYTES = int(os.getenv('L1_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+L1_MAX_TTL_S = int(os.getenv('L1_CACHE_MAX_TTL_S', '600'))
+L1_NEG_TTL_S = int(os.getenv('L1_CACHE_NEG_TTL_S', '5'))
+L1 = L1Cache(L1_MAX_BYTES)
+
+PG_POOL_MIN = int(os.getenv('PG_POOL_MIN', '1'))
+PG_POOL_MAX = int(os.getenv('PG_POOL_MAX', '10'))
+PG_POOL_TIMEOUT_S = float(os.getenv('PG_POOL_TIMEOUT_S', '5'))
+
+PRUNE_INTERVAL_S = int(os.getenv('CACHE_PRUNE_INTERVAL_S', '300'))
+PRUNE_BATCH = int(os.getenv('CACHE_PRUNE_BATCH', '1000'))
+PRUNE_MAX_BATCHES = int(os.getenv('CACHE_PRUNE_MAX_BATCHES', '50'))
+
+SQL_GET = """
+    SELECT payload, EXTRACT(EPOCH FROM expires_at - NOW()) FROM http_cache 
+    WHERE cache_key = %s AND expires_at > NOW()
+"""
+SQL_SET = """
+    INSERT INTO http_cache (cache_key, payload, expires_at)
+    VALUES (%s, %s, NOW() + make_interval(secs => %s))
+    ON CONFLICT (cache_key)
+    DO UPDATE SET payload = EXCLUDED.payload,
+                  expires_at = EXCLUDED.expires_at,
+                  created_at = NOW()
+"""
+SQL_PRUNE = """
+    DELETE FROM http_cache 
+    WHERE ctid IN (
+    SELECT ctid from http_cache
+    WHERE expires_at <= NOW() 
+    ORDER BY expires_at ASC 
+    LIMIT %s)
+"""
+SQL_DELETE = f"DELETE FROM {TABLE} WHERE cache_key = %s"
+
+_pool = None
+_pool_lock = threading.Lock()
+_maint_thread = None
+_maint_stop = threading.Event()
+
+def pg_enabled() -> bool:
+    return bool(PG_URL and psycopg and ConnectionPool)
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    PG_URL,
+                    min_size=PG_POOL_MIN,
+                    max_size=PG_POOL_MAX,
+                    timeout=PG_POOL_TIMEOUT_S,
+                    check=ConnectionPool.check_connection,
+                    name='pg_cache',
+                    open=True,
+                )
+    return _pool
+
+@contextmanager
 def _conn():
-    if not PG_URL or not psycopg:
-        return None
-    return psycopg.connect(PG_URL)
+    # Pooled connection; records how long callers queue for one
+    t0 = time.perf_counter()
+    with _get_pool().connection() as conn:
+        observe_ms('pg_pool_wait_ms', (time.perf_counter() - t0) * 1000)
+        yield conn
+
+def _l1_ttl(ttl_s: float) -> float:
+    # With Postgres behind it, keep L1 short-lived so other workers' writes show up
+    return min(ttl_s, L1_MAX_TTL_S) if pg_enabled() else ttl_s
 
 def cache_get(cache_key: str) -> str | None:
+    hit = L1.get(cache_key)
+    if hit is not MISSING:
+        return hit
+    if not pg_enabled():
+        return None
     with _conn() as conn, conn.cursor() as cur:
-            cur.execute(f"""
-                SELECT payload FROM http_cache 
-                WHERE cache_key = %s AND expires_at > NOW()
-            """, (cache_key,))
+            cur.execute(SQL_GET, (cache_key,), prepare=True)
             row = cur.fetchone()
-            return row[0] if row else None
+    if not row:
+        L1.set_missing(cache_key, L1_NEG_TTL_S)
+        return None
+    # payload is JSONB: psycopg decodes it, so a stored JSON string comes back as a bare str
+    payload = json.dumps(row[0], ensure_ascii=False)
+    L1.set(cache_key, payload, _l1_ttl(float(row[1])))
+    return payload
 
 def cache_set(cache_key: str, payload: str, ttl_s: int = TTL_SECONDS) -> None:
+    L1.set(cache_key, payload, _l1_ttl(ttl_s))
+    if not pg_enabled():
+        return
     with _conn() as conn, conn.cursor() as cur:
-            cur.execute(f"""
-                INSERT INTO http_cache (cache_key, payload, expires_at)
-                VALUES (%s, %s, NOW() + make_interval(secs => %s))
-                ON CONFLICT (cache_key)
-                DO UPDATE SET payload = EXCLUDED.payload,
-                              expires_at = EXCLUDED.expires_at,
-                              created_at = NOW()
-            """, (cache_key, payload, str(TTL_SECONDS)))
+            cur.execute(SQL_SET, (cache_key, payload, float(ttl_s)), prepare=True)
             conn.commit()
 
-def cache_prune(limit: int = 1000):
+def cache_prune(limit: int = 1000) -> int:
+    if not pg_enabled():
+        return 0
     with _conn() as conn, conn.cursor() as cur:
-        cur.execute(f"""
-            DELETE FROM http_cache 
-            WHERE ctid IN (
-            SELECT ctid from http_cache
-            WHERE expires_at <= NOW() 
-            ORDER BY expires_at ASC 
-            LIMIT %s)
-        """, (limit,))
+        cur.execute(SQL_PRUNE, (limit,), prepare=True)
         conn.commit()
+        return max(cur.rowcount, 0)
 
 def cache_delete(key: str):
+    L1.delete(key)
+    if not pg_enabled():
+        return
     with _conn() as conn, conn.cursor() as cur:
-        cur.execute(f"DELETE FROM {TABLE} WHERE cache_key = %s", (key,))
-        conn.commit()
\ No newline at end of file
+        cur.execute(SQL_DELETE, (key,), prepare=True)
+        conn.commit()
+
+def prune_expired(batch: int = PRUNE_BATCH, max_batches: int = PRUNE_MAX_BATCHES) -> int:
+    """Delete expired rows in short batches so no single statement holds locks for long."""
+    t0 = time.perf_counter()
+    total = 0
+    for _ in range(max_batches):
+        n = cache_prune(batch)
+        total += n
+        if n < batch:
+            break
+    secs = time.perf_counter() - t0
+    observe_ms('pg_cache_prune_ms', secs * 1000)
+    observe('pg_cache_prune_rows_per_s', total / secs if secs > 0 else 0)
+    inc('pg_cache_pruned_rows', total)
+    return total
+
+def _record_pool_stats():
+    if _pool is None:
+        return
+    stats = _pool.get_stats()
+    for k in ('pool_size', 'pool_available', 'requests_waiting'):
+        set_gauge(f'pg_{k}', stats.get(k, 0))
+
+def _maintenance_loop(interval_s: float):
+    while True:
+        try:
+            pruned = prune_expired()
+            _record_pool_stats()
+            if pruned:
+                log.info('cache_prune', rows=pruned)
+        except Exception as e:
+            inc('pg_cache_prune_errors', 1)
+            log.info('cache_prune_error', error=str(e))
+        if _maint_stop.wait(interval_s):
+            return
+
+def start_maintenance(interval_s: float = PRUNE_INTERVAL_S) -> None:
+    global _maint_thread
+    if not pg_enabled() or (_maint_thread and _maint_thread.is_alive()):
+        return
+    _maint_stop.clear()
+    _maint_thread = threading.Thread(target=_maintenance_loop, args=(interval_s,), name='pg-cache-maintenance', daemon=True)
+    _maint_thread.start()
+
+def stop_maintenance() -> None:
+    global _pool
+    _maint_stop.set()
+    if _maint_thread:
+        _maint_thread.join(timeout=5)
+    if _pool is not None:
+        _pool.close()
+        _pool = None
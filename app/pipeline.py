@@ -0,0 +1,45 @@
+import asyncio, time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+from app.metrics import observe_ms
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[..., Awaitable]
+    deps: tuple = field(default_factory=tuple)
+
+async def run_stages(stages: list[Stage], inputs: dict | None = None) -> tuple[dict, dict]:
+    """Run stages as a DAG: each starts once its deps finish, independent branches overlap.
+    Stage fns get their deps' results positionally; `inputs` seeds already-computed results
+    by name. Returns (results, wall ms per stage)."""
+    tasks: dict[str, asyncio.Future] = {}
+    timings: dict[str, int] = {}
+    loop = asyncio.get_running_loop()
+    for name, value in (inputs or {}).items():
+        tasks[name] = loop.create_future()
+        tasks[name].set_result(value)
+    
+    async def _run(stage: Stage):
+        args = [await tasks[d] for d in stage.deps]
+        t0 = time.perf_counter()
+        try:
+            return await stage.fn(*args)
+        finally:
+            ms = int((time.perf_counter() - t0) * 1000)
+            timings[stage.name] = ms
+            observe_ms(f'stage_{stage.name}_ms', ms)
+    
+    for stage in stages:
+        missing = [d for d in stage.deps if d not in tasks]
+        if missing:
+            raise ValueError(f'stage {stage.name} depends on undeclared {missing}')
+        tasks[stage.name] = asyncio.ensure_future(_run(stage))
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for t in tasks.values():
+            t.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return {name: t.result() for name, t in tasks.items()}, timings
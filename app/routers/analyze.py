@@ -1,24 +1,51 @@
-import json, os, re, time, hashlib
+import asyncio, json, os, random, re, time, hashlib
 from uuid import uuid4
 from fastapi import APIRouter, HTTPException, Request
-from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
-from app.schemas import AnalyzeRequest, AnalyzeResponse
-from app.services import fetch_url, clean_article_html, store_analysis, ensure_db, build_text_hash, build_snippet, maybe_extract_pub_time
+from urllib.parse import urlparse
+from app.schemas import AnalyzeRequest, AnalyzeResponse, AnalyzeBatchRequest, AnalyzeBatchResponse
+from app.services import fetch_page_async, clean_version, store_analysis, find_analysis, find_near_analysis, ensure_db, build_text_hash, build_snippet
 from app.obs import estimate_cost_cents, should_sample, log
 from app.metrics import observe_ms, inc
-from app.pg_cache import cache_get, cache_set, cache_prune, cache_delete
+from app.pg_cache import cache_get, cache_set, cache_delete
+from app.executors import run_cpu, run_model, run_io
+from app.pipeline import Stage, run_stages
+from app.singleflight import SingleFlight
+from app.near_dup import simhash
+from app.fingerprint import legacy_fingerprints
+from app.canonical import normalize_url, resolve_url, remember
+from app.extract import extract
+from app.page_cache import PAGES
+from app.model_registry import get_model
+from scripts.sentiment_version import model_version as sentiment_model_version
+from scripts.translate_es_to_en import model_version as translate_model_version
 
 
 PROVIDER = os.getenv('SUMMARY_PROVIDER,' 'openai')
 PG_URL = os.getenv('DATABASE_URL')
 
-PG_CACHE_ENABLED = bool(os.getenv('DATABASE_URL'))
+# L1 (in-process) always, plus Postgres http_cache when DATABASE_URL is set
+CACHE_ENABLED = os.getenv('ANALYZE_CACHE', '1') == '1'
 
 if PROVIDER == 'stub':
     from tests.conftest import mock_summarize, mock_sentiment
 else:
-    from scripts.summarize_openai import summarize
-    from scripts.sentiment_infer import predict_label
+    from scripts.summarize_openai import summarize_async
+    from scripts.translate_es_to_en import translate_es_to_en
+
+# Sentiment (torch + DistilBERT) is imported on first use, not with the router
+def _sentiment_infer():
+    import scripts.sentiment_infer as si
+    return si
+
+def predict_label(text: str):
+    return _sentiment_infer().predict_label(text)
+
+def predict_batch(texts: list[str]):
+    return _sentiment_infer().predict_batch(texts)
+
+def submit_label(text: str):
+    return _sentiment_infer().submit_label(text)
+
 try:
     from app.metrics import PROM, P_COUNT, H_LAT
 except Exception:
@@ -26,24 +53,20 @@ except Exception:
 
 MAX_INPUT_CHARS = 8000
 CACHE_TTL_S = 259200
+# Past the soft TTL a hit is served stale while one background refresh recomputes it;
+# past the (hard) CACHE_TTL_S it is a real miss. Both are jittered so batches don't expire together.
+CACHE_SOFT_TTL_S = int(os.getenv('CACHE_SOFT_TTL_S', str(48 * 3600)))
+CACHE_TTL_JITTER = float(os.getenv('CACHE_TTL_JITTER', '0.1'))
 API_SCHEMA_VER = 'v1.1'
 FETCH_TIMEOUT_S = 20
+SENT_BATCH_SIZE = int(os.getenv('SENT_BATCH_SIZE', '16'))
+SENT_BATCHING = os.getenv('SENT_BATCHING', '1') == '1'
+MV_SUM = 'openai:gpt-5-mini@sum_v1'
+MV_SENT = sentiment_model_version()
+MV_TR = translate_model_version()
 
 router = APIRouter(prefix='/analyze', tags=['analyze'])
 
-try:
-    cache_prune()
-except Exception:
-    pass
-
-def normalize_url(url: str) -> str:
-    u = urlparse(url)
-    host = u.netloc.lower()
-    q = [(k, v) for (k, v) in parse_qsl(u.query, keep_blank_values=True) if not k.lower().startswith('utm_')]
-    path = u.path.rstrip('/') or '/'
-    norm_u = urlunparse((u.scheme or 'https', host, path, '', urlencode(q, doseq=True), ''))
-    return norm_u
-
 def _as_str(x, default=''):
     if isinstance(x, (list, tuple)):
         return str(x[0]) if x else default
@@ -53,80 +76,258 @@ def top_sentences(text: str, n: int = 3):
     sents = re.split(r'(?<=[.!?])\s+', (text or '').strip())
     return [s for s in sents[:n] if s]
 
-@router.post('/', response_model=AnalyzeResponse)
-def analyze(req: AnalyzeRequest, request: Request):
-    ensure_db()
-    start = time.time()
+async def _extract(html: str, base_url: str | None = None) -> tuple[str, dict, str | None, str | None]:
+    # Single parse: text, meta (incl. pub_time) and rel=canonical all come off one tree.
+    # extract itself goes to the CPU pool so it pickles cleanly in process mode.
+    text, meta, canon = await run_cpu(extract, html, base_url)
+    return text, meta, meta.get('pub_time'), canon
+
+def _validate(req: AnalyzeRequest) -> str:
     if sum([bool(req.url), bool(req.html), bool(req.text)]) != 1:
         raise HTTPException(status_code=400, detail='provide exactly one of url|html|text')
-    
+    return _as_str(req.lang or 'en').lower()
+
+async def _resolve(req: AnalyzeRequest) -> str | None:
+    # Rules + learned rel=canonical/redirect mappings; memoized, so cheap after the first call
+    if not req.url:
+        return None
+    return await run_io(resolve_url, _as_str(req.url))
+
+async def _fetch(req: AnalyzeRequest) -> tuple[str | None, str | None]:
+    # (html, digest of the fetched body; None for inline html)
+    if not req.url:
+        return req.html, None
+    return await fetch_page_async(await _resolve(req), timeout_s=FETCH_TIMEOUT_S)
+
+async def _extract_page(html: str, base_url: str, digest: str | None) -> tuple:
+    # Cleaned output is stored next to the cached body, so a 304 / fresh hit skips cleaning too
+    version = clean_version(base_url)
+    if digest:
+        hit = await run_io(PAGES.get_extracted, digest, version)
+        if hit:
+            inc('page_cache_clean_hit', 1)
+            return tuple(hit)
+    out = await _extract(html, base_url)
+    if digest:
+        await run_io(PAGES.put_extracted, digest, version, out)
+    return out
+
+async def _clean(req: AnalyzeRequest, page: tuple[str | None, str | None]) -> dict:
+    html, digest = page
     lang = _as_str(req.lang or 'en').lower()
-    source_url = ''
+    source_url = canonical_url = ''
     domain, title, meta = 'local', None, {}
     
     if req.url:
-        source_url = normalize_url(_as_str(req.url))
-        html = fetch_url(source_url, timeout_s=FETCH_TIMEOUT_S)
+        source_url = canonical_url = await _resolve(req)
         domain = urlparse(source_url).netloc.lower() or 'local'
-        text, meta = clean_article_html(html)
+        text, meta, pub_time, canon = await _extract_page(html, source_url, digest)
         title = meta.get('title')
-        pub_time = meta.get('pub_time') if isinstance(meta, dict) else None
-        if not pub_time:
-            pub_time = maybe_extract_pub_time(html)
+        if canon:
+            # Learn the page's rel=canonical so later variants resolve before fetching
+            canonical_url = await run_io(remember, source_url, canon, 'rel') or source_url
     elif req.html:
-        text, meta = clean_article_html(req.html)
+        text, meta, pub_time, _ = await _extract(html)
         title = meta.get('title')
-        pub_time = meta.get('pub_time') if isinstance(meta, dict) else None
-        if not pub_time:
-            pub_time = maybe_extract_pub_time(req.html)
         domain = 'local'
     else:
-        text = _as_str(req.text)
-        text = ' '.join((text).split())[:MAX_INPUT_CHARS]
+        text = _direct_text(req)
         domain, title, pub_time, meta = 'local', None, None, {'source': 'direct'}
     if not isinstance(text, str) or not text.strip():
         raise HTTPException(status_code=400, detail='empty_text')
     
     snippet = meta.get('snippet') or build_snippet(text)
     text = _as_str(text)
-    text_hash = build_text_hash(text)
-    
-    # Cache check
-    mv_sum = 'openai:gpt-5-mini@sum_v1'
-    mv_sent = 'distilbert-mc@sent_v4'    
-    src_for_key = (source_url if source_url else hashlib.sha256(text.encode()).hexdigest())
-    ck_blob = src_for_key + '|' + mv_sum + '|' + mv_sent + '|' + (lang or 'en')
-    ckey = 'an:' + hashlib.sha256(ck_blob.encode()).hexdigest()
-
-    if PG_CACHE_ENABLED:
-        cached = cache_get(ckey)
-        if cached:
-            try:
-                payload = json.loads(cached) if isinstance(cached, str) else cached
-            except Exception:
-                cache_delete(ckey)
-            else:
-                total_latency = int((time.time() - start) * 1000)
-                payload['cache_hit'] = True
-                payload['latency_ms'] = total_latency
-                observe_ms('analyze_latency_ms', total_latency)
-                inc('analyze_requests_total', 1)
-                if should_sample():
-                    log.info('analyze', cache_hit=True, latency_ms=total_latency, model_version=payload.get('model_version'))
-                return payload
-        
-    # Summarize
-    sum_out = summarize(text, lang)
+    return {
+        'url': str(req.url) if req.url else None,
+        'source_url': source_url,
+        'canonical_url': canonical_url,
+        'domain': domain,
+        'title': title,
+        'lang': lang,
+        'pub_time': pub_time,
+        'snippet': snippet,
+        'text': text,
+        'text_hash': build_text_hash(text),
+        'simhash': await run_cpu(simhash, text),
+    }
+
+async def _prepare(req: AnalyzeRequest) -> dict:
+    # Fetch + clean one input; raises HTTPException on bad input
+    _validate(req)
+    return await _clean(req, await _fetch(req))
+
+def _direct_text(req: AnalyzeRequest) -> str:
+    return ' '.join(_as_str(req.text).split())[:MAX_INPUT_CHARS]
+
+def _key_for(src_for_key: str, lang: str) -> str:
+    ck_blob = src_for_key + '|' + MV_SUM + '|' + MV_SENT + '|' + (lang or 'en')
+    return 'an:' + hashlib.sha256(ck_blob.encode()).hexdigest()
+
+def _cache_key(req: AnalyzeRequest, lang: str, url: str | None = None) -> str:
+    # Computable before fetch/clean so cache hits skip both; url is the resolved canonical URL
+    if req.url:
+        src_for_key = url or normalize_url(_as_str(req.url))
+    elif req.html:
+        src_for_key = 'html:' + hashlib.sha256(req.html.encode()).hexdigest()
+    else:
+        src_for_key = hashlib.sha256(_direct_text(req).encode()).hexdigest()
+    return _key_for(src_for_key, lang)
+
+def _fingerprint_key(prep: dict) -> str:
+    # Content-addressed: same article behind different URLs (or as html/text) shares this key
+    fp_blob = prep['text_hash'] + '|' + MV_SUM + '|' + MV_SENT + '|' + prep['lang']
+    return 'fp:' + hashlib.sha256(fp_blob.encode()).hexdigest()
+
+def _jittered(ttl_s: int) -> int:
+    return max(1, int(ttl_s * (1 + random.uniform(-CACHE_TTL_JITTER, CACHE_TTL_JITTER))))
+
+_inflight = SingleFlight('analyze')
+_refreshing: dict[str, asyncio.Task] = {}
+
+def _schedule_refresh(ckey: str, refresh) -> None:
+    # One background recompute per key; SingleFlight also absorbs any concurrent real miss
+    if ckey in _refreshing or _inflight.inflight(ckey):
+        return
+    async def _go():
+        try:
+            await _inflight.do(ckey, refresh)
+            inc('analyze_cache_refresh_total', 1)
+        except Exception as e:
+            inc('analyze_cache_refresh_errors', 1)
+            log.info('cache_refresh_error', error=str(e))
+        finally:
+            _refreshing.pop(ckey, None)
+    _refreshing[ckey] = asyncio.ensure_future(_go())
+
+def _serve_hit(payload: dict, start: float) -> dict:
+    # Request-path accounting for a cached answer (never called from a background refresh)
+    total_latency = int((time.time() - start) * 1000)
+    payload['cache_hit'] = True
+    payload['latency_ms'] = total_latency
+    observe_ms('analyze_latency_ms', total_latency)
+    inc('analyze_requests_total', 1)
+    if should_sample():
+        log.info('analyze', cache_hit=True, latency_ms=total_latency, model_version=payload.get('model_version'))
+    return payload
+
+def _load_payload(raw) -> dict | None:
+    try:
+        return json.loads(raw) if isinstance(raw, str) else dict(raw)
+    except Exception:
+        return None
+
+def _is_stale(payload: dict) -> bool:
+    soft_exp = payload.get('soft_expires_at')
+    return soft_exp is not None and time.time() > soft_exp
+
+async def _cache_lookup(ckey: str, start: float, refresh=None) -> dict | None:
+    if not CACHE_ENABLED:
+        return None
+    cached = await run_io(cache_get, ckey)
+    if not cached:
+        return None
+    payload = _load_payload(cached)
+    if payload is None:
+        await run_io(cache_delete, ckey)
+        return None
+    if _is_stale(payload):
+        inc('analyze_cache_stale_served', 1)
+        if refresh is not None:
+            _schedule_refresh(ckey, refresh)
+    payload.pop('soft_expires_at', None)
+    payload.pop('hard_expires_at', None)
+    return _serve_hit(payload, start)
+
+async def _content_lookup(prep: dict, ckey: str, start: float) -> dict | None:
+    # Second lookup after clean: by content fingerprint, then SQLite (exact text_hash, then a
+    # SimHash near-duplicate). A hit is aliased under the request key so the next request for
+    # this URL skips the fetch. Past its soft TTL the fingerprint entry is a miss: the caller
+    # recomputes, and that rewrites both keys.
+    if not CACHE_ENABLED:
+        return None
+    fkey = _fingerprint_key(prep)
+    raw = await run_io(cache_get, fkey)
+    payload = _load_payload(raw) if raw else None
+    if payload and _is_stale(payload):
+        inc('analyze_fingerprint_stale', 1)
+        return None
+    if not payload:
+        mv = f'{MV_SUM}|sent:{MV_SENT}'
+        row = await run_io(find_analysis, prep['text_hash'], mv, legacy_fingerprints(prep['text']))
+        if not row:
+            row = await run_io(find_near_analysis, prep['simhash'], mv)
+        if not row:
+            inc('analyze_fingerprint_miss', 1)
+            return None
+        hard_ttl = _jittered(CACHE_TTL_S)
+        payload = {
+            'id': row['article_id'],
+            'summary': row['summary'],
+            'sentiment': row['sentiment'],
+            'confidence': row['confidence'],
+            'tokens': 0,
+            'latency_ms': 0,
+            'costs_cents': row['cost_cents'] or 0,
+            'model_version': row['model_version'],
+            'cache_hit': True,
+            'key_sentences': top_sentences(row['summary'], 3),
+            'soft_expires_at': time.time() + min(_jittered(CACHE_SOFT_TTL_S), hard_ttl),
+            'hard_expires_at': time.time() + hard_ttl,
+        }
+        await run_io(cache_set, fkey, json.dumps(payload, ensure_ascii=False), hard_ttl)
+        inc('analyze_fingerprint_db_hit', 1)
+    inc('analyze_fingerprint_hit', 1)
+    if ckey != fkey:
+        # The alias expires with its source, not a fresh hard TTL from now
+        hard_exp = payload.get('hard_expires_at')
+        ttl = int(hard_exp - time.time()) if hard_exp else _jittered(CACHE_TTL_S)
+        if ttl > 0:
+            await run_io(cache_set, ckey, json.dumps(payload, ensure_ascii=False), ttl)
+    payload.pop('soft_expires_at', None)
+    payload.pop('hard_expires_at', None)
+    return _serve_hit(payload, start)
+
+def _component_key(kind: str, version: str, text: str) -> str:
+    return f'{kind}:' + hashlib.sha256(f'{version}|{text}'.encode()).hexdigest()
+
+async def _component_get(kind: str, version: str, text: str):
+    if not CACHE_ENABLED:
+        return None
+    key = _component_key(kind, version, text)
+    cached = await run_io(cache_get, key)
+    if cached:
+        try:
+            out = json.loads(cached)
+            inc(f'component_{kind}_hit', 1)
+            return out
+        except Exception:
+            await run_io(cache_delete, key)
+    inc(f'component_{kind}_miss', 1)
+    return None
+
+async def _component_set(kind: str, version: str, text: str, out) -> None:
+    if CACHE_ENABLED:
+        await run_io(cache_set, _component_key(kind, version, text), json.dumps(out, ensure_ascii=False), _jittered(CACHE_TTL_S))
+
+async def _component(kind: str, version: str, text: str, compute, cacheable=lambda out: True):
+    # Per-stage cache keyed by exact input + that stage's model version only, so bumping
+    # one model doesn't throw away the others' results (summaries are the paid ones).
+    # Returns (out, hit).
+    out = await _component_get(kind, version, text)
+    if out is not None:
+        return out, True
+    out = await compute()
+    if cacheable(out):
+        await _component_set(kind, version, text, out)
+    return out, False
+
+async def _finalize(prep: dict, ckey: str, sum_out: dict, sent: tuple, start: float, request_id: str,
+                    refresh: bool = False) -> dict:
     summary = sum_out['summary']
     sum_latency = sum_out['latency_ms']
-    
-    # Sentiment on summary
-    try:
-        text_for_sent = snippet or text
-        label, conf, mv_sent = predict_label(text_for_sent)
-    except Exception as e:
-        log.info('Sentiment_error_debug', type=str(type(summary)), preview=str(summary)[:120])
-        raise HTTPException(status_code=502, detail=f'sentiment_error: {e}')
+    label, conf, mv_sent = sent
+    lang, domain = prep['lang'], prep['domain']
     
     model_version = f"{sum_out['model_version']}|sent:{mv_sent}"
     
@@ -145,10 +346,11 @@ def analyze(req: AnalyzeRequest, request: Request):
     if not isinstance(summary, str):
         raise HTTPException(500, detail={'code': 'summary_not_str' ,'message': str(type(summary))})
     
-    # Metrics + logs
+    # Metrics + logs (a background refresh isn't a request)
     total_latency = int((time.time() - start) * 1000)
-    observe_ms('analyze_latency_ms', total_latency)
-    inc('analyze_requests_total', 1)
+    if not refresh:
+        observe_ms('analyze_latency_ms', total_latency)
+        inc('analyze_requests_total', 1)
     cache_hit = False
     analysis_latency_ms = sum_latency + 0
     
@@ -169,19 +371,23 @@ def analyze(req: AnalyzeRequest, request: Request):
     }
     
     # Store & cache
-    observe_ms('analyze_latency_ms', total_latency)
-    inc('analyze_requests_total', 1)
-    
-    if PG_CACHE_ENABLED:
+    if CACHE_ENABLED:
         cache_copy = dict(resp)
         cache_copy['latency_ms'] = cache_copy.get('analysis_latency_ms', total_latency)
-        cache_set(ckey, json.dumps(cache_copy, ensure_ascii=False), CACHE_TTL_S)
+        hard_ttl = _jittered(CACHE_TTL_S)
+        cache_copy['soft_expires_at'] = time.time() + min(_jittered(CACHE_SOFT_TTL_S), hard_ttl)
+        cache_copy['hard_expires_at'] = time.time() + hard_ttl
+        raw = json.dumps(cache_copy, ensure_ascii=False)
+        await run_io(cache_set, ckey, raw, hard_ttl)
+        await run_io(cache_set, _fingerprint_key(prep), raw, hard_ttl)
+        if prep.get('canonical_url') and prep['canonical_url'] != prep['source_url']:
+            await run_io(cache_set, _key_for(prep['canonical_url'], lang), raw, hard_ttl)
     
     if should_sample():
         log.info(
                 'analyze',
-                 request_id=request.state.request_id,
-                 url=str(req.url) if req.url else None,
+                 request_id=request_id,
+                 url=prep['url'],
                  domain=domain,
                  lang=lang,
                  model_version=model_version,
@@ -193,29 +399,231 @@ def analyze(req: AnalyzeRequest, request: Request):
                  out_tokens=out_tokens
         )
     
-    log.info('db_bind_types', title_t=type(title).__name__, snippet_t=type(snippet).__name__, text_t=type(text).__name__)
-    store_analysis(
+    log.info('db_bind_types', title_t=type(prep['title']).__name__, snippet_t=type(prep['snippet']).__name__, text_t=type(prep['text']).__name__)
+    await run_io(
+        store_analysis,
         aid, 
-        source_url, 
+        prep['source_url'], 
         domain, 
-        title, 
+        prep['title'], 
         lang,
-        pub_time,
-        snippet,
-        text_hash,
+        prep['pub_time'],
+        prep['snippet'],
+        prep['text_hash'],
         summary, 
         label, 
         conf,  
         cost_cents, 
-        model_version)
+        model_version,
+        prep.get('simhash'))
     
     # Prometheus bump for non-cache path
-    if PROM:
+    if PROM and not refresh:
         P_COUNT.inc()
         H_LAT.observe(total_latency)
         
     return resp
 
+async def _sentiment(text: str) -> tuple:
+    if SENT_BATCHING:
+        # A cold load happens on the model pool, never on the event loop
+        await run_model(get_model, 'sentiment')
+        return await asyncio.wrap_future(submit_label(text))
+    return await run_model(predict_label, text)
+
+async def _sentiment_stage(prep: dict) -> tuple:
+    # Sentiment runs on the snippet/text, not the summary, so it overlaps with summarization
+    text = prep['snippet'] or prep['text']
+    try:
+        out, _ = await _component('sent', MV_SENT, text, lambda: _sentiment(text))
+        return tuple(out)
+    except Exception as e:
+        log.info('Sentiment_error_debug', preview=str(prep['snippet'] or prep['text'])[:120])
+        raise HTTPException(status_code=502, detail=f'sentiment_error: {e}')
+
+async def _translate_stage(prep: dict) -> str:
+    if prep['lang'] == 'es':
+        out, _ = await _component('tr', MV_TR, prep['text'], lambda: run_model(translate_es_to_en, prep['text']))
+        return out
+    return prep['text']
+
+async def _summarize_stage(text_en: str) -> dict:
+    # Lead-3 stub fallbacks (provider down / no key) are not cached as real summaries
+    out, hit = await _component('sum', MV_SUM, text_en, lambda: summarize_async(text_en, 'en'),
+                                cacheable=lambda o: not o.get('model_version', '').endswith('@sum_stub'))
+    if hit:
+        # Already paid for: no tokens, no cost this time
+        out = dict(out, usage={'prompt_tokens': 0, 'completion_tokens': 0}, latency_ms=0)
+    return out
+
+async def _summary_for(prep: dict) -> dict:
+    return await _summarize_stage(await _translate_stage(prep))
+
+@router.post('/', response_model=AnalyzeResponse)
+async def analyze(req: AnalyzeRequest, request: Request):
+    await run_io(ensure_db)
+    start = time.time()
+    lang = _validate(req)
+    
+    # Cache check
+    ckey = _cache_key(req, lang, await _resolve(req))
+    rid = request.state.request_id
+    cached = await _cache_lookup(ckey, start, lambda: _run_pipeline(req, ckey, time.time(), rid, refresh=True))
+    if cached:
+        return cached
+    
+    # fetch -> clean -> {translate -> summarize, sentiment} -> persist
+    # Concurrent identical requests share one run; waiters get it as a coalesced hit
+    resp, shared = await _inflight.do(ckey, lambda: _run_pipeline(req, ckey, start, rid))
+    if not shared:
+        return resp
+    resp = dict(resp)
+    total_latency = int((time.time() - start) * 1000)
+    resp.update(cache_hit=True, coalesced=True, latency_ms=total_latency)
+    observe_ms('analyze_latency_ms', total_latency)
+    inc('analyze_requests_total', 1)
+    return resp
+
+async def _run_pipeline(req: AnalyzeRequest, ckey: str, start: float, rid: str, refresh: bool = False) -> dict:
+    # refresh: background recompute of a stale entry, so no content lookup (that would just
+    # copy the same stale payload back) and no request metrics
+    front, stage_ms = await run_stages([
+        Stage('fetch', lambda: _fetch(req)),
+        Stage('clean', lambda page: _clean(req, page), ('fetch',)),
+    ])
+    prep = front['clean']
+    # Same content already analysed under another URL/input: skip translate/summarize/sentiment
+    hit = None if refresh else await _content_lookup(prep, ckey, start)
+    if hit:
+        return hit
+    out, back_ms = await run_stages([
+        Stage('translate', _translate_stage, ('clean',)),
+        Stage('summarize', _summarize_stage, ('translate',)),
+        Stage('sentiment', _sentiment_stage, ('clean',)),
+        Stage('persist', lambda prep, sum_out, sent: _finalize(prep, ckey, sum_out, sent, start, rid, refresh),
+              ('clean', 'summarize', 'sentiment')),
+    ], inputs={'clean': prep})
+    stage_ms.update(back_ms)
+    if should_sample():
+        log.info('analyze_stages', request_id=rid, **{f'{k}_ms': v for k, v in stage_ms.items()})
+    return out['persist']
+
 @router.post('', response_model=AnalyzeResponse)
-def analyze_noslash(req: AnalyzeRequest, request: Request):
-    return analyze(req, request)
\ No newline at end of file
+async def analyze_noslash(req: AnalyzeRequest, request: Request):
+    return await analyze(req, request)
+
+def _item_error(e: Exception) -> dict:
+    if isinstance(e, HTTPException):
+        detail = e.detail if isinstance(e.detail, str) else json.dumps(e.detail, ensure_ascii=False)
+        return {'status': e.status_code, 'detail': detail}
+    return {'status': 500, 'detail': f'internal_error: {e}'}
+
+async def _try(coro):
+    try:
+        return await coro, None
+    except Exception as e:
+        return None, _item_error(e)
+
+@router.post('/batch', response_model=AnalyzeBatchResponse)
+async def analyze_batch(req: AnalyzeBatchRequest, request: Request):
+    await run_io(ensure_db)
+    start = time.time()
+    n = len(req.items)
+    results: list = [None] * n
+    errors: list = [None] * n
+    
+    # Cache lookups first, then fetch + clean the misses concurrently; one bad item only fails itself
+    rid = request.state.request_id
+    async def _lookup(item, lang):
+        ckey = _cache_key(item, lang, await _resolve(item))
+        return ckey, await _cache_lookup(ckey, start, lambda: _run_pipeline(item, ckey, time.time(), rid, refresh=True))
+    
+    valid = []
+    for i, item in enumerate(req.items):
+        try:
+            valid.append((i, item, _validate(item)))
+        except HTTPException as e:
+            errors[i] = _item_error(e)
+    looked = await asyncio.gather(*(_try(_lookup(item, lang)) for _, item, lang in valid))
+    # Repeats of one input (same ckey) are analysed once and share the result
+    keyed, dups = [], {}
+    for (i, item, _), (found, err) in zip(valid, looked):
+        if err:
+            errors[i] = err
+            continue
+        ckey, cached = found
+        if cached:
+            results[i] = cached
+        elif ckey in dups:
+            dups[ckey].append(i)
+        else:
+            dups[ckey] = []
+            keyed.append((i, item, ckey))
+    
+    preps = await asyncio.gather(*(_try(_prepare(item)) for _, item, _ in keyed))
+    pending = []
+    for (i, _, ckey), (prep, err) in zip(keyed, preps):
+        if err:
+            errors[i] = err
+            continue
+        hit, err = await _try(_content_lookup(prep, ckey, start))
+        if hit:
+            results[i] = hit
+        else:
+            pending.append((i, prep, ckey))
+    
+    # Sentiment: component-cache hits first, the rest in bounded-size batches through predict_batch
+    async def _sentiments() -> list:
+        texts = [p['snippet'] or p['text'] for _, p, _ in pending]
+        sents: list = [await _component_get('sent', MV_SENT, t) for t in texts]
+        todo = [j for j, s in enumerate(sents) if s is None]
+        for lo in range(0, len(todo), SENT_BATCH_SIZE):
+            chunk = todo[lo:lo + SENT_BATCH_SIZE]
+            try:
+                outs = await run_model(predict_batch, [texts[j] for j in chunk])
+            except Exception as e:
+                log.info('sentiment_batch_error', size=len(chunk), error=str(e))
+                outs = [HTTPException(status_code=502, detail=f'sentiment_error: {e}')] * len(chunk)
+            for j, out in zip(chunk, outs):
+                sents[j] = out
+                if isinstance(out, Exception):
+                    continue
+                # Best effort: a failed cache write must not throw away the prediction
+                try:
+                    await _component_set('sent', MV_SENT, texts[j], out)
+                except Exception as e:
+                    inc('component_sent_set_errors', 1)
+                    log.info('component_set_error', kind='sent', error=str(e))
+        return [tuple(s) if isinstance(s, list) else s for s in sents]
+    
+    # Summaries are independent provider calls; run them side by side, and alongside sentiment
+    sums, sents = await asyncio.gather(
+        asyncio.gather(*(_try(_summary_for(p)) for _, p, _ in pending)),
+        _sentiments(),
+    )
+    
+    for (i, prep, ckey), (sum_out, err), sent in zip(pending, sums, sents):
+        if err:
+            errors[i] = err
+        elif isinstance(sent, Exception):
+            errors[i] = _item_error(sent)
+        else:
+            results[i], errors[i] = await _try(_finalize(prep, ckey, sum_out, sent, start, rid))
+    
+    for i, _, ckey in keyed:
+        for j in dups[ckey]:
+            errors[j] = errors[i]
+            results[j] = results[i] and dict(results[i], cache_hit=True, coalesced=True)
+    inc('analyze_batch_coalesced', sum(len(v) for v in dups.values()))
+    
+    items = [
+        {'index': i, 'ok': errors[i] is None, 'result': results[i], 'error': errors[i]}
+        for i in range(n)
+    ]
+    total_latency = int((time.time() - start) * 1000)
+    observe_ms('analyze_batch_latency_ms', total_latency)
+    inc('analyze_batch_items_total', n)
+    inc('analyze_batch_errors_total', sum(1 for e in errors if e))
+    if should_sample():
+        log.info('analyze_batch', request_id=request.state.request_id, items=n, pending=len(pending), latency_ms=total_latency)
+    return {'items': items, 'latency_ms': total_latency}
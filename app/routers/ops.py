@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import JSONResponse
 from app.metrics import snapshot_metrics
+from app.model_registry import is_ready, model_status, model_stats
 from app.metrics import PROM, generate_latest, CONTENT_TYPE_LATEST
 
 router = APIRouter(prefix='', tags=['ops'])
@@ -8,9 +10,15 @@ router = APIRouter(prefix='', tags=['ops'])
 def health():
     return {'status': 'ok'}
 
+@router.get('/ready')
+def ready():
+    # Liveness is /health; this is 503 until the required models are loaded (or after a failed load)
+    ok = is_ready()
+    return JSONResponse(status_code=200 if ok else 503, content={'ready': ok, 'models': model_status()})
+
 @router.get('/metrics')
 def metrics():
-    return snapshot_metrics()
+    return {**snapshot_metrics(), 'models': model_stats()}
 
 @router.get('/metrics.prom')
 def metrics_prom():
@@ -1,9 +1,12 @@
 from pydantic import BaseModel, HttpUrl, Field
 from typing import Optional, Literal
 
+# Same order of magnitude as the fetcher's FETCH_MAX_BYTES
+MAX_HTML_CHARS = 2_000_000
+
 class AnalyzeRequest(BaseModel):
     url: Optional[HttpUrl] = None
-    html: Optional[str] = None
+    html: Optional[str] = Field(None, max_length=MAX_HTML_CHARS)
     text: Optional[str] = None
     lang: Optional[Literal['en', 'es']] = None
     class Config: extra = 'forbid'
@@ -18,4 +21,25 @@ class AnalyzeResponse(BaseModel):
     latency_ms: int
     costs_cents: int
     model_version: str
-    cache_hit: bool
\ No newline at end of file
+    cache_hit: bool
+    coalesced: bool = False
+
+MAX_BATCH_ITEMS = 100
+
+class AnalyzeBatchRequest(BaseModel):
+    items: list[AnalyzeRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+    class Config: extra = 'forbid'
+
+class AnalyzeBatchError(BaseModel):
+    status: int
+    detail: str
+
+class AnalyzeBatchItem(BaseModel):
+    index: int
+    ok: bool
+    result: Optional[AnalyzeResponse] = None
+    error: Optional[AnalyzeBatchError] = None
+
+class AnalyzeBatchResponse(BaseModel):
+    items: list[AnalyzeBatchItem]
+    latency_ms: int
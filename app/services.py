@@ -1,26 +1,30 @@
-import datetime, os, json, hashlib, re, sqlite3, requests
+import asyncio, codecs, datetime, os, json, hashlib, re, sqlite3, time, requests
+import httpx
 from pathlib import Path
-from urllib.parse import urlparse
-import urllib.robotparser as roboparser
-from bs4 import BeautifulSoup
 from fastapi import HTTPException
-from readability import Document
-from app.obs import log
-import requests
+from app.fingerprint import content_fingerprint
+from app import near_dup
+from app.canonical import remember
+from app import host_policy
+from app.executors import run_io
+from app.extract import extract, extract_meta, parse_html
+from app.extractors import rule_for
+from app.metrics import inc
+from app.page_cache import PAGES, PAGE_CACHE_ENABLED
 
-ALLOWLIST_PATH = 'config/allowlist.txt'
 USER_AGENT = 'NewsSumSentiment/0.1 (+contact: halamo24@gmail.com)'
 MAX_INPUT_CHARS = 8000
 FETCH_TIMEOUT_S = 20
 DB_PATH = os.getenv('DB_PATH', 'data/app.db')
 SNIPPET_CHARS = 240
+FETCH_MAX_CONNECTIONS = int(os.getenv('FETCH_MAX_CONNECTIONS', '2000'))
+FETCH_MAX_KEEPALIVE = int(os.getenv('FETCH_MAX_KEEPALIVE', '200'))
+FETCH_MAX_BYTES = int(os.getenv('FETCH_MAX_BYTES', str(5 * 1024 * 1024)))
+FETCH_CHUNK_BYTES = 64_000
 
 def _normalize_whitespace(s: str) -> str:
     return re.sub(r'\s+', ' ', (s or '').strip())
 
-def _lower(x: object) -> str:
-    return str(x or '').lower()
-
 def _to_str_or_none(x, *, maxlen=None):
     if x is None:
         return None
@@ -42,128 +46,212 @@ def build_snippet(text: str, n: int = SNIPPET_CHARS) -> str:
     return t[:n]
     
 def build_text_hash(text: str) -> str:
-    norm = _normalize_whitespace(text)
-    return hashlib.sha256(norm.encode('utf-8')).hexdigest()
-
-def load_allowlist():
-    with open(ALLOWLIST_PATH, 'r', encoding='utf-8') as f:
-        domains = []
-        for line in f:
-            s = line.strip()
-            if not s or s.startswith('#'):
-                continue
-            s = _lower(s).lstrip('.')
-            domains.append(s)
-        return set(domains)
-    
-ALLOW = load_allowlist()
+    return content_fingerprint(text)
 
 def reload_allowlist():
-    global ALLOW
-    ALLOW = load_allowlist()
+    host_policy.ALLOWLIST.reload()
 
 def domain_allowed(url: str) -> bool:
-    host = urlparse(url).hostname or ''
-    host = _lower(host).rstrip('.')
-    allowed = any(host == d or host.endswith('.' + d) for d in ALLOW)
-    if not allowed:
-        log.info('domain_denied', host=host, allowlist=list(ALLOW)[:12], allowlist_size=len(ALLOW))
-    return allowed
+    # Suffix-index lookup; denials are counted (host_policy_domain_denied), not logged
+    return host_policy.domain_allowed(url)
 
 def robots_allow(url: str) -> bool:
-    parsed = urlparse(url)
-    base = f'{parsed.scheme}://{parsed.netloc}'
-    robots_url = base + '/robots.txt'
-    try:
-        rp = roboparser.RobotFileParser()
-        rp.set_url(robots_url)
-        rp.read()
-        return rp.can_fetch(USER_AGENT, url)
-    except Exception:
-        return True
+    return host_policy.ROBOTS.allowed(url, USER_AGENT)
 
-def clean_article_html(html: str) -> tuple[str, dict]:
-    soup = BeautifulSoup(html or '', 'lxml')
-    title = (soup.title.string or '').strip() if soup.title else None
-    
-    desc = None
-    for attr, val in [('property', 'og:description'), ('name', 'description')]:
-        tag = soup.find('meta', {attr: val})
-        if tag and tag.get('content'):
-            desc = tag['content'].strip()
-            break
-    
-    pub = None
-    for attr, val in [('property', 'article:published_time'), ('itemprop', 'datePublished'), ('name', 'pubdate'), ('name', 'date')]:
-        tag = soup.find('meta', {attr: val})
-        if tag and tag.get('content'):
-            pub = tag['content'].strip()
-            break
-    if not pub:
-        t = soup.find('time', attrs={'datetime': True})
-        if t:
-            pub = t['datetime'].strip()
-            
-    doc = Document(html or '')
-    soup = BeautifulSoup(doc.summary(), 'lxml')
-    for tag in soup(['script', 'style', 'iframe', 'noscript']):
-        tag.decompose()
-    for el in soup(True):
-        for attr in list(el.attrs.keys()):
-            if _lower(attr).startswith('on'):
-                del el.attrs[attr]
-    full = ' '.join(soup.get_text(separator=' ').split())
-    text = full[:MAX_INPUT_CHARS]
-    
-    meta = {'title': title, 'snippet': desc, 'pub_time': pub}
+_http = {}
+
+def http_client() -> httpx.AsyncClient:
+    # One pooled client per event loop; connections cannot be shared across loops
+    loop = asyncio.get_running_loop()
+    client = _http.get(loop)
+    if client is None or client.is_closed:
+        _http.clear()
+        client = httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            follow_redirects=True,
+            timeout=httpx.Timeout(FETCH_TIMEOUT_S, connect=5.0),
+            limits=httpx.Limits(max_connections=FETCH_MAX_CONNECTIONS, max_keepalive_connections=FETCH_MAX_KEEPALIVE),
+        )
+        _http[loop] = client
+    return client
+
+async def close_http_client():
+    for client in list(_http.values()):
+        await client.aclose()
+    _http.clear()
+
+async def robots_allow_async(url: str) -> bool:
+    # Cached per host with TTL; stale entries are served while refreshing in the background
+    return await host_policy.ROBOTS.allowed_async(url, USER_AGENT, http_client())
+
+# Bump when cleaning output changes; keys the cleaned copies kept in the page cache
+CLEAN_VERSION = 'clean_v3'
+
+def clean_version(url: str | None) -> str:
+    # CLEAN_VERSION plus the host's extraction rule, so editing config/extractors.json
+    # doesn't keep serving text cleaned with the old rule
+    rule = rule_for(url)
+    return f'{CLEAN_VERSION}/{rule.version}' if rule else CLEAN_VERSION
+
+def clean_article_html(html: str, url: str | None = None) -> tuple[str, dict]:
+    # One lxml parse for meta + text; the url picks a per-site rule (config/extractors.json)
+    text, meta, _ = extract(html, url)
     return text, meta
 
 def maybe_extract_pub_time(html: str) -> str | None:
     try:
-        soup = BeautifulSoup(html or '', 'lxml')
-        candidates = []
-        for attr, val in [
-            ('property', 'article: published_time'),
-            ('name', 'pubdate'),
-            ('name', 'date'),
-            ('itemprop', 'datePublished'),
-        ]:
-            tag = soup.find('meta', {attr: val})
-            if tag and tag.get('content'): candidates.append(tag['content'])
-        t = soup.find('time', attrs={'datetime': True})
-        if t: candidates.append(t['datetime'])
-        for c in candidates:
-            c = c.strip()
-            try:
-                dt = datetime.fromisoformat(c.replace('Z', '+00:00'))
-                return dt.isoformat()
-            except Exception:
-                if re.search(r'\d{4}-\d{2}-\d{2}', c):
-                    return c
-        return None
+        tree = parse_html(html)
+        if tree is None:
+            return None
+        c = extract_meta(tree)['pub_time']
+        if not c:
+            return None
+        try:
+            return datetime.datetime.fromisoformat(c.replace('Z', '+00:00')).isoformat()
+        except ValueError:
+            return c if re.search(r'\d{4}-\d{2}-\d{2}', c) else None
     except Exception:
         return None
 
-def fetch_url(url: str, timeout_s: int) -> str:
+_HTML_TYPES = ('text/html', 'application/xhtml+xml')
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.I)
+_BOMS = ((b'\xef\xbb\xbf', 'utf-8-sig'), (b'\xff\xfe', 'utf-16-le'), (b'\xfe\xff', 'utf-16-be'))
+# Magic numbers of things that get served as text/html but are not
+_NON_HTML_MAGIC = (b'%PDF', b'\x89PNG', b'GIF8', b'\xff\xd8\xff', b'PK\x03\x04', b'\x1f\x8b')
+
+def _check_response(status: int, headers) -> None:
+    # Everything that can be decided before reading a single body byte
+    if status != 200:
+        raise HTTPException(status_code=400, detail=f'http_{status}')
+    ctype = (headers.get('content-type') or '').lower()
+    if not any(t in ctype for t in _HTML_TYPES):
+        raise HTTPException(status_code=415, detail='unsupported_media_type')
+    length = headers.get('content-length')
+    if length and length.isdigit() and int(length) > FETCH_MAX_BYTES:
+        raise HTTPException(status_code=413, detail='page_too_large')
+
+def _append(buf: bytearray, chunk: bytes) -> None:
+    if not buf and chunk[:16].lstrip().startswith(_NON_HTML_MAGIC):
+        raise HTTPException(status_code=415, detail='unsupported_media_type')
+    if len(buf) + len(chunk) > FETCH_MAX_BYTES:
+        raise HTTPException(status_code=413, detail='page_too_large')
+    buf += chunk    # amortized O(1) append, no re-copy of what's already buffered
+
+def sniff_charset(content_type: str | None, head: bytes) -> str:
+    """Header charset, then BOM, then <meta charset> in the first KBs; utf-8 otherwise."""
+    m = re.search(r'charset\s*=\s*["\']?([\w.:-]+)', content_type or '', re.I)
+    for enc in ([m.group(1)] if m else []):
+        try:
+            return codecs.lookup(enc).name
+        except LookupError:
+            pass
+    for bom, enc in _BOMS:
+        if head.startswith(bom):
+            return enc
+    m = _META_CHARSET.search(head[:4096])
+    if m:
+        try:
+            return codecs.lookup(m.group(1).decode('ascii')).name
+        except LookupError:
+            pass
+    return 'utf-8'
+
+def _decode(buf: bytearray, content_type: str | None) -> str:
+    # Single decode straight from the buffer
+    return buf.decode(sniff_charset(content_type, bytes(buf[:4096])), errors='replace')
+
+def _cached_body(cached, metric: str) -> tuple[str, str] | None:
+    body = PAGES.load(cached)
+    if body is None:
+        return None
+    inc(metric, 1)
+    return _decode(body, cached.content_type), cached.digest
+
+def fetch_page(url: str, timeout_s: int = FETCH_TIMEOUT_S) -> tuple[str, str | None]:
+    """(html, body digest). Fresh disk-cache entries skip the network; stale ones revalidate."""
     if not domain_allowed(url):
         raise HTTPException(status_code=403, detail='domain_not_allowed')
     if not robots_allow(url):
         raise HTTPException(status_code=403, detail='blocked_by_robots')
-    headers = {'User-Agent': USER_AGENT}
-    resp = requests.get(url, headers=headers, timeout=FETCH_TIMEOUT_S, allow_redirects=True, stream=True)
-    if resp.status_code != 200:
-        raise HTTPException(status_code=400, detail=f'http_{resp.status_code}')
-    ctype = (resp.headers.get('content-type') or '').lower()
-    if 'text/html' not in ctype and 'application/xhtml+xml' not in ctype:
-        raise HTTPException(status_code=415, detail='unsupported_media_type')
-    
-    content = b''
-    for chunk in resp.iter_content(64_000):
-        content += chunk
-        
-    resp.encoding = resp.encoding or resp.apparent_encoding or 'utf-8'
-    html = content.decode(resp.encoding, errors='replace')
-    return html
+    cached = PAGES.lookup(url) if PAGE_CACHE_ENABLED else None
+    if cached and cached.fresh and (out := _cached_body(cached, 'page_cache_hit')):
+        return out
+    host_policy.ROBOTS.wait_turn(url, USER_AGENT)
+    deadline = time.monotonic() + timeout_s
+    conditional = cached.conditional_headers() if cached else {}
+    for _ in range(2):
+        headers = {'User-Agent': USER_AGENT, **conditional}
+        with requests.get(url, headers=headers, timeout=timeout_s, allow_redirects=True, stream=True) as resp:
+            if resp.status_code == 304 and conditional:
+                if out := _cached_body(cached, 'page_cache_revalidated'):
+                    PAGES.revalidated(cached, resp.headers.get('cache-control'))
+                    return out
+                # Blob gone since the lookup (evicted): ask once more, unconditionally
+                inc('page_cache_304_missing_body', 1)
+                conditional = {}
+                continue
+            _check_response(resp.status_code, resp.headers)
+            buf = bytearray()
+            for chunk in resp.iter_content(FETCH_CHUNK_BYTES):
+                if time.monotonic() > deadline:
+                    raise HTTPException(status_code=504, detail='fetch_timeout')
+                _append(buf, chunk)
+            resp_headers = resp.headers
+            break
+    inc('page_cache_miss', 1)
+    digest = PAGES.store(url, buf, resp_headers) if PAGE_CACHE_ENABLED else None
+    return _decode(buf, resp_headers.get('content-type')), digest
+
+def fetch_url(url: str, timeout_s: int = FETCH_TIMEOUT_S) -> str:
+    return fetch_page(url, timeout_s)[0]
+
+async def fetch_page_async(url: str, timeout_s: int = FETCH_TIMEOUT_S) -> tuple[str, str | None]:
+    """Async fetch_page: (html, body digest)."""
+    if not domain_allowed(url):
+        raise HTTPException(status_code=403, detail='domain_not_allowed')
+    if not await robots_allow_async(url):
+        raise HTTPException(status_code=403, detail='blocked_by_robots')
+    cached = await run_io(PAGES.lookup, url) if PAGE_CACHE_ENABLED else None
+    if cached and cached.fresh and (out := await run_io(_cached_body, cached, 'page_cache_hit')):
+        return out
+    headers = cached.conditional_headers() if cached else {}
+    try:
+        # timeout_s bounds the crawl-delay wait plus the whole transfer, not just each read
+        # (slow-drip servers). A queue for the host longer than half of it is refused outright.
+        async with asyncio.timeout(timeout_s):
+            if not await host_policy.ROBOTS.wait_turn_async(url, USER_AGENT, max_wait=timeout_s / 2):
+                raise HTTPException(status_code=503, detail='crawl_delay_busy')
+            for _ in range(2):
+                async with http_client().stream('GET', url, headers=headers, timeout=timeout_s) as resp:
+                    if resp.status_code == 304 and headers:
+                        # Unchanged upstream: no body download, and the caller's cleaned output still applies
+                        if out := await run_io(_cached_body, cached, 'page_cache_revalidated'):
+                            await run_io(PAGES.revalidated, cached, resp.headers.get('cache-control'))
+                            return out
+                        # Blob gone since the lookup (evicted): ask once more, unconditionally
+                        inc('page_cache_304_missing_body', 1)
+                        headers = {}
+                        continue
+                    _check_response(resp.status_code, resp.headers)
+                    buf = bytearray()
+                    async for chunk in resp.aiter_bytes(FETCH_CHUNK_BYTES):
+                        _append(buf, chunk)
+                    resp_headers = resp.headers
+                    final_url = str(resp.url)
+                    break
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail='fetch_timeout')
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f'fetch_error: {type(e).__name__}')
+    inc('page_cache_miss', 1)
+    if final_url != url:
+        # Memoize the redirect chain so the next request goes straight to the target
+        await run_io(remember, url, final_url, 'redirect')
+    digest = await run_io(PAGES.store, url, buf, resp_headers) if PAGE_CACHE_ENABLED else None
+    return _decode(buf, resp_headers.get('content-type')), digest
+
+async def fetch_url_async(url: str, timeout_s: int = FETCH_TIMEOUT_S) -> str:
+    return (await fetch_page_async(url, timeout_s))[0]
 
 def cache_key(url: str, model_version: str) -> str:
     blob = (url + '|' + model_version).encode('utf-8')
@@ -223,9 +311,43 @@ def ensure_db():
         CREATE INDEX IF NOT EXISTS idx_articles_create_time ON articles(create_time);
         CREATE INDEX IF NOT EXISTS idx_analyses_article_id ON analyses(article_id);
         """)
+    near_dup.ensure_schema(conn)
     conn.close()
     
-def store_analysis(aid, url, domain, title, lang, pub_time, snippet, text_hash, summary, sentiment, confidence, cost_cents, model_version):
+def find_analysis(text_hash: str, model_version: str, legacy_hashes: tuple = ()) -> dict | None:
+    # Latest stored analysis of identical content (any URL, or ingested) for this model version.
+    # legacy_hashes: the same text under the pre-fingerprint hashes, matched after text_hash
+    hashes = (text_hash, *legacy_hashes)
+    conn = safe_connect()
+    try:
+        row = conn.execute(f"""
+            SELECT an.article_id, an.summary, an.sentiment, an.confidence, an.cost_cents, an.model_version,
+                   a.text_hash = ? AS current
+            FROM articles a JOIN analyses an ON an.article_id = a.id
+            WHERE a.text_hash IN ({','.join('?' * len(hashes))}) AND an.model_version = ?
+            ORDER BY current DESC, an.create_time DESC LIMIT 1
+        """, (text_hash, *hashes, model_version)).fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    if not row:
+        return None
+    if not row['current']:
+        inc('analyze_legacy_hash_hit', 1)
+    return {k: row[k] for k in row.keys() if k != 'current'}
+
+def find_near_analysis(simhash: int, model_version: str) -> dict | None:
+    # Syndicated copy of an already-analysed article (byline / "Read more" / headline changes)
+    conn = safe_connect()
+    try:
+        return near_dup.find_near_analysis(conn, simhash, model_version)
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+def store_analysis(aid, url, domain, title, lang, pub_time, snippet, text_hash, summary, sentiment, confidence, cost_cents, model_version, simhash=None):
     conn = safe_connect()
     cur = conn.cursor()
     
@@ -252,5 +374,7 @@ def store_analysis(aid, url, domain, title, lang, pub_time, snippet, text_hash,
         VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
     """, (aid, summary or '', sentiment, float(confidence), int(cost_cents), model_version))
     
+    if simhash is not None:
+        near_dup.index_article(conn, aid, simhash)
     conn.commit()
     conn.close()
\ No newline at end of file
@@ -0,0 +1,35 @@
+import asyncio
+from typing import Awaitable, Callable
+from app.metrics import inc, set_gauge
+
+class SingleFlight:
+    """Coalesce concurrent calls per key: the first caller runs fn, the rest await its result.
+    Errors reach every waiter and the key is dropped, so the next call retries."""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[str, asyncio.Task] = {}
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable]) -> tuple[object, bool]:
+        """Returns (result, shared); shared is True when another caller did the work."""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            inc(f'{self.name}_coalesced_waiters', 1)
+        else:
+            # Own task so a disconnecting leader does not cancel work its waiters need
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            set_gauge(f'{self.name}_inflight_keys', len(self._inflight))
+        return await asyncio.shield(task), shared
+    
+    def inflight(self, key: str) -> bool:
+        return key in self._inflight
+    
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        set_gauge(f'{self.name}_inflight_keys', len(self._inflight))
+        if not task.cancelled() and task.exception() is not None:
+            inc(f'{self.name}_coalesced_failures', 1)
@@ -0,0 +1,88 @@
+import datetime as dt, hashlib, os, re, sqlite3
+from app import db
+from app.metrics import inc
+
+# Sentence-level ES->EN translation memory. Articles are split into sentences, each one
+# is looked up by hash(model version + sentence) in SQLite, and only the misses go to the
+# model, packed into length-sorted batches. Bylines, boilerplate and re-analyses are free.
+DB_PATH = db.DB_PATH
+TRANSLATE_CACHE = os.getenv('TRANSLATE_CACHE', '1') == '1'
+TRANSLATE_BATCH_SIZE = int(os.getenv('TRANSLATE_BATCH_SIZE', '32'))
+# Longer runs without sentence punctuation (lists, tables) are cut so nothing hits the
+# model's 512-token limit and gets silently truncated
+MAX_SENT_WORDS = 80
+_LOOKUP_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translation_cache(
+    key TEXT PRIMARY KEY,       -- sha256(model version | sentence)
+    translation TEXT NOT NULL,
+    create_time TEXT NOT NULL
+);
+"""
+
+# End punctuation (optionally closing quote/bracket), whitespace, then something that can start a sentence
+_SENT_BOUNDARY = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…][»"”’)\]]))\s+(?=[¿¡«"“(\[A-ZÁÉÍÓÚÜÑ0-9])')
+
+def split_sentences(text: str) -> list[str]:
+    out = []
+    for sent in _SENT_BOUNDARY.split(' '.join((text or '').split())):
+        words = sent.split()
+        for i in range(0, len(words), MAX_SENT_WORDS):
+            out.append(' '.join(words[i:i + MAX_SENT_WORDS]))
+    return out
+
+def _key(model_version: str, sentence: str) -> str:
+    return hashlib.sha256(f'{model_version}|{sentence}'.encode('utf-8')).hexdigest()
+
+_schema = db.Schema(SCHEMA)
+
+def _connect() -> sqlite3.Connection:
+    return db.connect(DB_PATH, _schema)
+
+def _get_many(keys: list[str]) -> dict[str, str]:
+    out = {}
+    try:
+        conn = _connect()
+        try:
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                part = keys[i:i + _LOOKUP_CHUNK]
+                q = f'SELECT key, translation FROM translation_cache WHERE key IN ({",".join("?" * len(part))})'
+                out.update(conn.execute(q, part).fetchall())
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        inc('translate_cache_errors', 1)
+    return out
+
+def _put_many(rows: list[tuple[str, str]]) -> None:
+    now = dt.datetime.now(dt.timezone.utc).isoformat()
+    try:
+        conn = _connect()
+        try:
+            conn.executemany('INSERT OR REPLACE INTO translation_cache(key, translation, create_time) VALUES (?, ?, ?)',
+                             [(k, t, now) for k, t in rows])
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        inc('translate_cache_errors', 1)
+
+def translate_sentences(sentences: list[str], generate, model_version: str,
+                        batch_size: int = TRANSLATE_BATCH_SIZE) -> list[str]:
+    """Translate with the sentence cache in front; generate(list[str]) -> list[str] runs the model."""
+    unique = list(dict.fromkeys(s for s in sentences if s))
+    keys = {s: _key(model_version, s) for s in unique}
+    cached = _get_many(list(keys.values())) if TRANSLATE_CACHE and unique else {}
+    done = {s: cached[k] for s, k in keys.items() if k in cached}
+    todo = [s for s in unique if s not in done]
+    inc('translate_sentence_hit', len(done))
+    inc('translate_sentence_miss', len(todo))
+    # Similar lengths per batch keep padding (and wasted beam steps) low
+    todo.sort(key=len)
+    for i in range(0, len(todo), batch_size):
+        batch = todo[i:i + batch_size]
+        done.update(zip(batch, generate(batch)))
+    if TRANSLATE_CACHE and todo:
+        _put_many([(keys[s], done[s]) for s in todo])
+    return [done.get(s, '') for s in sentences]
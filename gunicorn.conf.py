@@ -0,0 +1,40 @@
+# Preload-then-fork deployment: gunicorn -c gunicorn.conf.py app.main:app
+# The master imports the app and loads the models once; uvicorn workers are forked from it
+# and share the weight pages copy-on-write instead of each loading its own copy. (On CPU,
+# from_pretrained leaves fp32 safetensors weights as views of a file mapping, so those pages
+# are clean page cache; keep checkpoints in safetensors and don't cast them at load.)
+# scripts/bench_worker_memory.py compares RSS/PSS per worker against `uvicorn --workers`.
+import gc, os, sys
+
+bind = os.getenv('BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_WORKERS', '2'))
+worker_class = 'uvicorn.workers.UvicornWorker'
+preload_app = True
+timeout = int(os.getenv('WEB_TIMEOUT', '120'))
+forwarded_allow_ips = '*'
+
+# Comma-separated registry names to load in the master; empty = workers load lazily
+PRELOAD_MODELS = [m for m in os.getenv('PRELOAD_MODELS', os.getenv('READY_MODELS', 'sentiment,translator')).split(',') if m]
+# intra-op threads per worker: the cores split between workers so N workers x all-core
+# torch pools don't oversubscribe the box
+CPUS = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+TORCH_THREADS = int(os.getenv('TORCH_THREADS_PER_WORKER', '0')) or max(1, CPUS // workers)
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before any worker is forked
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+    if PRELOAD_MODELS:
+        import torch
+        # One thread while loading: an OpenMP pool started here isn't usable after fork
+        torch.set_num_threads(1)
+        from app.model_registry import preload
+        server.log.info('preloaded models: %s', {k: v['state'] for k, v in preload(PRELOAD_MODELS).items()})
+    # Move everything allocated so far out of the collector's reach; otherwise the first
+    # full collection in each worker writes to (and so un-shares) every object header
+    gc.collect()
+    gc.freeze()
+
+def post_fork(server, worker):
+    os.environ['OMP_NUM_THREADS'] = str(TORCH_THREADS)
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(TORCH_THREADS)
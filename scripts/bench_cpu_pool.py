@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import argparse, asyncio, json, os, time
+from app import executors
+from app.extract import extract
+from scripts.bench_extract import synthetic_pages
+
+OUT_PATH = 'eval/cpu_pool_bench.json'
+
+async def _drive(pages, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+    async def one(html):
+        async with sem:
+            await executors.run_cpu(extract, html, 'https://example.org/a')
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(html) for _, html in pages))
+    return time.perf_counter() - t0
+
+def run(mode: str, workers: int, pages, concurrency: int) -> float:
+    executors.CPU_MODE, executors.CPU_WORKERS = mode, workers
+    executors.warm_cpu_pool()
+    try:
+        secs = asyncio.run(_drive(pages, concurrency))
+    finally:
+        executors.shutdown_cpu_pool()
+    return round(len(pages) / secs, 1)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--pages', type=int, default=400)
+    ap.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    ap.add_argument('--concurrency', type=int, default=64)
+    ap.add_argument('--out', default=OUT_PATH)
+    args = ap.parse_args()
+
+    pages = synthetic_pages(args.pages)
+    results = {'cpu_count': os.cpu_count(), 'pages': len(pages), 'pages_per_s': {}}
+    for mode in ('thread', 'process'):
+        for w in sorted(set(args.workers)):
+            results['pages_per_s'][f'{mode}_{w}'] = run(mode, w, pages, args.concurrency)
+            print(mode, w, results['pages_per_s'][f'{mode}_{w}'])
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
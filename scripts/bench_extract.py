@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import argparse, glob, json, os, statistics, time
+from bs4 import BeautifulSoup
+from readability import Document
+from app.extract import extract
+from app.services import MAX_INPUT_CHARS
+
+PAGES_DIR = 'eval/pages'     # saved *.html from the allowlisted domains
+OUT_PATH = 'eval/extract_bench.json'
+
+def legacy_extract(html: str):
+    # Previous path: bs4 for meta, readability's own parse, bs4 over summary(), bs4 again for pub_time
+    soup = BeautifulSoup(html or '', 'lxml')
+    title = (soup.title.string or '').strip() if soup.title else None
+    desc = None
+    for attr, val in [('property', 'og:description'), ('name', 'description')]:
+        tag = soup.find('meta', {attr: val})
+        if tag and tag.get('content'):
+            desc = tag['content'].strip()
+            break
+    pub = None
+    for attr, val in [('property', 'article:published_time'), ('itemprop', 'datePublished'), ('name', 'pubdate'), ('name', 'date')]:
+        tag = soup.find('meta', {attr: val})
+        if tag and tag.get('content'):
+            pub = tag['content'].strip()
+            break
+    if not pub:
+        t = soup.find('time', attrs={'datetime': True})
+        if t:
+            pub = t['datetime'].strip()
+    doc = Document(html or '')
+    soup = BeautifulSoup(doc.summary(), 'lxml')
+    for tag in soup(['script', 'style', 'iframe', 'noscript']):
+        tag.decompose()
+    text = ' '.join(soup.get_text(separator=' ').split())[:MAX_INPUT_CHARS]
+    if not pub:
+        # the router then called maybe_extract_pub_time, a fourth full parse
+        BeautifulSoup(html or '', 'lxml').find('time', attrs={'datetime': True})
+    return text, {'title': title, 'snippet': desc, 'pub_time': pub}
+
+def synthetic_pages(n: int) -> list[tuple[str, str]]:
+    # Stand-in when no saved corpus is available: nav/aside chrome around a long article body
+    pages = []
+    for i in range(n):
+        paras = ''.join(f'<p>Paragraph {j} of story {i}: officials said rates, growth and prices moved, '
+                        f'with <a href="/x{j}">context</a> and quotes.</p>' for j in range(40 + i % 20))
+        pages.append((f'synthetic_{i}.html', f"""<html><head><title>Story {i}</title>
+            <meta property="og:description" content="Summary {i}"><meta property="article:published_time" content="2025-01-0{1 + i % 9}T10:00:00Z">
+            <script>var x = {i};</script><style>p {{ color: red }}</style></head><body>
+            <nav>{''.join(f'<a href="/s{k}">Section {k}</a>' for k in range(30))}</nav>
+            <article class="article-body">{paras}</article>
+            <aside class="related">{''.join(f'<li><a href="/r{k}">Related {k}</a></li>' for k in range(20))}</aside>
+            <footer>Copyright</footer></body></html>"""))
+    return pages
+
+def load_pages(path: str) -> list[tuple[str, str]]:
+    out = []
+    for fp in sorted(glob.glob(os.path.join(path, '**', '*.htm*'), recursive=True)):
+        with open(fp, 'rb') as f:
+            out.append((os.path.relpath(fp, path), f.read().decode('utf-8', errors='replace')))
+    return out
+
+def cpu_ms(fn, html, repeat):
+    t0 = time.process_time()
+    for _ in range(repeat):
+        out = fn(html)
+    return (time.process_time() - t0) * 1000 / repeat, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--pages', default=PAGES_DIR)
+    ap.add_argument('--synthetic', type=int, default=0, help='use N generated pages instead of --pages')
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--out', default=OUT_PATH)
+    args = ap.parse_args()
+
+    pages = synthetic_pages(args.synthetic) if args.synthetic else load_pages(args.pages)
+    if not pages:
+        raise SystemExit(f'no pages under {args.pages}; save some *.html there or pass --synthetic N')
+
+    old_ms, new_ms, same_text, same_meta = [], [], 0, 0
+    for name, html in pages:
+        o_ms, (o_text, o_meta) = cpu_ms(legacy_extract, html, args.repeat)
+        n_ms, (n_text, n_meta, _) = cpu_ms(extract, html, args.repeat)
+        old_ms.append(o_ms)
+        new_ms.append(n_ms)
+        same_text += o_text == n_text
+        same_meta += o_meta == n_meta
+
+    n = len(pages)
+    results = {
+        'pages': n,
+        'source': 'synthetic' if args.synthetic else args.pages,
+        'legacy_cpu_ms': {'mean': round(statistics.mean(old_ms), 2), 'p50': round(statistics.median(old_ms), 2)},
+        'single_pass_cpu_ms': {'mean': round(statistics.mean(new_ms), 2), 'p50': round(statistics.median(new_ms), 2)},
+        'cpu_reduction': round(1 - sum(new_ms) / max(sum(old_ms), 1e-9), 4),
+        'text_identical': round(same_text / n, 4),
+        'meta_identical': round(same_meta / n, 4),
+    }
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+import argparse, asyncio, json, os, time
+import httpx
+from fastapi import HTTPException
+import app.services as services
+from app import host_policy
+
+OUT_PATH = 'eval/fetch_bench.json'
+URL = 'https://apnews.com/article/bench'
+
+class _Drip(httpx.AsyncByteStream):
+    # Body served in fixed-size chunks, optionally with a delay between them
+    def __init__(self, total: int, chunk: int, delay_s: float = 0.0, head: bytes = b'<html><body>'):
+        self.total, self.chunk, self.delay_s, self.head = total, chunk, delay_s, head
+
+    async def __aiter__(self):
+        yield self.head
+        sent = len(self.head)
+        block = b'x' * self.chunk
+        while sent < self.total:
+            if self.delay_s:
+                await asyncio.sleep(self.delay_s)
+            n = min(self.chunk, self.total - sent)
+            yield block[:n]
+            sent += n
+
+CASES = {
+    # name: (content-type, stream factory)
+    'normal_200kb': ('text/html; charset=utf-8', lambda: _Drip(200_000, 16_384)),
+    'tiny_chunks_2mb': ('text/html', lambda: _Drip(2_000_000, 64)),
+    'huge_50mb': ('text/html', lambda: _Drip(50_000_000, 65_536)),
+    'slow_drip': ('text/html', lambda: _Drip(10_000_000, 1024, delay_s=0.01)),
+    'pdf_as_html': ('text/html', lambda: _Drip(20_000_000, 65_536, head=b'%PDF-1.7\n')),
+    'binary_type': ('application/octet-stream', lambda: _Drip(20_000_000, 65_536)),
+}
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == '/robots.txt':
+        return httpx.Response(200, text='User-agent: *\nAllow: /\n')
+    ctype, stream = CASES[request.url.params['case']]
+    return httpx.Response(200, headers={'content-type': ctype}, stream=stream())
+
+async def _old_style(case: str) -> int:
+    # The previous approach: bytes += chunk, no cap, no deadline
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+        async with client.stream('GET', f'{URL}?case={case}') as resp:
+            if 'text/html' not in resp.headers.get('content-type', ''):
+                return 'unsupported_media_type'
+            content = b''
+            async for chunk in resp.aiter_raw():
+                content += chunk
+            return len(content)
+
+async def _new_style(case: str, timeout_s: float) -> str:
+    loop = asyncio.get_running_loop()
+    services._http[loop] = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    try:
+        html = await services.fetch_url_async(f'{URL}?case={case}', timeout_s=timeout_s)
+        return f'ok:{len(html)}'
+    except HTTPException as e:
+        return f'{e.status_code}:{e.detail}'
+    finally:
+        await services.close_http_client()
+
+def _timed(coro_fn, budget_s: float):
+    t0 = time.perf_counter()
+    try:
+        out = asyncio.run(asyncio.wait_for(coro_fn(), budget_s))
+    except TimeoutError:
+        out = 'gave_up'
+    return out, round((time.perf_counter() - t0) * 1000, 1)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--timeout_s', type=float, default=2.0)
+    ap.add_argument('--old_budget_s', type=float, default=30.0, help='stop waiting on the old fetcher after this')
+    ap.add_argument('--skip_old', action='store_true')
+    ap.add_argument('--out', default=OUT_PATH)
+    args = ap.parse_args()
+
+    host_policy.ROBOTS.clear()
+    results = {'max_bytes': services.FETCH_MAX_BYTES, 'timeout_s': args.timeout_s, 'cases': {}}
+    for case in CASES:
+        new_out, new_ms = _timed(lambda: _new_style(case, args.timeout_s), args.timeout_s + 5)
+        row = {'new': {'result': new_out, 'ms': new_ms}}
+        if not args.skip_old:
+            old_out, old_ms = _timed(lambda: _old_style(case), args.old_budget_s)
+            row['old'] = {'result': old_out if isinstance(old_out, str) else f'ok:{old_out}', 'ms': old_ms}
+        results['cases'][case] = row
+        print(case, json.dumps(row))
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
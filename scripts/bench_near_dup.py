@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+import argparse, json, os, random, sqlite3, statistics, tempfile, time
+from app import near_dup
+
+OUT_PATH = 'eval/near_dup_bench.json'
+
+def build(path, n, seed):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript('PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;')
+    conn.executescript(near_dup.SCHEMA)
+    hashes = []
+    chunk = 50_000
+    for lo in range(0, n, chunk):
+        rows = []
+        for i in range(lo, min(n, lo + chunk)):
+            h = rng.getrandbits(64)
+            hashes.append(h)
+            rows.append((f'a{i}', near_dup._signed(h), *near_dup.bands(h), None))
+        conn.executemany('INSERT INTO article_simhash VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    return conn, hashes
+
+def flip(rng, h, bits):
+    for b in rng.sample(range(64), bits):
+        h ^= 1 << b
+    return h
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--n', type=int, default=1_000_000)
+    ap.add_argument('--queries', type=int, default=2000)
+    ap.add_argument('--db', default=None, help='sqlite path (default: temp file)')
+    ap.add_argument('--seed', type=int, default=7)
+    ap.add_argument('--out', default=OUT_PATH)
+    args = ap.parse_args()
+    
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'near_dup_bench.db')
+    t0 = time.perf_counter()
+    conn, hashes = build(path, args.n, args.seed)
+    build_s = time.perf_counter() - t0
+    
+    # Half the queries are near-dups of indexed rows (1..max bits flipped), half are fresh
+    rng = random.Random(args.seed + 1)
+    lat, found, expected = [], 0, 0
+    for q in range(args.queries):
+        if q % 2 == 0:
+            h = flip(rng, rng.choice(hashes), rng.randint(1, near_dup.NEAR_DUP_MAX_BITS))
+            expected += 1
+        else:
+            h = rng.getrandbits(64)
+        t = time.perf_counter()
+        hit = near_dup.find_near_dup(conn, h)
+        lat.append((time.perf_counter() - t) * 1000)
+        found += hit is not None and q % 2 == 0
+    conn.close()
+    
+    lat.sort()
+    results = {
+        'indexed': args.n,
+        'queries': args.queries,
+        'max_bits': near_dup.NEAR_DUP_MAX_BITS,
+        'build_s': round(build_s, 2),
+        'lookup_ms': {
+            'p50': round(lat[len(lat) // 2], 3),
+            'p95': round(lat[int(len(lat) * 0.95)], 3),
+            'p99': round(lat[int(len(lat) * 0.99)], 3),
+            'mean': round(statistics.mean(lat), 3),
+        },
+        'near_dup_recall': round(found / max(expected, 1), 4),
+    }
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+import argparse, json, os, time
+from scripts.sentiment_infer import predict_label, predict_batch
+
+DATASET = 'models/sentiment/dataset.jsonl'
+OUT_PATH = 'eval/sentiment_bench.json'
+
+def load_texts(path, max_items=None):
+    texts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            r = json.loads(line)
+            if r.get('text'):
+                texts.append(r['text'])
+            if max_items and len(texts) >= max_items:
+                break
+    return texts
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--data', default=DATASET)
+    ap.add_argument('--out', default=OUT_PATH)
+    ap.add_argument('--max_items', type=int, default=None)
+    ap.add_argument('--bucket_size', type=int, default=16)
+    args = ap.parse_args()
+    
+    texts = load_texts(args.data, args.max_items)
+    predict_batch(texts[:4])  # warm weights + kernels
+    
+    single, t_single = timed(lambda: [predict_label(t) for t in texts])
+    # One bucket == the old behaviour of padding every row to the longest text
+    _, t_padded = timed(lambda: predict_batch(texts, bucket_size=len(texts)))
+    bucketed, t_bucketed = timed(lambda: predict_batch(texts, bucket_size=args.bucket_size))
+    
+    n = len(texts)
+    agree = sum(a[0] == b[0] for a, b in zip(single, bucketed)) / max(n, 1)
+    max_conf_delta = max((abs(a[1] - b[1]) for a, b in zip(single, bucketed)), default=0.0)
+    results = {
+        'items': n,
+        'bucket_size': args.bucket_size,
+        'single': {'seconds': round(t_single, 3), 'items_per_s': round(n / t_single, 2)},
+        'batch_one_pad': {'seconds': round(t_padded, 3), 'items_per_s': round(n / t_padded, 2)},
+        'batch_bucketed': {'seconds': round(t_bucketed, 3), 'items_per_s': round(n / t_bucketed, 2)},
+        'label_agreement': round(agree, 4),
+        'max_conf_delta': round(max_conf_delta, 6),
+    }
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import argparse, json, os, socket, statistics, subprocess, sys, time
+import httpx
+
+OUT_PATH = 'eval/startup_bench.json'
+HEAVY = ('torch', 'transformers', 'onnxruntime', 'ctranslate2')
+
+_IMPORT_PROBE = f"""
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+print(json.dumps({{'ms': (time.perf_counter() - t0) * 1000, 'heavy': [m for m in {HEAVY!r} if m in sys.modules]}}))
+"""
+
+def import_time(runs: int) -> dict:
+    # Fresh interpreter each run so nothing is already in sys.modules
+    ms, heavy = [], set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', _IMPORT_PROBE], capture_output=True, text=True, check=True)
+        row = json.loads(out.stdout.strip().splitlines()[-1])
+        ms.append(row['ms'])
+        heavy.update(row['heavy'])
+    return {'p50_ms': round(statistics.median(ms), 1), 'max_ms': round(max(ms), 1), 'heavy_modules': sorted(heavy)}
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _wait_for(url: str, deadline: float, want_status: int = 200):
+    while time.monotonic() < deadline:
+        try:
+            r = httpx.get(url, timeout=1.0)
+            if r.status_code == want_status:
+                return r
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    return None
+
+def server_startup(ready_timeout_s: float) -> dict:
+    port = _free_port()
+    t0 = time.monotonic()
+    cmd = [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port), '--log-level', 'warning']
+    proc = subprocess.Popen(cmd, env=dict(os.environ, MODEL_WARMUP='1'),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f'http://127.0.0.1:{port}'
+        health = _wait_for(base + '/health', t0 + 60)
+        accept_ms = round((time.monotonic() - t0) * 1000, 1) if health else None
+        ready = _wait_for(base + '/ready', t0 + ready_timeout_s)
+        ready_ms = round((time.monotonic() - t0) * 1000, 1) if ready else None
+        models = httpx.get(base + '/ready', timeout=2.0).json()['models'] if health else None
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return {'accepting_ms': accept_ms, 'ready_ms': ready_ms, 'models': models}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--runs', type=int, default=5)
+    ap.add_argument('--ready_timeout_s', type=float, default=300)
+    ap.add_argument('--skip_server', action='store_true')
+    ap.add_argument('--max_import_ms', type=float, default=None, help='exit 1 if import p50 exceeds this')
+    ap.add_argument('--max_accept_ms', type=float, default=None, help='exit 1 if the server takes longer to accept')
+    ap.add_argument('--out', default=OUT_PATH)
+    args = ap.parse_args()
+
+    results = {'import': import_time(args.runs)}
+    if not args.skip_server:
+        results['server'] = server_startup(args.ready_timeout_s)
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    failures = []
+    if results['import']['heavy_modules']:
+        failures.append(f"app.main imports {results['import']['heavy_modules']} eagerly")
+    if args.max_import_ms and results['import']['p50_ms'] > args.max_import_ms:
+        failures.append(f"import p50 {results['import']['p50_ms']}ms > {args.max_import_ms}ms")
+    accept = results.get('server', {}).get('accepting_ms')
+    if args.max_accept_ms and (accept is None or accept > args.max_accept_ms):
+        failures.append(f'accepting after {accept}ms > {args.max_accept_ms}ms')
+    if failures:
+        print('REGRESSION:', '; '.join(failures))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+import argparse, json, os, statistics, tempfile, time
+from collections import Counter
+import pyarrow.parquet as pq
+import torch
+from app import translation_cache
+import scripts.translate_es_to_en as tr
+
+ARTICLES_PATH = 'eval/ingest_articles.parquet'
+OUT_PATH = 'eval/translate_bench.json'
+
+def chrf(hyp: str, ref: str, n: int = 6, beta: float = 2.0) -> float:
+    # chrF (character n-grams up to 6, recall weighted x2), whitespace removed as in sacrebleu
+    hyp, ref = ''.join(hyp.split()), ''.join(ref.split())
+    p_sum = r_sum = 0.0
+    orders = 0
+    for k in range(1, n + 1):
+        h = Counter(hyp[i:i + k] for i in range(len(hyp) - k + 1))
+        r = Counter(ref[i:i + k] for i in range(len(ref) - k + 1))
+        if not h or not r:
+            continue
+        match = sum((h & r).values())
+        p_sum += match / sum(h.values())
+        r_sum += match / sum(r.values())
+        orders += 1
+    if not orders:
+        return 0.0
+    p, r = p_sum / orders, r_sum / orders
+    return 100 * (1 + beta ** 2) * p * r / (beta ** 2 * p + r) if p + r else 0.0
+
+def legacy_translate(text: str) -> str:
+    # Previous path: whole text in one 4-beam generate, truncated at 512 tokens, 128 new tokens
+    tr._load_tokenizer()
+    model = tr._model_for('torch')
+    enc = tr.tokenizer([' '.join(text.split())], return_tensors='pt', truncation=True, max_length=512)
+    with torch.inference_mode():
+        out = model.generate(**enc, max_new_tokens=128, num_beams=4, use_cache=True)
+    return tr.tokenizer.decode(out[0], skip_special_tokens=True)
+
+def load_texts(path: str | None, limit: int) -> list[str]:
+    if path:
+        with open(path) as f:
+            rows = [json.loads(l) for l in f if l.strip()]
+        return [r['text'] for r in rows if r.get('text')][:limit]
+    rows = pq.read_table(ARTICLES_PATH, columns=['lang', 'snippet']).to_pylist()
+    return [r['snippet'] for r in rows if r['lang'] == 'es' and r['snippet']][:limit]
+
+def timed(fn, texts):
+    out, ms = [], []
+    for t in texts:
+        t0 = time.perf_counter()
+        out.append(fn(t))
+        ms.append((time.perf_counter() - t0) * 1000)
+    return out, {'mean': round(statistics.mean(ms), 1), 'p95': round(sorted(ms)[int(0.95 * (len(ms) - 1))], 1)}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--texts', default=None, help='jsonl with a "text" field; default: ES snippets from ingest')
+    ap.add_argument('--limit', type=int, default=50)
+    ap.add_argument('--beams', type=int, nargs='+', default=[4, 2, 1])
+    ap.add_argument('--out', default=OUT_PATH)
+    args = ap.parse_args()
+
+    texts = load_texts(args.texts, args.limit)
+    translation_cache.DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    results = {'texts': len(texts), 'configs': {}}
+
+    legacy, lat = timed(legacy_translate, texts)
+    results['configs']['legacy_whole_text_b4'] = {'latency_ms': lat, 'out_chars': sum(map(len, legacy))}
+
+    ref = None
+    for beams in sorted(args.beams, reverse=True):
+        fn = lambda t: tr.translate_es_to_en(t, num_beams=beams)
+        translation_cache.TRANSLATE_CACHE = False
+        out, cold = timed(fn, texts)
+        translation_cache.TRANSLATE_CACHE = True
+        timed(fn, texts)                    # fill the cache
+        _, warm = timed(fn, texts)
+        ref = ref or out                    # widest beam is the quality reference
+        results['configs'][f'sentences_b{beams}'] = {
+            'latency_ms': cold, 'cached_latency_ms': warm, 'out_chars': sum(map(len, out)),
+            'chrf_vs_widest_beam': round(statistics.mean(chrf(h, r) for h, r in zip(out, ref)), 2),
+        }
+        print(beams, json.dumps(results['configs'][f'sentences_b{beams}']))
+    results['configs']['legacy_whole_text_b4']['chrf_vs_widest_beam'] = round(
+        statistics.mean(chrf(h, r) for h, r in zip(legacy, ref)), 2)
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
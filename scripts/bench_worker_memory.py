@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+import argparse, json, os, subprocess, sys, time
+import httpx
+from scripts.bench_startup import _free_port
+
+OUT_PATH = 'eval/worker_memory.json'
+
+# Current layout: every uvicorn worker is a fresh interpreter that loads its own models.
+# Preload layout: gunicorn.conf.py loads them once in the master and forks the workers.
+LAYOUTS = {
+    'uvicorn_workers': lambda port, n: [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port),
+                                        '--workers', str(n), '--log-level', 'warning'],
+    'gunicorn_preload': lambda port, n: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app.main:app',
+                                         '--bind', f'127.0.0.1:{port}', '--workers', str(n), '--log-level', 'warning'],
+}
+
+def _smaps(pid: int) -> dict:
+    # kB fields of /proc/<pid>/smaps_rollup -> MB. PSS splits every shared page between
+    # the processes mapping it, so summed PSS is what the workers really cost together.
+    out = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            parts = rest.split()
+            if key in ('Rss', 'Pss', 'Anonymous', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'):
+                out[key.lower() + '_mb'] = round(int(parts[0]) / 1024, 1)
+    return out
+
+def _children(pid: int) -> list[int]:
+    kids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == pid:
+            kids.append(int(entry))
+    return sorted(kids)
+
+def _cmdline(pid: int) -> str:
+    with open(f'/proc/{pid}/cmdline', 'rb') as f:
+        return f.read().replace(b'\0', b' ').decode(errors='replace').strip()
+
+def _wait_ready(base: str, workers: int, deadline: float) -> bool:
+    # /ready is answered by whichever worker accepts; several 200s in a row make it very
+    # likely that every worker has its models
+    streak = 0
+    while time.monotonic() < deadline:
+        try:
+            streak = streak + 1 if httpx.get(base + '/ready', timeout=2.0).status_code == 200 else 0
+        except httpx.HTTPError:
+            streak = 0
+        if streak >= 4 * workers:
+            return True
+        time.sleep(0.1)
+    return False
+
+def measure(layout: str, workers: int, ready_timeout_s: float, settle_s: float) -> dict:
+    port = _free_port()
+    t0 = time.monotonic()
+    proc = subprocess.Popen(LAYOUTS[layout](port, workers), env=dict(os.environ, MODEL_WARMUP='1'),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ready = _wait_ready(f'http://127.0.0.1:{port}', workers, t0 + ready_timeout_s)
+        ready_ms = round((time.monotonic() - t0) * 1000, 1) if ready else None
+        time.sleep(settle_s)
+        procs = {'master': _smaps(proc.pid)}
+        # multiprocessing's resource tracker is a child too but not a worker
+        kids = [p for p in _children(proc.pid) if 'resource_tracker' not in _cmdline(p)]
+        per_worker = [dict(pid=p, **_smaps(p)) for p in kids]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    total = lambda key: round(sum(w[key] for w in per_worker) + procs['master'][key], 1)
+    return {
+        'ready_ms': ready_ms,
+        'master': procs['master'],
+        'workers': per_worker,
+        'total_rss_mb': total('rss_mb'),
+        'total_pss_mb': total('pss_mb'),
+        'pss_per_worker_mb': round(sum(w['pss_mb'] for w in per_worker) / max(len(per_worker), 1), 1),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--workers', type=int, default=2)
+    ap.add_argument('--layouts', nargs='+', default=list(LAYOUTS), choices=list(LAYOUTS))
+    ap.add_argument('--ready_timeout_s', type=float, default=600)
+    ap.add_argument('--settle_s', type=float, default=5)
+    ap.add_argument('--out', default=OUT_PATH)
+    args = ap.parse_args()
+
+    results = {'workers': args.workers, 'layouts': {}}
+    for layout in args.layouts:
+        results['layouts'][layout] = measure(layout, args.workers, args.ready_timeout_s, args.settle_s)
+        r = results['layouts'][layout]
+        print(layout, json.dumps({k: r[k] for k in ('ready_ms', 'total_rss_mb', 'total_pss_mb', 'pss_per_worker_mb')}))
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+import argparse, glob, json, os, statistics, time
+from collections import defaultdict
+from app.extract import parse_html, extract_body, extract_text
+from app.extractors import RULES, rule_for
+from app.host_policy import ALLOWLIST
+
+PAGES_DIR = 'eval/pages'     # saved pages laid out as <domain>/*.html
+OUT_PATH = 'eval/extractor_report.json'
+
+def _ms(fn, *a):
+    t0 = time.perf_counter()
+    out = fn(*a)
+    return out, (time.perf_counter() - t0) * 1000
+
+def _stats(vals):
+    if not vals:
+        return None
+    return {'mean': round(statistics.mean(vals), 2), 'p50': round(statistics.median(vals), 2)}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--pages', default=PAGES_DIR)
+    ap.add_argument('--out', default=OUT_PATH)
+    args = ap.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.pages, '*', '*.htm*')))
+    if not files:
+        raise SystemExit(f'no pages under {args.pages}; save them as <domain>/<name>.html')
+
+    per = defaultdict(lambda: {'pages': 0, 'rule': 0, 'fallback': 0, 'generic': 0, 'ms': [], 'readability_ms': []})
+    for fp in files:
+        domain = os.path.basename(os.path.dirname(fp))
+        with open(fp, 'rb') as f:
+            html = f.read().decode('utf-8', errors='replace')
+        url = f'https://{domain}/'
+        row = per[domain]
+        tree = parse_html(html)
+        if tree is None:
+            continue
+        (_, source), ms = _ms(extract_body, tree, url)
+        row['pages'] += 1
+        row[source] += 1
+        row['ms'].append(ms)
+        # readability alone on the same page, for comparison
+        row['readability_ms'].append(_ms(extract_text, parse_html(html))[1])
+
+    domains = {}
+    for domain, row in sorted(per.items()):
+        n = max(row['pages'], 1)
+        domains[domain] = {
+            'has_rule': rule_for(f'https://{domain}/') is not None,
+            'pages': row['pages'],
+            'rule_coverage': round(row['rule'] / n, 4),
+            'fallback': row['fallback'],
+            'extract_ms': _stats(row['ms']),
+            'readability_ms': _stats(row['readability_ms']),
+        }
+    total = sum(r['pages'] for r in per.values()) or 1
+    report = {
+        'pages': total,
+        'rule_coverage': round(sum(r['rule'] for r in per.values()) / total, 4),
+        'allowlisted_without_rule': sorted(d for d in ALLOWLIST.domains if d not in RULES),
+        'domains': domains,
+    }
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,22 @@
 #!/usr/bin/env python3
-import os, re, time, hashlib, json, sqlite3, uuid
-from urllib.parse import urlparse, parse_qs, unquote
+import os, sqlite3, uuid
+from urllib.parse import urlparse
 from urllib3.util.retry import Retry
-from urllib.robotparser import RobotFileParser
 import requests
 from requests.adapters import HTTPAdapter
 from collections import defaultdict
 from bs4 import BeautifulSoup
-from readability import Document
 import datetime as dt
-from langdetect import detect, LangDetectException
+from concurrent.futures import wait, FIRST_COMPLETED
+from app.fingerprint import content_fingerprint
+from app import near_dup, canonical, host_policy
+from app.extract import parse_html, extract_body
+from app.cpu_tasks import detect_lang, ingest_chunk
+from app.executors import CPU_WORKERS, cpu_pool, warm_cpu_pool, shutdown_cpu_pool
 
 DB_PATH = os.getenv('DB_PATH', 'data/app.db')
 RSS_PATH = 'config/rss_feeds.txt'
 USER_AGENT = 'NewsSumSentimentBot/0.1 (+contact: halamo24@gmail.com)'
-ALLOWLIST_PATH = 'config/allowlist.txt'
 
 TIMEOUT = 8
 RETRIES = 3
@@ -23,48 +25,19 @@ STATUS_RETRY = [429, 500, 502, 503, 504]
 
 fail_by_domain = defaultdict(int)
 FAIL_LIMIT = 3
+# Fetched pages are cleaned/lang-ID'd in chunks on the CPU pool (CPU_MODE=process for multi-core)
+INGEST_CHUNK = int(os.getenv('INGEST_CHUNK', '16'))
 
-def load_allowlist(path=ALLOWLIST_PATH):
-    if not os.path.exists(path):
-        return set()
-    out: set[str] = set()
-    with open(path) as f:
-        for line in f:
-            s = line.strip()
-            if not s or s.startswith('#'):
-                continue
-            out.add(s.lower().rstrip('.'))
-    return out
-    
-ALLOWLIST = load_allowlist()
-
-AGGREGATORS = {'news.google.com'}
-
-def _normalize_host(host: str) -> str:
-    host = (host or '').lower().rstrip('.')
-    if ':' in host:
-        host = host.split(':', 1)[0]
-    return host
-
-# If Google News, try to extract the real publisher URL
-# from the 'url' query param; 
-# else return original.
+# Unwrap Google News / AMP-cache links and apply the shared canonical rules
+# plus learned rel=canonical / redirect mappings.
 def de_aggregate_url(u: str) -> str:
     try:
-        p = urlparse(u)
+        return canonical.resolve_url(u)
     except Exception:
         return u
-    host = _normalize_host(p.netloc)
-    if host in AGGREGATORS:
-        qs = parse_qs(p.query)
-        vals = qs.get('url')
-        if vals and vals[0]:
-            target = vals[0]
-            return unquote(unquote(target))
-    return u
 
 def is_allowed_domain(domain: str) -> bool:
-    return any(domain == d or domain.endswith('.' + d) for d in ALLOWLIST)
+    return host_policy.domain_allowed(domain)
 
 def make_session():
     s =requests.Session()
@@ -91,60 +64,28 @@ def make_session():
 
 SESSION = make_session()
 
-ROBOTS_CACHE = {}
 def robots_allows(url: str) -> bool:
-    p = urlparse(url)
-    base = f'{p.scheme}://{p.netloc}'
-    robots_url = base + '/robots.txt'
-    rp = ROBOTS_CACHE.get(base)
-    if rp is None:
-        rp = RobotFileParser()
-        rp.set_url(robots_url)
-        try:
-            rp.read()
-        except Exception:
-            ROBOTS_CACHE[base] = rp
-            return True
-        ROBOTS_CACHE[base] = rp
-    return rp.can_fetch(USER_AGENT, url)
-
-def clean_html_to_text(html: str) -> str:
-    doc = Document(html)
-    article_html = doc.summary()
-    soup = BeautifulSoup(article_html, 'lxml')
-    for tag in soup(['script','style','iframe','noscript']):
-        tag.decompose()
-    for el in soup(True):
-        for attr in list(el.attrs.keys()):
-            if attr.lower().startswith('on'):
-                del el.attrs[attr]
-    text = soup.get_text(separator=' ')
-    text = ' '.join(text.split())
-    return text
+    # Shared TTL'd robots cache (same one the API uses), fetched through our session
+    return host_policy.ROBOTS.allowed(url, USER_AGENT, SESSION)
+
+def clean_html_to_text(html: str, url: str | None = None) -> str:
+    # Same single-parse engine and per-site rules as the API
+    tree = parse_html(html)
+    return extract_body(tree, url)[0] if tree is not None else ''
 
 def get_lang(text: str, default='en') -> str:
-    try:
-        code = detect(text)
-        if code.startswith('es'):
-            return 'es'
-        if code.startswith('en'):
-            return 'en'
-        return default
-    except LangDetectException:
-        return default
+    return detect_lang(text, default)
 
 def text_hash(text: str) -> str:
-    s = (text or '')
-    s = s.lower()
-    s = ' '.join(s.split())
-    s = re.sub(r'[^\w\s]', '', s)
-    return hashlib.sha256(s.encode('utf-8')).hexdigest()       # CS50: sha256(norm).hexdigest()
+    # Same fingerprint the API uses, so ingested articles and API analyses line up
+    return content_fingerprint(text)
 
 def ensure_db():
     os.makedirs('data', exist_ok=True)
     conn = sqlite3.connect(DB_PATH)
     with open('data/schema.sql','r') as f:
         conn.executescript(f.read())
+    near_dup.ensure_schema(conn)
     conn.close()
 
 def upsert_article(conn, row):
@@ -153,15 +94,17 @@ def upsert_article(conn, row):
       VALUES(:id,:url,:domain,:title,:lang,:pub_time,:snippet,:text_hash,:create_time)
     """, row)
 
-def fetch_article(url):
+def fetch_html(url):
+    # (html, final url, status); cleaning happens on the CPU pool
     if not robots_allows(url):
-        return None, 'blocked_by_robots'
+        return None, url, 'blocked_by_robots'
+    host_policy.ROBOTS.wait_turn(url, USER_AGENT)
     r = SESSION.get(url, headers={'User-Agent': USER_AGENT}, timeout=TIMEOUT)
     if r.status_code != 200:
-        return None, f'http_{r.status_code}'
-    html = r.text
-    text = clean_html_to_text(html)
-    return text, 'ok'
+        return None, url, f'http_{r.status_code}'
+    if r.url != url:
+        canonical.remember(url, r.url, 'redirect')
+    return r.text, r.url, 'ok'
 
 def process_rss_feed(feed_url):
     try:
@@ -189,12 +132,70 @@ def process_rss_feed(feed_url):
     except Exception:
         return []
 
+def store_article(conn, item, page):
+    url, title, pubdate, domain = item
+    if page is None:
+        fail_by_domain[domain] += 1
+        return
+    if page['canonical']:
+        canonical.remember(url, page['canonical'], 'rel')
+    lang = page['lang']
+    if lang not in ('en','es'):
+        return
+    sh = page['simhash']
+    dup = near_dup.find_near_dup(conn, sh)
+    row = {
+        'id': str(uuid.uuid4()),
+        'url': url,
+        'domain': domain,
+        'title': title[:300] if title else None,
+        'lang': lang,
+        'pub_time': pubdate,
+        'snippet': page['text'][:600],
+        'text_hash': page['text_hash'],
+        'create_time': dt.datetime.now(dt.timezone.utc).isoformat()
+    }
+    upsert_article(conn, row)
+    # Syndicated copies point at the first article; the API reuses its analysis
+    near_dup.index_article(conn, row['id'], sh, dup[0] if dup else None)
+    conn.commit()
+    print('OK:' if not dup else f'OK (near-dup of {dup[0]}, {dup[1]} bits):', domain, lang, title[:60])
+
 def main():
     ensure_db()
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     with open(RSS_PATH) as f:
         feeds = [l.strip() for l in f if l.strip() and not l.startswith('#')]
+    warm_cpu_pool()
+    pool = cpu_pool()
+    chunk, inflight = [], {}
+
+    def collect(block: bool):
+        # Store finished chunks; with block, wait for at least one (keeps inflight bounded)
+        done, _ = wait(inflight, return_when=FIRST_COMPLETED) if block else ([f for f in inflight if f.done()], None)
+        for fut in done:
+            items = inflight.pop(fut)
+            try:
+                pages = fut.result()
+            except Exception as e:
+                print('ERR: chunk', e)
+                continue
+            for item, page in zip(items, pages):
+                try:
+                    store_article(conn, item, page)
+                except Exception as e:
+                    print('ERR:', item[0], e)
+
+    def submit():
+        nonlocal chunk
+        if not chunk:
+            return
+        if len(inflight) >= CPU_WORKERS * 2:
+            collect(block=True)
+        inflight[pool.submit(ingest_chunk, [(html, u) for _, html, u in chunk])] = [it for it, _, _ in chunk]
+        chunk = []
+
     for feed in feeds:
         for url, title, pubdate in process_rss_feed(feed):
             if not url:
@@ -207,30 +208,20 @@ def main():
                 print('SKIP domain (too many fails):', domain)
                 continue
             try:
-                text, status = fetch_article(url)
-                if status != 'ok' or not text:
+                html, final_url, status = fetch_html(url)
+                if status != 'ok' or not html:
                     fail_by_domain[domain] += 1
                     continue
-                lang = get_lang(text)
-                if lang not in ('en','es'):
-                    continue
-                h = text_hash(text)
-                row = {
-                    'id': str(uuid.uuid4()),
-                    'url': url,
-                    'domain': domain,
-                    'title': title[:300] if title else None,
-                    'lang': lang,
-                    'pub_time': pubdate,
-                    'snippet': text[:600],
-                    'text_hash': h,
-                    'create_time': dt.datetime.now(dt.timezone.utc).isoformat()
-                }
-                upsert_article(conn, row)
-                conn.commit()
-                print('OK:', domain, lang, title[:60])
+                chunk.append(((url, title, pubdate, domain), html, final_url))
+                if len(chunk) >= INGEST_CHUNK:
+                    submit()
+                collect(block=False)
             except Exception as e:
                 print('ERR:', url, e)
+    submit()
+    while inflight:
+        collect(block=True)
+    shutdown_cpu_pool()
     conn.close()
 
 if __name__ == '__main__':
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
-import os, torch, json
+import os, torch, json, queue, threading, time
+from concurrent.futures import Future
+from functools import partial
 from typing import List, Tuple
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
+from app.metrics import inc, observe, observe_ms, set_gauge
+from app.model_registry import get_model
+from scripts.sentiment_version import BACKENDS, BACKEND, model_version
 CKPT_REPO = 'hugger2484/distilbert-mc-sent-v4'
-mv = 'distilbert-mc@sent_v4'
 MAX_LEN = 256
 CFG = json.load(open('eval/sentiment_build_config.json'))
 
@@ -11,10 +15,23 @@ UNCERTAIN_MAXP = 0.55
 VADER_POS = CFG['vader_pos_thr']
 VADER_NEG = CFG['vader_neg_thr']
 
+TAU = 0.40
+DELTA = 0.07
+NEU_FLOOR = 0.35
+
+# Dynamic batching: collect up to BATCH_MAX texts or BATCH_WAIT_MS per forward pass
+BATCH_MAX = int(os.getenv('SENT_BATCH_MAX', '16'))
+BATCH_WAIT_MS = float(os.getenv('SENT_BATCH_WAIT_MS', '5'))
+BUCKET_SIZE = int(os.getenv('SENT_BUCKET_SIZE', '16'))
+
+ONNX_DIR = os.getenv('SENT_ONNX_DIR', 'ckpts/distilbert-mc_sent_v4-onnx')
+ONNX_THREADS = int(os.getenv('SENT_ONNX_THREADS', '0'))
+
 _device = 'cuda' if torch.cuda.is_available() else 'cpu'
 _hf_token = os.getenv('HUGGINGFACE_HUB_TOKEN')
+# Weights (torch model / ORT sessions) live in app.model_registry; only small objects here
 _tokenizer = None
-_model = None
+_config = None
 ID2LABEL = {0: "negative", 1: "neutral", 2: "positive"}
 
 def _coerce_to_text(x) -> str:
@@ -30,55 +47,237 @@ def _coerce_to_text(x) -> str:
 def _normalize(text: str) -> str:
     return ' '.join((text or '').split())
 
-def _load_once():
-    global _tokenizer, _model
+def _load_tokenizer():
+    global _tokenizer
     if _tokenizer is None:
         _tokenizer = AutoTokenizer.from_pretrained(CKPT_REPO, token=_hf_token)
-    if _model is None:
-        _model = AutoModelForSequenceClassification.from_pretrained(CKPT_REPO, token=_hf_token).to(_device).eval()
-    return _tokenizer, _model
+    return _tokenizer
+
+def _build(backend: str):
+    if backend == 'torch':
+        return AutoModelForSequenceClassification.from_pretrained(CKPT_REPO, token=_hf_token).to(_device).eval()
+    if backend not in BACKENDS:
+        raise ValueError(f'unknown sentiment backend: {backend}')
+    return _build_session(quantize=backend == 'onnx-int8')
+
+def load_model():
+    """Registry loader for 'sentiment': the configured backend (SENT_BACKEND)."""
+    _load_tokenizer()
+    return _build(BACKEND)
+
+def _model_for(backend: str):
+    # Other backends (parity runs) get their own registry entries
+    if backend == BACKEND:
+        return get_model('sentiment')
+    return get_model(f'sentiment:{backend}', partial(_build, backend))
+
+def _load_once():
+    return _load_tokenizer(), _model_for('torch')
+
+def _id2label(model) -> dict:
+    return model.config.id2label if hasattr(model.config, 'id2label') else ID2LABEL
+
+def _labels(backend: str) -> dict:
+    global _config
+    if backend == 'torch':
+        return _id2label(_load_once()[1])
+    if _config is None:
+        _config = AutoConfig.from_pretrained(CKPT_REPO, token=_hf_token)
+    return getattr(_config, 'id2label', None) or ID2LABEL
+
+def _onnx_path(out_dir: str, quantize: bool) -> str:
+    return os.path.join(out_dir, 'model.int8.onnx' if quantize else 'model.onnx')
+
+class _LogitsOnly(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+    
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+def export_onnx(out_dir: str = ONNX_DIR, quantize: bool = False) -> str:
+    """Export the checkpoint to ONNX (and optionally int8-quantize it); returns the model path."""
+    fp32 = _onnx_path(out_dir, False)
+    if not os.path.exists(fp32):
+        tokenizer, model = _load_once()
+        os.makedirs(out_dir, exist_ok=True)
+        sample = tokenizer(['Warmup text about markets.'], return_tensors='pt')
+        with torch.inference_mode():
+            torch.onnx.export(
+                _LogitsOnly(model).eval(),
+                (sample['input_ids'].to(_device), sample['attention_mask'].to(_device)),
+                fp32,
+                input_names=['input_ids', 'attention_mask'],
+                output_names=['logits'],
+                dynamic_axes={'input_ids': {0: 'batch', 1: 'seq'}, 'attention_mask': {0: 'batch', 1: 'seq'}, 'logits': {0: 'batch'}},
+                opset_version=17,
+                dynamo=False,
+            )
+    if not quantize:
+        return fp32
+    int8 = _onnx_path(out_dir, True)
+    if not os.path.exists(int8):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32, int8, weight_type=QuantType.QInt8)
+    return int8
+
+def _build_session(quantize: bool):
+    import onnxruntime as ort
+    path = _onnx_path(ONNX_DIR, quantize)
+    if not os.path.exists(path):
+        # Exported at image build (Dockerfile.api), never from a request: the checkpoint dir
+        # is read-only at runtime and the export would pin a second (torch) copy in memory
+        raise FileNotFoundError(f'{path} missing; build it with export_onnx() (see Dockerfile.api)')
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if ONNX_THREADS:
+        opts.intra_op_num_threads = ONNX_THREADS
+    return ort.InferenceSession(path, opts, providers=['CPUExecutionProvider'])
+
+def _load_session(quantize: bool):
+    return _model_for('onnx-int8' if quantize else 'onnx')
+
+def _logits(enc: dict, backend: str):
+    if backend == 'torch':
+        _, model = _load_once()
+        return model(**{k: v.to(_device) for k, v in enc.items()}).logits.float().cpu()
+    if backend not in BACKENDS:
+        raise ValueError(f'unknown sentiment backend: {backend}')
+    sess = _load_session(quantize=backend == 'onnx-int8')
+    names = {i.name for i in sess.get_inputs()}
+    feeds = {k: v.cpu().numpy().astype('int64') for k, v in enc.items() if k in names}
+    return torch.from_numpy(sess.run(['logits'], feeds)[0]).float()
+
+def _postprocess(probs, id2label: dict) -> List[Tuple[str, float]]:
+    # Neutral post-processing over a [N, 3] batch; float64 so thresholds compare like Python floats
+    probs = probs.detach().cpu().double()
+    pid = probs.argmax(dim=-1)
+    maxp = probs.gather(-1, pid.unsqueeze(-1)).squeeze(-1)
+    p_neg, p_neu, p_pos = probs.unbind(dim=-1)
+    
+    low = maxp < TAU
+    tie = ((p_pos - p_neg).abs() < DELTA) & (p_neu >= NEU_FLOOR)
+    neutral = low | tie
+    conf = torch.where(~low & tie, p_neu, maxp)
+    
+    return [
+        ('neutral' if n else id2label.get(i, 'neutral'), c)
+        for i, n, c in zip(pid.tolist(), neutral.tolist(), conf.tolist())
+    ]
 
 @torch.inference_mode()
-def predict_label(text: str) -> Tuple[str, float, str]:
-    tokenizer, model = _load_once()
+def predict_label(text: str, backend: str | None = None) -> Tuple[str, float, str]:
+    backend = backend or BACKEND
+    tokenizer = _load_tokenizer()
     text = _coerce_to_text(text)
     text = _normalize(text)
     batch = tokenizer(text, return_tensors='pt', truncation=True, max_length=MAX_LEN)
-    batch = {k: v.to(_device) for k, v in batch.items()}
     
-    logits = model(**batch).logits.squeeze(0)
-    probs = torch.softmax(logits, dim=-1).detach().cpu()
-    p_neg, p_neu, p_pos = probs.tolist()
-    pid = int(probs.argmax().item())
-    maxp = float(probs[pid].item())
-    id2label = model.config.id2label if hasattr(model.config, 'id2label') else {0: 'negative', 1: 'neutral', 2: 'positive'}
-    label = id2label.get(pid, 'neutral')
+    logits = _logits(batch, backend)
+    probs = torch.softmax(logits, dim=-1)
+    label, conf = _postprocess(probs, _labels(backend))[0]
+    return label, conf, model_version(backend)
+
+@torch.inference_mode()
+def predict_proba(texts: List[str], bucket_size: int = BUCKET_SIZE, backend: str | None = None):
+    """[N, num_labels] class probabilities, rows in input order."""
+    backend = backend or BACKEND
+    tokenizer = _load_tokenizer()
+    texts = [_normalize(_coerce_to_text(t)) for t in texts]
+    
+    # Tokenize once, then pad per length-sorted bucket instead of to the global max
+    enc = tokenizer(texts, truncation=True, max_length=MAX_LEN)
+    feats = [{k: enc[k][i] for k in enc.keys()} for i in range(len(texts))]
+    order = sorted(range(len(texts)), key=lambda i: len(feats[i]['input_ids']))
+    bucket_size = max(1, bucket_size)
+    
+    probs = torch.empty((len(texts), len(_labels(backend))), dtype=torch.float32)
+    for lo in range(0, len(order), bucket_size):
+        idx = order[lo:lo + bucket_size]
+        batch = tokenizer.pad([feats[i] for i in idx], return_tensors='pt')
+        probs[idx] = torch.softmax(_logits(batch, backend), dim=-1)
+    return probs
+
+def predict_batch(texts: List[str], bucket_size: int = BUCKET_SIZE, backend: str | None = None) -> List[Tuple[str, float, str]]:
+    if not texts:
+        return []
+    backend = backend or BACKEND
+    probs = predict_proba(texts, bucket_size, backend)
+    version = model_version(backend)
+    return [(label, conf, version) for label, conf in _postprocess(probs, _labels(backend))]
+
+class SentimentBatcher:
+    """Queue in front of predict_batch; one worker thread runs coalesced forward passes."""
+    
+    def __init__(self, fn=None, max_batch: int = BATCH_MAX, max_wait_ms: float = BATCH_WAIT_MS):
+        self.fn = fn or predict_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000
+        self._q = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
     
-    TAU = 0.40
-    DELTA = 0.07
-    NEU_FLOOR = 0.35
+    def submit(self, text: str) -> Future:
+        fut = Future()
+        self._ensure_worker()
+        self._q.put((text, fut, time.perf_counter()))
+        set_gauge('sent_batch_queue_depth', self._q.qsize())
+        return fut
     
-    if maxp < TAU:
-        return 'neutral', maxp, mv
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sentiment-batcher', daemon=True)
+                self._thread.start()
     
-    if abs(p_pos - p_neg) < DELTA and p_neu >= NEU_FLOOR:
-        return 'neutral', float(p_neu), mv
+    def _collect(self) -> list:
+        batch = [self._q.get()]
+        deadline = time.perf_counter() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
     
-    return label, float(maxp), mv
+    def _run(self):
+        while True:
+            batch = self._collect()
+            now = time.perf_counter()
+            set_gauge('sent_batch_queue_depth', self._q.qsize())
+            observe('sent_batch_size', len(batch))
+            for _, _, t_in in batch:
+                observe_ms('sent_batch_wait_ms', (now - t_in) * 1000)
+            live = [(text, fut) for text, fut, _ in batch if fut.set_running_or_notify_cancel()]
+            if not live:
+                continue
+            t0 = time.perf_counter()
+            try:
+                outs = self.fn([text for text, _ in live])
+            except Exception as e:
+                inc('sent_batch_errors_total', 1)
+                for _, fut in live:
+                    fut.set_exception(e)
+                continue
+            observe_ms('sent_batch_forward_ms', (time.perf_counter() - t0) * 1000)
+            inc('sent_batches_total', 1)
+            for (_, fut), out in zip(live, outs):
+                fut.set_result(out)
 
-@torch.inference_mode()
-def predict_batch(texts: List[str]) -> List[Tuple[str, float, str]]:
-    tokenizer, model = _load_once()
-    texts = [_normalize(t) for t in texts]
-    enc = tokenizer(texts, return_tensors='pt', truncation=True, padding=True, max_length=MAX_LEN)
-    enc = {k: v.to(_device) for k, v in enc.items()}
-    logits = model(**enc).logits
-    probs = torch.softmax(logits, dim=-1)
-    ids = probs.argmax(dim=-1).detach().cpu().tolist()
-    confs = probs.max(dim=-1).values.detach().cpu().tolist()
-    id2label = model.config.id2label if hasattr(model.config, 'id2label') else {0: 'negative', 1: 'neutral', 2: 'positive'}
-    return [(id2label[i], float(c), mv) for i, c in zip(ids, confs)]
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def submit_label(text: str) -> Future:
+    """Queue one text for batched inference; the future resolves to predict_label's tuple."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = SentimentBatcher()
+    return _batcher.submit(text)
 
 if __name__ == '__main__':
     print(predict_label('The outlook remains uncertain; oficials urged caution.'))
-    print(predict_batch(['Profits jump to a record.', 'Critics blasted the move as reckless.']))
\ No newline at end of file
+    print(predict_batch(['Profits jump to a record.', 'Critics blasted the move as reckless.']))
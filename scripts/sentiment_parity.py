@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import argparse, json, os, sqlite3, statistics, time
+from scripts.sentiment_infer import predict_label, predict_batch, predict_proba, export_onnx, _postprocess, _labels, ONNX_DIR
+
+GOLD = 'eval/gold_candidates.jsonl'
+DATASET = 'models/sentiment/dataset.jsonl'
+DB_PATH = os.getenv('DB_PATH', 'data/app.db')
+OUT_PATH = 'eval/sentiment_backends.json'
+
+def load_gold_texts(path, max_items=None):
+    # Gold rows carry ids only; texts are the stored article snippets (same as eval_models)
+    with open(path, 'r', encoding='utf-8') as f:
+        ids = [json.loads(line)['id'] for line in f]
+    if not os.path.exists(DB_PATH):
+        return []
+    conn = sqlite3.connect(DB_PATH)
+    id2snip = {r[0]: r[1] for r in conn.execute("SELECT id, snippet FROM articles").fetchall()}
+    conn.close()
+    texts = [id2snip[i] for i in ids if id2snip.get(i)]
+    return texts[:max_items] if max_items else texts
+
+def load_dataset_texts(path, max_items=None):
+    texts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            t = json.loads(line).get('text')
+            if t:
+                texts.append(t)
+    return texts[:max_items] if max_items else texts
+
+def latency_stats(texts, backend):
+    predict_label(texts[0], backend=backend)  # load + warm
+    per_item = []
+    for t in texts:
+        t0 = time.perf_counter()
+        predict_label(t, backend=backend)
+        per_item.append((time.perf_counter() - t0) * 1000)
+    per_item.sort()
+    t0 = time.perf_counter()
+    predict_batch(texts, backend=backend)
+    batch_s = time.perf_counter() - t0
+    return {
+        'p50_ms': round(statistics.median(per_item), 2),
+        'p95_ms': round(per_item[int(0.95 * (len(per_item) - 1))], 2),
+        'batch_items_per_s': round(len(texts) / batch_s, 2),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--backend', default='onnx-int8', choices=['onnx', 'onnx-int8'])
+    ap.add_argument('--gold', default=GOLD)
+    ap.add_argument('--max_items', type=int, default=None)
+    ap.add_argument('--out', default=OUT_PATH)
+    ap.add_argument('--export', action='store_true', help='(re)build the ONNX artifacts first')
+    args = ap.parse_args()
+    
+    if args.export:
+        print('exported:', export_onnx(ONNX_DIR, quantize=args.backend == 'onnx-int8'))
+    
+    texts = load_gold_texts(args.gold, args.max_items)
+    source = 'gold'
+    if not texts:
+        print(f'No gold snippets in {DB_PATH}; falling back to {DATASET}')
+        texts, source = load_dataset_texts(DATASET, args.max_items), 'dataset'
+    
+    ref = predict_proba(texts, backend='torch')
+    cand = predict_proba(texts, backend=args.backend)
+    ref_labels = [l for l, _ in _postprocess(ref, _labels('torch'))]
+    cand_labels = [l for l, _ in _postprocess(cand, _labels(args.backend))]
+    delta = (ref - cand).abs()
+    
+    results = {
+        'source': source,
+        'items': len(texts),
+        'backend': args.backend,
+        'parity': {
+            'label_agreement': round(sum(a == b for a, b in zip(ref_labels, cand_labels)) / len(texts), 4),
+            'prob_delta_mean': round(float(delta.mean()), 6),
+            'prob_delta_max': round(float(delta.max()), 6),
+        },
+        'latency': {
+            'torch': latency_stats(texts, 'torch'),
+            args.backend: latency_stats(texts, args.backend),
+        },
+    }
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+import os
+
+# Version/backend of the sentiment model, kept free of torch so the API can build cache
+# keys from it at import time (scripts.sentiment_infer re-exports these)
+mv = 'distilbert-mc@sent_v4'
+# Inference backend: eager torch, ONNX Runtime fp32, or ONNX Runtime with dynamic int8 weights
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+BACKEND = os.getenv('SENT_BACKEND', 'torch')
+
+def model_version(backend: str | None = None) -> str:
+    # Backend is part of the version so int8/fp32 outputs never share stored rows or cache keys
+    backend = backend or BACKEND
+    return mv if backend == 'torch' else f'{mv}/{backend}'
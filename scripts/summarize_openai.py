@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
-import os, time, re
+import asyncio, os, time, re
 from scripts.translate_es_to_en import translate_es_to_en
+from app.executors import run_model
 from app.obs import log
 
 PROVIDER = os.getenv('SUMMARY_PROVIDER,' 'openai')
@@ -58,6 +59,32 @@ def call_openai(prompt: str):
     ct = response.usage.output_tokens
     return text, pt, ct
 
+_async_clients = {}
+
+def _openai_async():
+    # AsyncOpenAI keeps a pooled httpx client; one per event loop
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        from openai import AsyncOpenAI
+        _async_clients.clear()
+        client = _async_clients[loop] = AsyncOpenAI()
+    return client
+
+async def call_openai_async(prompt: str):
+    try:
+        client = _openai_async()
+    except ImportError:
+        return '<stub summary>', 0, 0
+    response = await client.responses.create(
+        model=MODEL_NAME,
+        input=prompt
+    )
+    text = response.output_text
+    pt = response.usage.input_tokens
+    ct = response.usage.output_tokens
+    return text, pt, ct
+
 def summarize(text: str, lang: str) -> dict:
     if lang == 'es':
         text = translate_es_to_en(text)
@@ -81,5 +108,27 @@ def summarize(text: str, lang: str) -> dict:
         }
     }
     
+async def summarize_async(text: str, lang: str) -> dict:
+    if lang == 'es':
+        text = await run_model(translate_es_to_en, text)
+    text = ' '.join((text or '').split())[:4000]
+    prompt = build_prompt(text)
+    t0 = time.time()
+    if PROVIDER in ('lead3', 'stub'):
+        out = lead_n_summary(text)
+        return {'summary': out, 'latency_ms': 0, 'model_version': 'rule:lead3@sum_stub'}
+    mv = f"openai:{MODEL_NAME}@{VERSION}"
+    out, pt, ct = await call_openai_async(prompt)
+    dt = int((time.time() - t0) * 1000)
+    return {
+        'summary': out,
+        'latency_ms': dt,
+        'model_version': mv,
+        'usage': {
+            'prompt_tokens': pt,
+            'completion_tokens': ct
+        }
+    }
+    
 if __name__ == '__main__':
     print(summarize("Officials raised rates by 25 bps, citing inflation pressures.", "en"))
\ No newline at end of file
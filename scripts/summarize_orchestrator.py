@@ -3,16 +3,21 @@ import time
 from typing import Dict
 from scripts.summarize_openai import call_openai, build_prompt
 from scripts.translate_es_to_en import translate_es_to_en
+from app.model_registry import get_model
+
+def load_t5():
+    """Registry loader for 't5_small': loaded once, shared, evictable under the memory budget."""
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+    import torch
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    return AutoTokenizer.from_pretrained('t5-small'), AutoModelForSeq2SeqLM.from_pretrained('t5-small').eval().to(device)
 
 # Optional local fallback (lazy import)
 def _try_local_t5(text: str, max_new_tokens: int = 160):
     try:
-        from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
         import torch
-        tokenizer = AutoTokenizer.from_pretrained('t5-small')
-        model = AutoModelForSeq2SeqLM.from_pretrained('t5-small').eval()
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        model.to(device)
+        tokenizer, model = get_model('t5_small')
+        device = model.device
         batch = tokenizer('summarize: ' + text, return_tensors='pt', truncation=True, max_length=1024)
         with torch.inference_mode():
             out = model.generate(**{k: v.to(device) for k, v in batch.items()}, max_new_tokens=max_new_tokens)
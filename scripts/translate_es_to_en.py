@@ -1,38 +1,119 @@
 #!/usr/bin/env python3
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import os, torch
+import os
+from functools import partial
+from app.translation_cache import split_sentences, translate_sentences
+from app.model_registry import get_model
 
 MODEL_LOCAL = os.getenv('TRANSLATE_LOCAL_MODEL', '/app/ckpts/opus-mt-es-en')
 MODEL_NAME = os.getenv('TRANSLATE_MODEL', 'Helsinki-NLP/opus-mt-es-en')
+# Beam width; 1 = greedy "fast mode" (see scripts/bench_translate.py for the chrF/latency tradeoff)
+TRANSLATE_BEAMS = int(os.getenv('TRANSLATE_BEAMS', '4'))
+# Generation backend: eager torch Marian, or CTranslate2 with int8 weights (converted from the baked checkpoint)
+BACKENDS = ('torch', 'ct2-int8')
+TRANSLATE_BACKEND = os.getenv('TRANSLATE_BACKEND', 'torch')
+CT2_DIR = os.getenv('TRANSLATE_CT2_DIR', '/app/ckpts/opus-mt-es-en-ct2-int8')
+CT2_THREADS = int(os.getenv('TRANSLATE_CT2_THREADS', '0'))
 
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME)
-device = 'cuda' if torch.cuda.is_available() else 'cpu'
-model.to(device).eval()
+# Weights are held by app.model_registry and loaded on first use; torch/transformers
+# aren't imported until then
+tokenizer = None
+device = 'cpu'
 
-def _lazy_init():
-    global tokenizer, model
-    if tokenizer is None or model is None:
+def _load_tokenizer():
+    global tokenizer
+    if tokenizer is None:
+        from transformers import AutoTokenizer
         try:
             tokenizer = AutoTokenizer.from_pretrained(MODEL_LOCAL)
-            model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_LOCAL)
         except Exception:
-            # fallback to remote (should be rare once baked)
             tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-            model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME)
-        model.to(device).eval()
+    return tokenizer
 
-def translate_es_to_en(text: str, max_input_tokens: int = 512, max_new_tokens: int = 128) -> str:
-    text = ' '.join((text or '').split())
-    max_input_tokens = min(max_input_tokens, tokenizer.model_max_length)
-    enc = tokenizer([text], return_tensors='pt', truncation=True, max_length=max_input_tokens, padding=False)
+def _build(backend: str):
+    global device
+    if backend == 'ct2-int8':
+        import ctranslate2
+        if not os.path.exists(os.path.join(CT2_DIR, 'model.bin')):
+            # Converted at image build (Dockerfile.api) or by translate_parity.py --export, never
+            # from a request: the conversion is slow and the checkpoint dir is read-only at runtime
+            raise FileNotFoundError(f'{CT2_DIR}/model.bin missing; build it with export_ct2() (see Dockerfile.api)')
+        return ctranslate2.Translator(CT2_DIR, device='cpu', compute_type='int8', intra_threads=CT2_THREADS)
+    if backend != 'torch':
+        raise ValueError(f'unknown translate backend: {backend}')
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    try:
+        m = AutoModelForSeq2SeqLM.from_pretrained(MODEL_LOCAL)
+    except Exception:
+        # fallback to remote (should be rare once baked)
+        m = AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME)
+    return m.to(device).eval()
+
+def load_model():
+    """Registry loader for 'translator': the configured backend (TRANSLATE_BACKEND)."""
+    _load_tokenizer()
+    return _build(TRANSLATE_BACKEND)
+
+def _model_for(backend: str):
+    # Other backends (parity runs) get their own registry entries
+    if backend == TRANSLATE_BACKEND:
+        return get_model('translator')
+    return get_model(f'translator:{backend}', partial(_build, backend))
+
+def model_version(num_beams: int | None = None, backend: str | None = None) -> str:
+    backend = backend or TRANSLATE_BACKEND
+    return f'{MODEL_NAME}@tr_v2/b{num_beams or TRANSLATE_BEAMS}' + ('' if backend == 'torch' else f'/{backend}')
+
+def export_ct2(out_dir: str = CT2_DIR) -> str:
+    """Convert the baked Marian checkpoint (hub copy if it isn't baked) to CTranslate2 int8."""
+    if not os.path.exists(os.path.join(out_dir, 'model.bin')):
+        from ctranslate2.converters import TransformersConverter
+        src = MODEL_LOCAL if os.path.isdir(MODEL_LOCAL) else MODEL_NAME
+        TransformersConverter(src).convert(out_dir, quantization='int8', force=True)
+    return out_dir
+
+def _generate_ct2(batch: list[str], num_beams: int, max_input_tokens: int, max_new_tokens: int) -> list[str]:
+    src = [tokenizer.convert_ids_to_tokens(tokenizer.encode(s, truncation=True, max_length=max_input_tokens)) for s in batch]
+    new_tokens = min(max_new_tokens, int(max(map(len, src)) * 1.5) + 10)
+    results = _model_for('ct2-int8').translate_batch(src, beam_size=num_beams, max_decoding_length=new_tokens,
+                                                     max_batch_size=len(src), length_penalty=1.0)
+    return [tokenizer.decode(tokenizer.convert_tokens_to_ids(r.hypotheses[0]), skip_special_tokens=True) for r in results]
+
+def _generate(batch: list[str], num_beams: int, max_input_tokens: int, max_new_tokens: int,
+              backend: str | None = None) -> list[str]:
+    backend = backend or TRANSLATE_BACKEND
+    _load_tokenizer()
+    if backend == 'ct2-int8':
+        return _generate_ct2(batch, num_beams, max_input_tokens, max_new_tokens)
+    if backend != 'torch':
+        raise ValueError(f'unknown translate backend: {backend}')
+    import torch
+    model = _model_for('torch')
+    enc = tokenizer(batch, return_tensors='pt', truncation=True, max_length=max_input_tokens, padding=True)
+    # Per-sentence output tracks input length; no point letting beams run to max_new_tokens
+    new_tokens = min(max_new_tokens, int(enc['input_ids'].shape[1] * 1.5) + 10)
     enc = {k: v.to(device) for k, v in enc.items()}
     with torch.inference_mode():
         out = model.generate(
             **enc,
-            max_new_tokens=max_new_tokens,
-            num_beams=4,
+            max_new_tokens=new_tokens,
+            num_beams=num_beams,
             length_penalty=1.0,
             use_cache=True
         )
-    return tokenizer.decode(out[0], skip_special_tokens=True)
\ No newline at end of file
+    return tokenizer.batch_decode(out, skip_special_tokens=True)
+
+def translate_es_to_en(text: str, max_input_tokens: int = 512, max_new_tokens: int = 256, num_beams: int | None = None,
+                       backend: str | None = None) -> str:
+    """Sentence-split, cached, batched. Token limits apply per sentence, so long articles
+    are translated in full instead of being cut at 512 tokens."""
+    _load_tokenizer()
+    beams = num_beams or TRANSLATE_BEAMS
+    max_input_tokens = min(max_input_tokens, tokenizer.model_max_length)
+    sents = split_sentences(text)
+    if not sents:
+        return ''
+    out = translate_sentences(sents, lambda b: _generate(b, beams, max_input_tokens, max_new_tokens, backend),
+                              model_version(beams, backend))
+    return ' '.join(t for t in out if t)
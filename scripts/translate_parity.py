@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+import argparse, json, math, os, statistics, time
+from collections import Counter
+import pyarrow.parquet as pq
+from app import translation_cache
+from app.translation_cache import split_sentences
+import scripts.translate_es_to_en as tr
+from scripts.bench_translate import chrf
+
+GOLD = 'eval/gold_candidates.jsonl'
+ARTICLES_PATH = 'eval/ingest_articles.parquet'
+OUT_PATH = 'eval/translate_backends.json'
+
+def load_gold_es(path, max_items=None):
+    # Gold rows carry ids only; texts are the ingested article snippets
+    with open(path, 'r', encoding='utf-8') as f:
+        ids = [r['id'] for r in map(json.loads, f) if r.get('lang') == 'es']
+    id2snip = {r['id']: r['snippet'] for r in pq.read_table(ARTICLES_PATH, columns=['id', 'snippet']).to_pylist()}
+    texts = [id2snip[i] for i in ids if id2snip.get(i)]
+    return texts[:max_items] if max_items else texts
+
+def corpus_bleu(hyps, refs, n=4) -> float:
+    # BLEU-4 on whitespace tokens, brevity penalty over the corpus
+    match, total = [0] * n, [0] * n
+    hyp_len = ref_len = 0
+    for h, r in zip(hyps, refs):
+        h, r = h.split(), r.split()
+        hyp_len += len(h)
+        ref_len += len(r)
+        for k in range(1, n + 1):
+            hc = Counter(tuple(h[i:i + k]) for i in range(len(h) - k + 1))
+            rc = Counter(tuple(r[i:i + k]) for i in range(len(r) - k + 1))
+            match[k - 1] += sum((hc & rc).values())
+            total[k - 1] += max(len(h) - k + 1, 0)
+    if not hyp_len or not all(match):
+        return 0.0
+    log_p = sum(math.log(m / t) for m, t in zip(match, total)) / n
+    bp = 1.0 if hyp_len > ref_len else math.exp(1 - ref_len / hyp_len)
+    return round(100 * bp * math.exp(log_p), 2)
+
+def run(sents, backend, beams, batch_size):
+    # Straight through the model (no sentence cache), batched the way translate_es_to_en does
+    order = sorted(range(len(sents)), key=lambda i: len(sents[i]))
+    out = [None] * len(sents)
+    t0 = time.perf_counter()
+    for lo in range(0, len(order), batch_size):
+        idx = order[lo:lo + batch_size]
+        for i, t in zip(idx, tr._generate([sents[i] for i in idx], beams, 512, 256, backend)):
+            out[i] = t
+    return out, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--backend', default='ct2-int8', choices=[b for b in tr.BACKENDS if b != 'torch'])
+    ap.add_argument('--gold', default=GOLD)
+    ap.add_argument('--beams', type=int, default=tr.TRANSLATE_BEAMS)
+    ap.add_argument('--batch_size', type=int, default=translation_cache.TRANSLATE_BATCH_SIZE)
+    ap.add_argument('--max_items', type=int, default=None)
+    ap.add_argument('--out', default=OUT_PATH)
+    ap.add_argument('--export', action='store_true', help='(re)build the CTranslate2 model first')
+    args = ap.parse_args()
+
+    if args.export:
+        print('exported:', tr.export_ct2(tr.CT2_DIR))
+
+    texts = load_gold_es(args.gold, args.max_items)
+    sents = [s for t in texts for s in split_sentences(t)]
+    run(sents[:4], args.backend, args.beams, args.batch_size)       # load + warm both
+    run(sents[:4], 'torch', args.beams, args.batch_size)
+    ref, ref_s = run(sents, 'torch', args.beams, args.batch_size)
+    cand, cand_s = run(sents, args.backend, args.beams, args.batch_size)
+
+    results = {
+        'items': len(texts),
+        'sentences': len(sents),
+        'backend': args.backend,
+        'beams': args.beams,
+        'parity_vs_torch': {
+            'bleu': corpus_bleu(cand, ref),
+            'chrf': round(statistics.mean(chrf(h, r) for h, r in zip(cand, ref)), 2),
+            'exact_match': round(sum(a == b for a, b in zip(cand, ref)) / max(len(sents), 1), 4),
+        },
+        'throughput_sent_per_s': {
+            'torch': round(len(sents) / ref_s, 2),
+            args.backend: round(len(sents) / cand_s, 2),
+        },
+    }
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
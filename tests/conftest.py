@@ -1,8 +1,12 @@
-import os, pytest
+import os, pytest, tempfile
 from fastapi.testclient import TestClient
 
 os.environ.setdefault('OPENAI_API_KEY', 'testkey')
 os.environ.setdefault("DATABASE_URL", "")
+os.environ.setdefault('SENT_BATCHING', '0')
+os.environ.setdefault('PAGE_CACHE_DIR', tempfile.mkdtemp(prefix='page_cache_'))
+os.environ.setdefault('DB_PATH', os.path.join(tempfile.mkdtemp(prefix='app_db_'), 'app.db'))
+os.environ.setdefault('MODEL_WARMUP', '0')
 
 from fastapi.testclient import TestClient
 from app.main import app
@@ -22,18 +26,24 @@ def mock_summarize(monkeypatch):
             'usage': {'prompt_tokens': 50, 'completion_tokens': 80},
             'cost_cents': 0
         }
-    monkeypatch.setattr(ar, 'summarize', fake_sum, raising=True)
+    async def fake_sum_async(text, lang):
+        return fake_sum(text, lang)
+    monkeypatch.setattr(ar, 'summarize_async', fake_sum_async, raising=True)
     
     import scripts.summarize_openai as so
     monkeypatch.setattr(so, 'summarize', fake_sum, raising=True)
     
     import app.routers.analyze as ar
     monkeypatch.setattr(ar, 'predict_label', lambda text: ('neutral', 0.5, 'sent@test'), raising=True)
+    monkeypatch.setattr(ar, 'predict_batch', lambda texts: [('neutral', 0.5, 'sent@test') for _ in texts], raising=True)
     
 @pytest.fixture
 def mock_fetch(monkeypatch):
-    import app.services as services
-    monkeypatch.setattr(services, 'fetch_url', lambda url: 'Breaking: profits up 12% as costs fall.', raising=True)
+    # Replaces the network fetch only; (html, digest=None) skips the page cache
+    import app.routers.analyze as ar
+    async def fake_fetch(url, timeout_s=None):
+        return '<html><title>Profits</title><p>Breaking: profits up 12% as costs fall.</p></html>', None
+    monkeypatch.setattr(ar, 'fetch_page_async', fake_fetch, raising=True)
     
 @pytest.fixture
 def mock_sentiment(monkeypatch):
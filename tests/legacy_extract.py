@@ -0,0 +1,78 @@
+# Reference copy of the bs4-based cleaning that the single-parse engine (app/extract.py)
+# replaced; test_cleaning.py checks the new code against it. Test-only: not imported by the app.
+import re
+from datetime import datetime
+from bs4 import BeautifulSoup
+from readability import Document
+from app.extract import MAX_INPUT_CHARS
+
+def legacy_clean(html: str) -> tuple[str, dict]:
+    """Old clean_article_html: (text, {'title', 'snippet', 'pub_time'})."""
+    soup = BeautifulSoup(html or '', 'lxml')
+    title = (soup.title.string or '').strip() if soup.title else None
+    desc = None
+    for attr, val in [('property', 'og:description'), ('name', 'description')]:
+        tag = soup.find('meta', {attr: val})
+        if tag and tag.get('content'):
+            desc = tag['content'].strip()
+            break
+    pub = None
+    for attr, val in [('property', 'article:published_time'), ('itemprop', 'datePublished'), ('name', 'pubdate'), ('name', 'date')]:
+        tag = soup.find('meta', {attr: val})
+        if tag and tag.get('content'):
+            pub = tag['content'].strip()
+            break
+    if not pub:
+        t = soup.find('time', attrs={'datetime': True})
+        if t:
+            pub = t['datetime'].strip()
+    soup = BeautifulSoup(Document(html or '').summary(), 'lxml')
+    for tag in soup(['script', 'style', 'iframe', 'noscript']):
+        tag.decompose()
+    text = ' '.join(soup.get_text(separator=' ').split())[:MAX_INPUT_CHARS]
+    return text, {'title': title, 'snippet': desc, 'pub_time': pub}
+
+def legacy_pub_time(html: str) -> str | None:
+    """Old maybe_extract_pub_time. Its og lookup was misspelled ('article: published_time')
+    and never matched, so it is left out here."""
+    soup = BeautifulSoup(html or '', 'lxml')
+    candidates = []
+    for attr, val in [('name', 'pubdate'), ('name', 'date'), ('itemprop', 'datePublished')]:
+        tag = soup.find('meta', {attr: val})
+        if tag and tag.get('content'):
+            candidates.append(tag['content'])
+    t = soup.find('time', attrs={'datetime': True})
+    if t:
+        candidates.append(t['datetime'])
+    for c in candidates:
+        c = c.strip()
+        try:
+            return datetime.fromisoformat(c.replace('Z', '+00:00')).isoformat()
+        except ValueError:
+            if re.search(r'\d{4}-\d{2}-\d{2}', c):
+                return c
+    return None
+
+def _article_page(i: int) -> str:
+    # Chrome (nav, scripts, related links) around a long body, og meta in the head
+    paras = ''.join(f'<p>Paragraph {j} of story {i}: officials said rates, growth and prices moved, '
+                    f'with <a href="/x{j}">context</a> and quotes.</p>' for j in range(40 + i * 7))
+    return f"""<html><head><title>Story {i}</title>
+        <meta property="og:description" content="Summary {i}"><meta property="article:published_time" content="2025-01-0{1 + i}T10:00:00Z">
+        <script>var x = {i};</script><style>p {{ color: red }}</style></head><body>
+        <nav>{''.join(f'<a href="/s{k}">Section {k}</a>' for k in range(30))}</nav>
+        <article class="article-body">{paras}</article>
+        <aside class="related">{''.join(f'<li><a href="/r{k}">Related {k}</a></li>' for k in range(20))}</aside>
+        <footer>Copyright</footer></body></html>"""
+
+PAGES = [_article_page(i) for i in range(3)] + [
+    # pub_time only in a <time> element, description meta instead of og:
+    "<html><head><title> Rates hold </title><meta name='description' content=' Central bank pauses '></head>"
+    "<body><article><time datetime='2025-03-04T08:30:00+00:00'>March 4</time>"
+    + "<p>The central bank left rates unchanged on Tuesday, citing slower inflation.</p>" * 20 + "</article></body></html>",
+    # itemprop date, no title, non-ISO date string
+    "<html><head><meta itemprop='datePublished' content='2025-02-01 noon'></head><body><div class='story'>"
+    + "<p>Markets rallied after the report, with tech shares leading the gains.</p>" * 15 + "</div></body></html>",
+    # nothing but a paragraph
+    "<html><body><p>Short note.</p></body></html>",
+]
@@ -17,8 +17,60 @@ def test_analyze_requires_single_input(client):
     r = client.post('/analyze/', json={"text": "Sample", "html": "<p>Sample</p>"})
     assert r.status_code == 400
     
-def test_analyze_disallowed_domain(client, mock_fetch, mock_summarize, monkeypatch):
+def test_analyze_url_uses_fetched_page(client, mock_fetch, mock_summarize):
+    r = client.post('/analyze/', json={"url": "https://www.cnn.com/2025/01/01/business/profits-mock-fetch"})
+    assert r.status_code == 200
+    assert 'profits up 12%' in r.json()['summary']
+
+def test_analyze_disallowed_domain(client, mock_summarize, monkeypatch):
     import app.services as services
     monkeypatch.setattr(services, 'domain_allowed', lambda url: False, raising=True)
     r = client.post('/analyze/', json={"url": "http://bad.example.com/news"})
-    assert r.status_code == 403
\ No newline at end of file
+    assert r.status_code == 403
+
+def test_analyze_batch_per_item_errors(client, mock_summarize):
+    payload = {'items': [
+        {"text": "Markets rallied on upbeat outlook.", "lang": "en"},
+        {"text": "Sample", "html": "<p>Sample</p>"},
+        {"html": "<html><title>T</title><p>Rates held steady.</p></html>"},
+    ]}
+    r = client.post('/analyze/batch', json=payload)
+    assert r.status_code == 200
+    items = r.json()['items']
+    assert [it['ok'] for it in items] == [True, False, True]
+    assert items[1]['error']['status'] == 400
+    AnalyzeResponse(**items[0]['result'])
+
+def test_analyze_batch_isolates_lookup_errors_and_dedupes(client, mock_summarize, monkeypatch):
+    import app.routers.analyze as ar
+    real_resolve, calls = ar._resolve, []
+    async def resolve(item):
+        if item.url and 'broken' in str(item.url):
+            raise RuntimeError('db is locked')
+        return await real_resolve(item)
+    monkeypatch.setattr(ar, '_resolve', resolve)
+    real_summary = ar._summary_for
+    async def summary_for(prep):
+        calls.append(prep['text'])
+        return await real_summary(prep)
+    monkeypatch.setattr(ar, '_summary_for', summary_for)
+    same = {"text": "Batch dedupe: the ministry approved the new rail line budget.", "lang": "en"}
+    r = client.post('/analyze/batch', json={'items': [same, {"url": "https://www.cnn.com/broken"}, same]})
+    assert r.status_code == 200
+    items = r.json()['items']
+    assert [it['ok'] for it in items] == [True, False, True]
+    assert items[1]['error']['status'] == 500
+    assert len(calls) == 1
+    assert items[2]['result']['coalesced'] and items[2]['result']['summary'] == items[0]['result']['summary']
+
+def test_analyze_batch_keeps_predictions_when_cache_write_fails(client, mock_summarize, monkeypatch):
+    import app.routers.analyze as ar
+    real_set = ar._component_set
+    async def component_set(kind, *args):
+        if kind == 'sent':
+            raise RuntimeError('cache down')
+        return await real_set(kind, *args)
+    monkeypatch.setattr(ar, '_component_set', component_set)
+    items = [{"text": f"Cache write test {k}: exports rose for a third month.", "lang": "en"} for k in range(2)]
+    r = client.post('/analyze/batch', json={'items': items})
+    assert [it['ok'] for it in r.json()['items']] == [True, True]
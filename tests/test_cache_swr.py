@@ -0,0 +1,69 @@
+import asyncio, json, time
+import app.routers.analyze as ar
+from app.pg_cache import cache_set
+
+def test_stale_entry_served_and_refreshed_once():
+    refreshes = []
+    async def refresh():
+        refreshes.append(1)
+        await asyncio.sleep(0.01)
+        return {'summary': 'fresh'}
+    async def main():
+        key = 'an:test-stale'
+        cache_set(key, json.dumps({'summary': 'old', 'soft_expires_at': time.time() - 1}), 60)
+        outs = [await ar._cache_lookup(key, time.time(), refresh) for _ in range(3)]
+        await asyncio.gather(*ar._refreshing.values())
+        return outs
+    outs = asyncio.run(main())
+    assert all(o['summary'] == 'old' and o['cache_hit'] for o in outs)
+    assert 'soft_expires_at' not in outs[0]
+    assert len(refreshes) == 1
+
+def test_jitter_stays_in_band():
+    vals = [ar._jittered(1000) for _ in range(200)]
+    assert min(vals) >= 1000 * (1 - ar.CACHE_TTL_JITTER) - 1
+    assert max(vals) <= 1000 * (1 + ar.CACHE_TTL_JITTER)
+    assert len(set(vals)) > 1
+
+def test_sentiment_bump_reuses_cached_summary(client, mock_summarize, monkeypatch):
+    calls = []
+    orig = ar.summarize_async
+    async def counting(text, lang):
+        calls.append(text)
+        return await orig(text, lang)
+    monkeypatch.setattr(ar, 'summarize_async', counting)
+    body = {'text': 'Component cache test: the regulator fined the bank over reporting lapses.', 'lang': 'en'}
+    assert client.post('/analyze', json=body).status_code == 200
+    monkeypatch.setattr(ar, 'MV_SENT', 'distilbert-mc@sent_next')
+    r = client.post('/analyze', json=body).json()
+    assert not r['cache_hit'] and r['tokens'] == 0 and r['costs_cents'] == 0
+    assert len(calls) == 1
+
+def test_stale_entry_is_fresh_after_refresh(mock_summarize):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.pg_cache import cache_get
+    from app.schemas import AnalyzeRequest
+    from app.services import build_text_hash
+    body = {'text': 'Refresh test: the port reopened after the storm and shipping resumed.', 'lang': 'en'}
+    req = AnalyzeRequest(**body)
+    ckey = ar._cache_key(req, 'en')
+    fkey = ar._fingerprint_key({'text_hash': build_text_hash(ar._direct_text(req)), 'lang': 'en'})
+    with TestClient(app) as client:
+        assert client.post('/analyze', json=body).status_code == 200
+        for key in (ckey, fkey):
+            payload = json.loads(cache_get(key))
+            cache_set(key, json.dumps(dict(payload, soft_expires_at=time.time() - 1)), 60)
+        assert client.post('/analyze', json=body).json()['cache_hit']
+        deadline = time.time() + 5
+        while time.time() < deadline and json.loads(cache_get(ckey))['soft_expires_at'] < time.time():
+            time.sleep(0.02)
+        for key in (ckey, fkey):
+            assert json.loads(cache_get(key))['soft_expires_at'] > time.time()
+        assert client.post('/analyze', json=body).json()['cache_hit']
+        assert not ar._refreshing
+
+def test_sentiment_cache_keys_follow_backend():
+    from scripts.sentiment_version import model_version
+    assert ar.MV_SENT == model_version()
+    assert len({model_version('torch'), model_version('onnx'), model_version('onnx-int8')}) == 3
@@ -0,0 +1,30 @@
+from app import canonical
+from app.canonical import normalize_url, canonical_link
+
+def test_rules_collapse_variants():
+    want = 'https://www.bbc.com/news/world-123'
+    for u in ['http://m.bbc.com/news/world-123.amp?utm_source=x&fbclid=1',
+              'https://www.bbc.com/news/world-123/',
+              'https://www-bbc-com.cdn.ampproject.org/c/s/www.bbc.com/news/world-123.amp',
+              'https://news.google.com/articles?url=https%3A%2F%2Fwww.bbc.com%2Fnews%2Fworld-123%3Fgclid%3D9']:
+        assert normalize_url(u) == want
+    assert normalize_url('https://edition.cnn.com/a/b/index.html?outputType=amp&page=2') == 'https://www.cnn.com/a/b/index.html?page=2'
+    assert normalize_url('https://abcnews.go.com/US/story?id=9&cid=social') == 'https://abcnews.go.com/US/story?id=9'
+
+def test_canonical_link_and_learned_mapping(tmp_path, monkeypatch):
+    monkeypatch.setattr(canonical, 'DB_PATH', str(tmp_path / 'c.db'))
+    monkeypatch.setattr(canonical._schema, 'ready', False)
+    canonical._memo.clear()
+    html = "<html><head><link rel='canonical' href='/world/2024/story'></head><body></body></html>"
+    link = canonical_link(html, 'https://www.theguardian.com/p/abc12')
+    assert link == 'https://www.theguardian.com/world/2024/story'
+    assert canonical.remember('https://www.theguardian.com/p/abc12', link, 'rel') == link
+    canonical._memo.clear()
+    assert canonical.resolve_url('https://amp.theguardian.com/p/abc12?utm_medium=s') == link
+    # cross-site canonicals are not trusted
+    assert canonical.remember('https://www.npr.org/x', 'https://evil.example/x', 'rel') is None
+
+def test_unruled_hosts_keep_content_params_and_scheme():
+    assert normalize_url('http://example.org/story?output=amp&ref=123&utm_source=x&fbclid=1') == \
+        'http://example.org/story?output=amp&ref=123'
+    assert normalize_url('https://www.foxnews.com/politics/x?cmpid=prn') == 'https://www.foxnews.com/politics/x'
@@ -1,6 +1,20 @@
-from app.services import clean_article_html
+from datetime import datetime
+import pytest
+from app.services import clean_article_html, maybe_extract_pub_time
+from tests.legacy_extract import PAGES, legacy_clean, legacy_pub_time
 
 def test_cleaning_returns_text_and_meta():
     text, meta = clean_article_html("<html><title>T</title><p>X</p></html>")
     assert isinstance(text, str) and isinstance(meta, dict)
-    assert set(meta.keys()) == {'title','snippet','pub_time'}
\ No newline at end of file
+    assert set(meta.keys()) == {'title','snippet','pub_time'}
+
+@pytest.mark.parametrize('html', PAGES)
+def test_single_parse_engine_matches_legacy_output(html):
+    text, meta = clean_article_html(html)
+    assert (text, meta) == legacy_clean(html)
+    pub = maybe_extract_pub_time(html)
+    if 'article:published_time' in html:
+        # the old lookup never saw this tag (see legacy_pub_time); now it's used
+        assert pub == datetime.fromisoformat(meta['pub_time'].replace('Z', '+00:00')).isoformat()
+    else:
+        assert pub == legacy_pub_time(html)
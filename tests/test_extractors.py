@@ -0,0 +1,45 @@
+from app.extract import extract, extract_body, parse_html
+from app.extractors import rule_for
+
+PARA = 'Officials said on Tuesday that inflation had eased for a third month in a row. '
+
+def _bbc_page(n_blocks: int) -> str:
+    blocks = ''.join(f'<div data-component="text-block"><p>{PARA}</p></div>' for _ in range(n_blocks))
+    return f"""<html><head><title>Rates held - BBC News</title></head><body>
+        <nav><a href="/news">News</a><a href="/sport">Sport</a></nav>
+        <article><h1>Rates held</h1><time datetime="2025-03-04T09:00:00Z">4 March</time>
+        {blocks}<div data-component="links-block"><a href="/x">Related: other story</a></div></article>
+        <aside>Most read</aside></body></html>"""
+
+def test_rule_lookup_by_host_suffix():
+    assert rule_for('https://www.bbc.com/news/articles/x').domain == 'bbc.com'
+    assert rule_for('https://edition.cnn.com/2025/01/01/x').domain == 'cnn.com'
+    assert rule_for('https://example.org/x') is None
+    assert rule_for(None) is None
+
+def test_site_rule_extracts_body_and_meta():
+    text, meta, _ = extract(_bbc_page(6), 'https://www.bbc.com/news/articles/x')
+    assert text.startswith('Officials said') and 'Related' not in text and 'Most read' not in text
+    assert meta['title'] == 'Rates held'
+    assert meta['pub_time'] == '2025-03-04T09:00:00Z'
+
+def test_short_rule_output_falls_back_to_readability():
+    html = _bbc_page(1)
+    _, source = extract_body(parse_html(html), 'https://www.bbc.com/news/articles/x')
+    assert source == 'fallback'
+    _, source = extract_body(parse_html(html), 'https://example.org/x')
+    assert source == 'generic'
+
+def test_clean_version_follows_the_hosts_rule(monkeypatch):
+    from app import extractors
+    from app.services import CLEAN_VERSION, clean_version
+    url = 'https://www.bbc.com/news/articles/x'
+    assert clean_version('https://example.org/x') == CLEAN_VERSION
+    before = clean_version(url)
+    assert before.startswith(CLEAN_VERSION + '/')
+    spec = {'body': ['article p'], 'remove': ['.related']}
+    monkeypatch.setitem(extractors.RULES, 'bbc.com', extractors.Rule('bbc.com', spec))
+    edited = clean_version(url)
+    assert edited != before
+    monkeypatch.setitem(extractors.RULES, 'bbc.com', extractors.Rule('bbc.com', dict(spec)))
+    assert clean_version(url) == edited
@@ -0,0 +1,95 @@
+import asyncio, httpx, pytest
+from fastapi import HTTPException
+from app import host_policy
+from app.services import fetch_url_async, fetch_page_async
+
+URL = 'https://apnews.com/article/test-story'
+
+@pytest.fixture(autouse=True)
+def _fresh_robots():
+    host_policy.ROBOTS.clear()
+
+def test_fetch_async_reads_html(httpx_mock):
+    httpx_mock.add_response(url='https://apnews.com/robots.txt', text='User-agent: *\nAllow: /\n')
+    httpx_mock.add_response(url=URL, html='<html><p>Rates held steady.</p></html>', headers={'content-type': 'text/html; charset=utf-8'})
+    html = asyncio.run(fetch_url_async(URL))
+    assert 'Rates held steady.' in html
+
+def test_fetch_async_honors_robots(httpx_mock):
+    httpx_mock.add_response(url='https://apnews.com/robots.txt', text='User-agent: *\nDisallow: /\n')
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(fetch_url_async(URL))
+    assert e.value.status_code == 403
+
+def test_fetch_async_caps_body_and_sniffs_meta_charset(httpx_mock, monkeypatch):
+    import app.services as services
+    httpx_mock.add_response(url='https://apnews.com/robots.txt', text='User-agent: *\nAllow: /\n', is_reusable=True)
+    body = '<html><head><meta charset="iso-8859-1"></head><p>Año económico</p></html>'.encode('latin-1')
+    httpx_mock.add_response(url=URL, content=body, headers={'content-type': 'text/html'})
+    assert 'Año económico' in asyncio.run(fetch_url_async(URL))
+    
+    monkeypatch.setattr(services, 'FETCH_MAX_BYTES', 1024)
+    httpx_mock.add_response(url=URL, content=b'<html>' + b'x' * 5000, headers={'content-type': 'text/html'})
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(fetch_url_async(URL))
+    assert e.value.status_code == 413
+    
+    httpx_mock.add_response(url=URL, content=b'%PDF-1.7 ...', headers={'content-type': 'text/html'})
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(fetch_url_async(URL))
+    assert e.value.status_code == 415
+
+def test_fetch_revalidates_with_etag(httpx_mock):
+    from app.metrics import counters
+    httpx_mock.add_response(url='https://apnews.com/robots.txt', text='User-agent: *\nAllow: /\n')
+    url = URL + '-etag'
+    httpx_mock.add_response(url=url, html='<html><p>Same story.</p></html>', headers={'content-type': 'text/html', 'etag': '"v1"'})
+    httpx_mock.add_response(url=url, status_code=304, match_headers={'If-None-Match': '"v1"'})
+    before = counters['page_cache_revalidated']
+    first = asyncio.run(fetch_page_async(url))
+    second = asyncio.run(fetch_page_async(url))
+    assert second == first and 'Same story.' in second[0]
+    assert counters['page_cache_revalidated'] == before + 1
+
+def test_page_cache_evicts_lru(tmp_path):
+    import os
+    from app.page_cache import PageCache
+    pc = PageCache(str(tmp_path), max_bytes=3000)
+    for i in range(5):
+        pc.store(f'https://x/{i}', os.urandom(1000), {'content-type': 'text/html'})  # incompressible
+    assert pc.lookup('https://x/0') is None
+    assert pc.lookup('https://x/4') is not None
+
+def test_fetch_304_with_missing_blob_refetches(httpx_mock, monkeypatch):
+    import os
+    from app.page_cache import PAGES
+    httpx_mock.add_response(url='https://apnews.com/robots.txt', text='User-agent: *\nAllow: /\n')
+    url = URL + '-gone'
+    httpx_mock.add_response(url=url, html='<html><p>Kept story.</p></html>', headers={'content-type': 'text/html', 'etag': '"v1"'})
+    html, digest = asyncio.run(fetch_page_async(url))
+    lookup = PAGES.lookup
+    def lookup_then_evict(u):
+        # Blob evicted between the lookup and the 304
+        page = lookup(u)
+        os.remove(PAGES._path(digest))
+        return page
+    monkeypatch.setattr(PAGES, 'lookup', lookup_then_evict)
+    seen = []
+    def upstream(request):
+        seen.append(request.headers.get('if-none-match'))
+        if request.headers.get('if-none-match'):
+            return httpx.Response(304)
+        return httpx.Response(200, html='<html><p>Kept story.</p></html>', headers={'content-type': 'text/html'})
+    httpx_mock.add_callback(upstream, url=url, is_reusable=True)
+    assert asyncio.run(fetch_page_async(url)) == (html, digest)
+    assert seen == ['"v1"', None]
+
+def test_rewriting_extraction_does_not_grow_size(tmp_path):
+    from app.page_cache import PageCache
+    pc = PageCache(str(tmp_path))
+    digest = pc.store('https://x/a', b'<p>body</p>', {'content-type': 'text/html'})
+    size = lambda: pc._conn().execute('SELECT size FROM blobs WHERE digest = ?', (digest,)).fetchone()[0]
+    pc.put_extracted(digest, 'v1', ['text', {}])
+    once = size()
+    pc.put_extracted(digest, 'v1', ['text', {}])
+    assert size() == once
@@ -0,0 +1,29 @@
+import hashlib
+from app.fingerprint import content_fingerprint
+
+def test_fingerprint_ignores_case_punct_whitespace():
+    a = content_fingerprint('Profits up 12%, as costs fall.')
+    b = content_fingerprint('  profits UP 12 as\ncosts fall ')
+    assert a == b
+    assert a != content_fingerprint('Profits down 12% as costs rise.')
+
+def test_same_content_different_input_is_cache_hit(client, mock_summarize):
+    body = 'Markets rallied today after the central bank held rates steady, fingerprint test.'
+    r1 = client.post('/analyze', json={'text': body, 'lang': 'en'})
+    assert r1.status_code == 200 and not r1.json()['cache_hit']
+    r2 = client.post('/analyze', json={'text': body.upper().replace(',', ''), 'lang': 'en'})
+    assert r2.status_code == 200
+    assert r2.json()['cache_hit'] and r2.json()['summary'] == r1.json()['summary']
+
+def test_rows_stored_under_legacy_hashes_still_match():
+    from app.fingerprint import legacy_fingerprints
+    from app.services import ensure_db, find_analysis, store_analysis
+    ensure_db()
+    text = 'Legacy hash test: the  port, reopened after the storm.'
+    api_hash, ingest_hash = legacy_fingerprints(text)
+    assert api_hash == hashlib.sha256('Legacy hash test: the port, reopened after the storm.'.encode()).hexdigest()
+    store_analysis('legacy-1', 'https://example.com/a', 'example.com', 'T', 'en', None, 'snip', api_hash,
+                   'old summary', 'neutral', 0.5, 0, 'mv@legacy')
+    assert find_analysis(content_fingerprint(text), 'mv@legacy') is None
+    row = find_analysis(content_fingerprint(text), 'mv@legacy', legacy_fingerprints(text))
+    assert row['article_id'] == 'legacy-1' and row['summary'] == 'old summary'
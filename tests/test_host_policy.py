@@ -0,0 +1,43 @@
+import asyncio, os, time
+import httpx
+from app import host_policy
+from app.host_policy import Allowlist, RobotsCache
+
+def test_allowlist_suffix_index_and_hot_reload(tmp_path, monkeypatch):
+    path = tmp_path / 'allow.txt'
+    path.write_text('bbc.com\n# comment\nabcnews.go.com\n')
+    al = Allowlist(str(path))
+    assert al.allows('https://www.bbc.com/news/x') and al.allows('abcnews.go.com')
+    assert not al.allows('https://go.com/') and not al.allows('https://notbbc.com/')
+    monkeypatch.setattr(host_policy, 'ALLOWLIST_CHECK_S', 0)
+    path.write_text('npr.org\n')
+    os.utime(path, (time.time() + 5, time.time() + 5))
+    assert al.allows('https://www.npr.org/a') and not al.allows('https://www.bbc.com/')
+
+def test_robots_cached_and_crawl_delay(httpx_mock):
+    httpx_mock.add_response(url='https://apnews.com/robots.txt', text='User-agent: *\nCrawl-delay: 2\nDisallow: /private\n')
+    rc = RobotsCache()
+    async def main():
+        async with httpx.AsyncClient() as client:
+            ok = await rc.allowed_async('https://apnews.com/article/a', 'bot', client)
+            blocked = await rc.allowed_async('https://apnews.com/private/b', 'bot', client)
+            return ok, blocked
+    assert asyncio.run(main()) == (True, False)
+    assert len(httpx_mock.get_requests()) == 1
+    assert rc._reserve('https://apnews.com/x', 'bot') == 0
+    assert 1.9 < rc._reserve('https://apnews.com/y', 'bot') <= 2
+
+def test_crawl_delay_queue_bounded_and_released_on_cancel(httpx_mock):
+    httpx_mock.add_response(url='https://apnews.com/robots.txt', text='User-agent: *\nCrawl-delay: 2\n')
+    rc = RobotsCache()
+    async def main():
+        async with httpx.AsyncClient() as client:
+            await rc.allowed_async('https://apnews.com/a', 'bot', client)
+        assert await rc.wait_turn_async('https://apnews.com/a', 'bot', max_wait=1)      # free slot
+        waiter = asyncio.ensure_future(rc.wait_turn_async('https://apnews.com/b', 'bot', max_wait=3))
+        await asyncio.sleep(0.01)
+        assert not await rc.wait_turn_async('https://apnews.com/c', 'bot', max_wait=3)  # 4s away: refused
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return rc._reserve('https://apnews.com/d', 'bot')
+    assert 1.9 < asyncio.run(main()) <= 2      # the cancelled waiter's slot went back
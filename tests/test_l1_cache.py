@@ -0,0 +1,20 @@
+import time
+from app.l1_cache import L1Cache, MISSING
+
+def test_lru_eviction_by_bytes():
+    c = L1Cache(max_bytes=L1Cache._size('k0', 'x' * 100) * 3)
+    for i in range(3):
+        c.set(f'k{i}', 'x' * 100, ttl_s=60)
+    assert c.get('k0') is not MISSING      # k0 now most recent
+    c.set('k3', 'x' * 100, ttl_s=60)
+    assert c.get('k1') is MISSING
+    assert c.get('k0') is not MISSING and c.get('k3') is not MISSING
+
+def test_ttl_and_negative_entries():
+    c = L1Cache(max_bytes=1 << 20)
+    c.set('hot', '{"summary": "s"}', ttl_s=0.05)
+    c.set_missing('gone', ttl_s=60)
+    assert c.get('hot') == '{"summary": "s"}'
+    assert c.get('gone') is None
+    time.sleep(0.06)
+    assert c.get('hot') is MISSING
@@ -0,0 +1,29 @@
+import random, sqlite3
+from app import near_dup
+
+# ~600-word article body; real wire copy is this long or longer
+_rng = random.Random(11)
+BODY = ' '.join(_rng.choice(['rates', 'bank', 'held', 'inflation', 'market', 'officials', 'said', 'data',
+                             'index', 'percent', 'close', 'growth', 'labour', 'cuts', 'months', 'news'])
+                + str(_rng.randint(0, 50)) for _ in range(600))
+
+def test_syndicated_copy_is_near():
+    a = near_dup.simhash(BODY)
+    b = near_dup.simhash('By Jane Doe, Wire Staff. ' + BODY + ' Read more: related coverage.')
+    c = near_dup.simhash('Local club wins the regional cup after a dramatic penalty shootout on Saturday evening.')
+    assert near_dup.hamming(a, b) <= near_dup.NEAR_DUP_MAX_BITS
+    assert near_dup.hamming(a, c) > 10
+
+def test_index_lookup_and_analysis_link():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE analyses(article_id TEXT, summary TEXT, sentiment TEXT, confidence REAL, cost_cents INTEGER, model_version TEXT)')
+    near_dup.ensure_schema(conn)
+    h = near_dup.simhash(BODY)
+    near_dup.index_article(conn, 'a1', h)
+    near_dup.index_article(conn, 'a2', h ^ (1 << 63) ^ 0xFFFF)  # far away, high bit set
+    conn.execute("INSERT INTO analyses VALUES ('a1', 'Rates held.', 'neutral', 0.8, 1, 'mv')")
+    assert near_dup.find_near_dup(conn, h ^ 0b101) == ('a1', 2)
+    assert near_dup.find_near_dup(conn, h ^ (1 << 63) ^ 0xFFFF) == ('a2', 0)
+    hit = near_dup.find_near_analysis(conn, h ^ 1, 'mv')
+    assert hit['article_id'] == 'a1' and hit['summary'] == 'Rates held.'
+    assert near_dup.find_near_analysis(conn, h ^ 1, 'other') is None
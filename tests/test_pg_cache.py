@@ -0,0 +1,96 @@
+import json, time
+from contextlib import contextmanager
+import pytest
+import app.pg_cache as pc
+
+class FakePG:
+    # Just enough of a pool/connection/cursor for pg_cache's statements; payloads are kept
+    # decoded, the way psycopg hands JSONB back
+    def __init__(self):
+        self.rows, self.closed = {}, False
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def get_stats(self):
+        return {'pool_size': 1, 'pool_available': 1, 'requests_waiting': 0}
+
+    def close(self):
+        self.closed = True
+
+class _FakeCursor:
+    def __init__(self, db):
+        self.db, self.row, self.rowcount = db, None, 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params, prepare=False):
+        now, rows = time.time(), self.db.rows
+        if sql is pc.SQL_GET:
+            hit = rows.get(params[0])
+            self.row = (hit[0], hit[1] - now) if hit and hit[1] > now else None
+        elif sql is pc.SQL_SET:
+            rows[params[0]] = (json.loads(params[1]), now + params[2])
+        elif sql is pc.SQL_PRUNE:
+            expired = sorted((k for k, v in rows.items() if v[1] <= now), key=lambda k: rows[k][1])[:params[0]]
+            for k in expired:
+                del rows[k]
+            self.rowcount = len(expired)
+        elif sql is pc.SQL_DELETE:
+            self.rowcount = int(rows.pop(params[0], None) is not None)
+
+    def fetchone(self):
+        return self.row
+
+@pytest.fixture
+def fake_pg(monkeypatch):
+    db = FakePG()
+    monkeypatch.setattr(pc, 'PG_URL', 'postgresql://fake/cache')
+    monkeypatch.setattr(pc, '_pool', db)
+    return db
+
+def test_plain_string_payload_round_trips(fake_pg):
+    payload = json.dumps('Los mercados subieron tras el informe.')
+    pc.cache_set('tr:plain', payload, 60)
+    pc.L1.delete('tr:plain')                  # force the Postgres read
+    got = pc.cache_get('tr:plain')
+    assert got == payload and json.loads(got) == 'Los mercados subieron tras el informe.'
+    pc.cache_set('an:obj', json.dumps({'summary': 'ñ'}, ensure_ascii=False), 60)
+    pc.L1.delete('an:obj')
+    assert json.loads(pc.cache_get('an:obj')) == {'summary': 'ñ'}
+
+def _wait_for(cond, timeout_s=5.0):
+    deadline = time.time() + timeout_s
+    while not cond() and time.time() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+def test_maintenance_loop_prunes_expired_rows(fake_pg):
+    fake_pg.rows['an:expired'] = ({'summary': 'old'}, time.time() - 1)
+    fake_pg.rows['an:live'] = ({'summary': 'new'}, time.time() + 60)
+    pc.start_maintenance(interval_s=60)
+    try:
+        assert _wait_for(lambda: 'an:expired' not in fake_pg.rows)
+        assert 'an:live' in fake_pg.rows
+    finally:
+        pc.stop_maintenance()
+    assert not pc._maint_thread.is_alive()
+
+def test_app_shutdown_stops_maintenance_and_closes_pool(fake_pg):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app):
+        assert _wait_for(lambda: pc._maint_thread is not None and pc._maint_thread.is_alive())
+    assert fake_pg.closed and pc._pool is None
+    assert not pc._maint_thread.is_alive()
@@ -0,0 +1,43 @@
+import asyncio, time, pytest
+from app.pipeline import Stage, run_stages
+
+def test_independent_branches_overlap():
+    async def slow(x, delay=0.2):
+        await asyncio.sleep(delay)
+        return x
+    async def main():
+        return await run_stages([
+            Stage('src', lambda: slow(1, 0)),
+            Stage('a', lambda v: slow(v + 1), ('src',)),
+            Stage('b', lambda v: slow(v + 2), ('src',)),
+            Stage('join', lambda a, b: slow(a + b, 0), ('a', 'b')),
+        ])
+    t0 = time.perf_counter()
+    out, stage_ms = asyncio.run(main())
+    assert out['join'] == 5
+    assert time.perf_counter() - t0 < 0.35
+    assert set(stage_ms) == {'src', 'a', 'b', 'join'}
+
+def test_stage_error_propagates():
+    async def boom(_):
+        raise ValueError('bad stage')
+    async def ok():
+        return 1
+    with pytest.raises(ValueError, match='bad stage'):
+        asyncio.run(run_stages([Stage('a', ok), Stage('b', boom, ('a',))]))
+
+def test_process_cpu_pool_runs_extract_and_merges_metrics(monkeypatch):
+    from app import executors
+    from app.extract import extract
+    from app.metrics import snapshot_metrics
+    monkeypatch.setattr(executors, 'CPU_MODE', 'process')
+    monkeypatch.setattr(executors, 'CPU_WORKERS', 1)
+    monkeypatch.setattr(executors, '_cpu_pool', None)
+    html = '<html><title>T</title><body><p>' + 'Some article text here. ' * 40 + '</p></body></html>'
+    before = snapshot_metrics()['counters'].get('extract_no_rule', 0)
+    try:
+        text, meta, _ = asyncio.run(executors.run_cpu(extract, html, 'https://example.org/a'))
+    finally:
+        executors.shutdown_cpu_pool()
+    assert text.startswith('Some article text') and meta['title'] == 'T'
+    assert snapshot_metrics()['counters']['extract_no_rule'] == before + 1
@@ -0,0 +1,21 @@
+import pytest
+from scripts.sentiment_infer import SentimentBatcher
+
+def test_batcher_coalesces_and_keeps_order():
+    seen = []
+    def fake_batch(texts):
+        seen.append(len(texts))
+        return [('neutral', float(len(t)), 'sent@test') for t in texts]
+    b = SentimentBatcher(fn=fake_batch, max_batch=4, max_wait_ms=50)
+    texts = ['a' * i for i in range(1, 11)]
+    futs = [b.submit(t) for t in texts]
+    outs = [f.result(timeout=5) for f in futs]
+    assert [o[1] for o in outs] == [float(len(t)) for t in texts]
+    assert max(seen) <= 4 and sum(seen) == 10 and len(seen) < 10
+
+def test_batcher_propagates_errors():
+    def boom(texts):
+        raise RuntimeError('model down')
+    b = SentimentBatcher(fn=boom, max_batch=2, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match='model down'):
+        b.submit('x').result(timeout=5)
@@ -0,0 +1,20 @@
+import torch
+from scripts.sentiment_infer import _postprocess, TAU, DELTA, NEU_FLOOR, ID2LABEL
+
+def _scalar(probs):
+    # Reference: the per-row rule predict_label has always applied
+    p_neg, p_neu, p_pos = probs.tolist()
+    pid = int(probs.argmax().item())
+    maxp = float(probs[pid].item())
+    if maxp < TAU:
+        return 'neutral', maxp
+    if abs(p_pos - p_neg) < DELTA and p_neu >= NEU_FLOOR:
+        return 'neutral', float(p_neu)
+    return ID2LABEL[pid], float(maxp)
+
+def test_vectorized_neutral_matches_scalar_rule():
+    g = torch.Generator().manual_seed(7)
+    probs = torch.softmax(torch.randn(500, 3, generator=g) * 2, dim=-1)
+    edge = torch.tensor([[0.39, 0.22, 0.39], [0.30, 0.36, 0.34], [0.10, 0.20, 0.70], [0.32, 0.35, 0.33]])
+    probs = torch.cat([probs, edge])
+    assert _postprocess(probs, ID2LABEL) == [_scalar(row) for row in probs]
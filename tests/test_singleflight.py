@@ -0,0 +1,33 @@
+import asyncio
+from app.singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_run():
+    calls = []
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'summary': 'x'}
+    async def main():
+        sf = SingleFlight('t')
+        return await asyncio.gather(*(sf.do('k', work) for _ in range(5)))
+    outs = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in outs) == [False, True, True, True, True]
+    assert all(r == {'summary': 'x'} for r, _ in outs)
+
+def test_failure_reaches_waiters_and_is_not_sticky():
+    attempts = []
+    async def flaky():
+        attempts.append(1)
+        await asyncio.sleep(0.02)
+        if len(attempts) == 1:
+            raise RuntimeError('upstream down')
+        return 'ok'
+    async def main():
+        sf = SingleFlight('t')
+        first = await asyncio.gather(*(sf.do('k', flaky) for _ in range(3)), return_exceptions=True)
+        second = await sf.do('k', flaky)
+        return first, second
+    first, second = asyncio.run(main())
+    assert all(isinstance(e, RuntimeError) for e in first)
+    assert second == ('ok', False)
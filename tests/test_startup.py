@@ -0,0 +1,69 @@
+import subprocess, sys
+import pytest
+from app import model_registry as mr
+
+def test_importing_app_does_not_load_torch():
+    probe = "import sys, app.main; print('heavy:' + ','.join(m for m in ('torch', 'transformers') if m in sys.modules))"
+    out = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == 'heavy:'
+
+def test_ready_tracks_lazy_loads(client, monkeypatch):
+    monkeypatch.setattr(mr, '_slots', {'fake': mr._Slot('fake', 'builtins:dict'), 'broken': mr._Slot('broken', 'builtins:nope')})
+    monkeypatch.setattr(mr, 'READY_MODELS', ['fake'])
+    r = client.get('/ready')
+    assert r.status_code == 503 and r.json()['models']['fake']['state'] == 'not_loaded'
+    assert mr.get_model('fake') is mr.get_model('fake')
+    r = client.get('/ready')
+    assert r.status_code == 200 and r.json()['models']['fake']['state'] == 'ready'
+    with pytest.raises(AttributeError):
+        mr.get_model('broken')
+    assert mr.model_status()['broken']['state'] == 'error'
+
+def test_registry_shares_models_and_evicts_lru(client, monkeypatch):
+    class Fake:
+        def __init__(self, mb):
+            self.mb = mb
+    sizes = {'a': 30, 'b': 30, 'c': 30}
+    monkeypatch.setattr(mr, '_slots', {n: mr._Slot(n, lambda n=n: Fake(sizes[n])) for n in sizes})
+    monkeypatch.setattr(mr, '_tensor_bytes', lambda obj: obj.mb * 2**20)
+    monkeypatch.setattr(mr, 'MODEL_MEMORY_BUDGET_MB', 70)
+    a = mr.get_model('a')
+    mr.get_model('b')
+    assert mr.get_model('a') is a           # shared, not reloaded; 'b' is now least recently used
+    mr.get_model('c')                       # 90 MB > 70 MB budget
+    status = mr.model_status()
+    assert status['b']['state'] == 'not_loaded' and status['b']['evictions'] == 1
+    assert status['a']['state'] == status['c']['state'] == 'ready'
+    assert status['a']['loads'] == 1
+    models = client.get('/metrics').json()['models']
+    assert models['resident_mb'] == 60 and models['budget_mb'] == 70
+
+def test_budget_never_evicts_ready_models(monkeypatch):
+    class Fake:
+        mb = 40
+    monkeypatch.setattr(mr, '_slots', {n: mr._Slot(n, Fake) for n in ('translator', 't5')})
+    monkeypatch.setattr(mr, '_tensor_bytes', lambda obj: obj.mb * 2**20)
+    monkeypatch.setattr(mr, 'MODEL_MEMORY_BUDGET_MB', 50)
+    monkeypatch.setattr(mr, 'READY_MODELS', ['translator'])
+    mr.get_model('translator')
+    mr.get_model('t5')                      # over budget, but the LRU one is pinned
+    assert mr.is_ready() and mr.model_status()['translator']['evictions'] == 0
+
+def test_preload_keeps_only_forkable_models(monkeypatch):
+    class Module:
+        pass
+    monkeypatch.setattr(mr, '_slots', {'torchy': mr._Slot('torchy', Module), 'native': mr._Slot('native', object)})
+    monkeypatch.setattr(mr, '_tensor_bytes', lambda obj: 2**20 if isinstance(obj, Module) else 0)
+    monkeypatch.setattr(mr, 'MODEL_WARMUP', True)
+    status = mr.preload(['torchy', 'native'])
+    assert status['torchy']['state'] == 'ready' and status['native']['state'] == 'not_loaded'
+    assert mr.start_warmup(['torchy']) is None     # a forked worker has nothing left to load
+
+def test_per_model_hit_and_load_counters(monkeypatch):
+    from app.metrics import snapshot_metrics
+    monkeypatch.setattr(mr, '_slots', {'counted': mr._Slot('counted', 'builtins:dict')})
+    for _ in range(3):
+        mr.get_model('counted')
+    snap = snapshot_metrics()
+    assert snap['counters']['model_counted_loads'] == 1 and snap['counters']['model_counted_hit'] == 2
+    assert snap['hit_rates']['model_counted'] == round(2 / 3, 4)
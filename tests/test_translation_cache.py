@@ -0,0 +1,31 @@
+import pytest
+from app import translation_cache as tc
+
+def test_split_sentences_keeps_quotes_and_caps_length():
+    sents = tc.split_sentences('Dijo: «No.» Luego salió. ¿Qué pasó? Eran las 3.5 horas.')
+    assert sents == ['Dijo: «No.»', 'Luego salió.', '¿Qué pasó?', 'Eran las 3.5 horas.']
+    assert max(len(s.split()) for s in tc.split_sentences('palabra ' * 200)) == tc.MAX_SENT_WORDS
+
+def test_sentences_are_translated_once_and_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(tc, 'DB_PATH', str(tmp_path / 't.db'))
+    monkeypatch.setattr(tc._schema, 'ready', False)
+    calls = []
+    def gen(batch):
+        calls.append(list(batch))
+        return [s.upper() for s in batch]
+    sents = ['Hola mundo.', 'Suscríbete al boletín.', 'Hola mundo.', 'Adiós.']
+    assert tc.translate_sentences(sents, gen, 'm@v1') == ['HOLA MUNDO.', 'SUSCRÍBETE AL BOLETÍN.', 'HOLA MUNDO.', 'ADIÓS.']
+    # one batch, duplicates collapsed, shortest first
+    assert calls == [['Adiós.', 'Hola mundo.', 'Suscríbete al boletín.']]
+    assert tc.translate_sentences(['Suscríbete al boletín.', 'Nuevo.'], gen, 'm@v1') == ['SUSCRÍBETE AL BOLETÍN.', 'NUEVO.']
+    assert calls[-1] == ['Nuevo.']
+    # another model version doesn't reuse entries
+    tc.translate_sentences(['Adiós.'], gen, 'm@v2')
+    assert calls[-1] == ['Adiós.']
+
+def test_ct2_backend_never_converts_at_serve_time(tmp_path, monkeypatch):
+    import scripts.translate_es_to_en as tr
+    monkeypatch.setattr(tr, 'CT2_DIR', str(tmp_path / 'ct2'))
+    monkeypatch.setattr(tr, 'export_ct2', lambda *a: pytest.fail('converted at serve time'))
+    with pytest.raises(FileNotFoundError, match='export_ct2'):
+        tr._build('ct2-int8')